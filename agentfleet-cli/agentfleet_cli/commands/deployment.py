@@ -92,15 +92,22 @@ def list_deployments(args):
     if args.get("environment"):
         params["environment"] = args.get("environment")
     
-    # Send request to list deployments
+    # Send requests to list deployments, following pagination cursors
     print_info("Fetching deployments...")
-    response = make_api_request("GET", "deployments", params=params, api_url=api_url, api_key=api_key)
-    
-    if not response:
-        print_error("Failed to list deployments")
-        return 1
-    
-    if not response or (isinstance(response, list) and len(response) == 0):
+    response = []
+    while True:
+        page = make_api_request("GET", "deployments", params=params, api_url=api_url, api_key=api_key)
+        
+        if not page:
+            print_error("Failed to list deployments")
+            return 1
+        
+        response.extend(page.get("items", []))
+        if not page.get("nextCursor"):
+            break
+        params["cursor"] = page["nextCursor"]
+    
+    if len(response) == 0:
         print_info("No deployments found")
         return 0
     
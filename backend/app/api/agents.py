@@ -1,27 +1,48 @@
 
 import json
-from typing import Dict, List, Optional, Any
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Any, Tuple
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, Depends, HTTPException, Query, Body, Path
 from datetime import datetime
 import uuid
 
 from app.models.agent import (
     CreateAgentRequest, UpdateAgentRequest, RegisterAgentRequest,
-    AgentResponse, EnvironmentType, AgentStatus
+    AgentResponse, AgentPageResponse, EnvironmentType, AgentStatus
 )
-from app.database import get_db, Agent, Deployment, AgentTest, AgentMetrics
-from app.services.vertex_ai import VertexAIService
+from app.database import get_db, Agent, Deployment, AgentTest, AgentMetrics, DeploymentStatus, LineageRelation
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, build_page
+from app.api.responses import FastJSONResponse, StreamFormat, streaming_response
+from app.api.projection import AGENT_MAPPER
 from app.services.agent_registry import AgentRegistryService
+from app.services.container import get_registry_service
 
 router = APIRouter()
-vertex_service = VertexAIService()
-registry_service = AgentRegistryService()
+
+# Upper bound on agents per batch registration (keeps multi-row inserts under the bind parameter limit)
+MAX_REGISTER_BATCH_SIZE = 500
+
+# Registration is idempotent on these columns (uq_agents_name_environment_source_hash)
+REGISTRATION_IDENTITY = ("name", "environment", "source_hash")
+# Columns a repeated registration refreshes on the existing agent
+REGISTRATION_REFRESH_COLUMNS = (
+    "description", "repository_url", "model_id", "temperature", "max_output_tokens",
+    "system_instruction", "configuration", "updated_at",
+)
+DUPLICATE_SOURCE_DETAIL = "An agent with this name, environment and source hash already exists"
+
+# Upper bound on hops followed by the lineage graph in each direction
+MAX_LINEAGE_DEPTH = 20
 
 @router.post("/agents", response_model=AgentResponse)
 async def create_agent(
     request: CreateAgentRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """Creates a new agent record in the registry."""
     try:
@@ -50,214 +71,345 @@ async def create_agent(
         )
 
         db.add(agent)
-        db.commit()
-        db.refresh(agent)
+        await db.commit()
+        await db.refresh(agent)
         
-        return {
-            "id": agent.id,
-            "name": agent.name,
-            "description": agent.description,
-            "agentFamilyId": agent.agent_family_id,
-            "framework": agent.framework,
-            "repositoryUrl": agent.repository_url,
-            "sourceHash": agent.source_hash,
-            "templateId": agent.template_id,
-            "status": agent.status,
-            "environment": agent.environment,
-            "modelId": agent.model_id,
-            "temperature": agent.temperature,
-            "maxOutputTokens": agent.max_output_tokens,
-            "systemInstruction": agent.system_instruction,
-            "configuration": agent.configuration,
-            "createdAt": agent.created_at,
-            "updatedAt": agent.updated_at,
-            "createdBy": agent.created_by
-        }
+        return AGENT_MAPPER.from_instance(agent)
         
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=DUPLICATE_SOURCE_DETAIL)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating agent: {str(e)}")
 
+def _registration_values(request: RegisterAgentRequest, agent_family_id: str) -> Tuple[Dict, Optional[Dict]]:
+    """
+    Builds the agent row, and the deployment row when deployment info is present,
+    for a registration request.
+    """
+    now = datetime.utcnow()
+    agent_values = {
+        "id": str(uuid.uuid4()),
+        "name": request.name,
+        "description": request.description,
+        "agent_family_id": agent_family_id,
+        "framework": request.framework.value,
+        "repository_url": request.repositoryUrl,
+        "source_hash": request.sourceHash,
+        "template_id": None,
+        # Agents registered together with a deployment are already DEPLOYED
+        "status": AgentStatus.DEPLOYED.value if request.deploymentInfo else AgentStatus.DRAFT.value,
+        "environment": request.environment.value,
+        "model_id": request.modelId,
+        "temperature": request.temperature,
+        "max_output_tokens": request.maxOutputTokens,
+        "system_instruction": request.systemInstruction,
+        "configuration": request.configuration,
+        "created_at": now,
+        "updated_at": now,
+        "created_by": None,
+        "current_deployment_id": None,
+    }
+    
+    if not request.deploymentInfo:
+        return agent_values, None
+    
+    deployment_values = {
+        "id": str(uuid.uuid4()),
+        "agent_id": agent_values["id"],
+        "deployment_type": request.deploymentInfo.get("deploymentType", "AGENT_ENGINE"),
+        "version": request.deploymentInfo.get("version", "1.0.0"),
+        "environment": request.environment.value,
+        "project_id": request.projectId,
+        "region": request.region,
+        "resource_name": request.deploymentInfo.get("resourceName"),
+        "status": DeploymentStatus.SUCCESSFUL.value,
+        "endpoint_url": request.deploymentInfo.get("endpointUrl"),
+        "deployed_at": now,
+        "updated_at": now,
+        "deployed_by": None,
+        "configuration": request.deploymentInfo,
+    }
+    # A new agent's only deployment is its current one
+    agent_values["current_deployment_id"] = deployment_values["id"]
+    return agent_values, deployment_values
+
+def _registration_upsert(db: AsyncSession, agent_rows: List[Dict]):
+    """
+    Builds the INSERT ... ON CONFLICT for registration rows, returning every column of
+    the new or already-registered agent. A returned id that differs from the generated
+    one means the agent already existed.
+    """
+    # ON CONFLICT is dialect-specific; SQLite is supported for local development
+    dialect_insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+    statement = dialect_insert(Agent.__table__).values(agent_rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(REGISTRATION_IDENTITY),
+        set_={column: statement.excluded[column] for column in REGISTRATION_REFRESH_COLUMNS}
+    )
+    return statement.returning(*Agent.__table__.c)
+
+async def _insert_new_deployments(db: AsyncSession, deployment_rows: List[Dict]) -> List[Dict]:
+    """
+    Inserts the registration deployments not recorded yet, identified by agent, project,
+    region and resource name, and returns them. Retried registrations add nothing, while a
+    known source deployed somewhere new still gets its deployment. Concurrent registrations
+    of one agent wait on its row, locked by the registration upsert, so they see each other.
+    """
+    def identity(values) -> Tuple:
+        return (values["agent_id"], values["project_id"], values["region"], values["resource_name"])
+
+    targets = list({(row["agent_id"], row["project_id"], row["region"]) for row in deployment_rows})
+    recorded = set()
+    if targets:
+        recorded = {
+            identity(row._mapping)
+            for row in (await db.execute(
+                select(Deployment.agent_id, Deployment.project_id, Deployment.region, Deployment.resource_name)
+                .where(tuple_(Deployment.agent_id, Deployment.project_id, Deployment.region).in_(targets))
+            )).all()
+        }
+
+    new_rows = []
+    for row in deployment_rows:
+        if identity(row) not in recorded:
+            recorded.add(identity(row))
+            new_rows.append(row)
+    if new_rows:
+        await db.execute(insert(Deployment.__table__).values(new_rows))
+    return new_rows
+
 @router.post("/agents/register", response_model=AgentResponse)
 async def register_agent(
     request: RegisterAgentRequest,
-    db: Session = Depends(get_db)
+    registry_service: AgentRegistryService = Depends(get_registry_service),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Registers an agent from an external source (like Agent Starter Pack CI/CD pipeline).
     Used for integration with external development workflows.
+    Idempotent on (name, environment, sourceHash): a retried registration returns the
+    existing agent instead of creating a duplicate, and records its deployment only if
+    that deployment is new.
     """
     try:
-        # Check if agent family exists, otherwise create new family ID
-        agent_family_id = request.agentFamilyId
-        if not agent_family_id:
-            # Look for existing agents with same name in the same environment
-            existing_agent = db.query(Agent).filter(
-                Agent.name == request.name,
-                Agent.environment == request.environment.value
-            ).first()
-            
-            if existing_agent:
-                agent_family_id = existing_agent.agent_family_id
-            else:
-                agent_family_id = str(uuid.uuid4())
-        
-        # Create agent in database
-        agent = Agent(
-            id=str(uuid.uuid4()),
-            name=request.name,
-            description=request.description,
-            agent_family_id=agent_family_id,
-            framework=request.framework.value,
-            repository_url=request.repositoryUrl,
-            source_hash=request.sourceHash,
-            status=AgentStatus.DRAFT.value,
-            environment=request.environment.value,
-            model_id=request.modelId,
-            temperature=request.temperature,
-            max_output_tokens=request.maxOutputTokens,
-            system_instruction=request.systemInstruction,
-            configuration=request.configuration,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
+        agent_values, deployment_values = _registration_values(
+            request, request.agentFamilyId or str(uuid.uuid4())
         )
-
-        db.add(agent)
         
-        # If deployment info is provided, create a deployment record
-        if request.deploymentInfo:
-            deployment = Deployment(
-                id=str(uuid.uuid4()),
-                agent_id=agent.id,
-                deployment_type=request.deploymentInfo.get("deploymentType", "AGENT_ENGINE"),
-                version=request.deploymentInfo.get("version", "1.0.0"),
-                environment=request.environment.value,
-                project_id=request.projectId,
-                region=request.region,
-                resource_name=request.deploymentInfo.get("resourceName"),
-                status="SUCCESSFUL",
-                endpoint_url=request.deploymentInfo.get("endpointUrl"),
-                deployed_at=datetime.utcnow(),
-                configuration=request.deploymentInfo
+        if not request.agentFamilyId:
+            # Join the family of an existing agent with the same name in the same environment,
+            # resolved inside the insert rather than with a separate lookup
+            agent_values["agent_family_id"] = func.coalesce(
+                select(Agent.agent_family_id).where(
+                    Agent.name == request.name,
+                    Agent.environment == request.environment.value
+                ).limit(1).scalar_subquery(),
+                agent_values["agent_family_id"]
+            )
+        
+        # Insert the agent, or return the one already registered from this source
+        row = (await db.execute(_registration_upsert(db, [agent_values]))).one()
+        
+        if deployment_values:
+            deployment_values["agent_id"] = row.id
+            if await _insert_new_deployments(db, [deployment_values]):
+                await registry_service.refresh_current_deployments(db, [row.id])
+        
+        await db.commit()
+        
+        return AGENT_MAPPER.from_values(row._mapping)
+        
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error registering agent: {str(e)}")
+
+@router.post("/agents/register:batch")
+async def register_agents_batch(
+    items: List[Dict[str, Any]] = Body(...),
+    registry_service: AgentRegistryService = Depends(get_registry_service),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """
+    Registers many agents in one request, for monorepo pipelines.
+    Families are resolved with one query and all rows are written with a multi-row
+    upsert in a single transaction; agents already registered from the same source
+    are returned as "existing". Invalid items are reported individually and do not
+    block the rest of the batch.
+    """
+    try:
+        if len(items) > MAX_REGISTER_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch size exceeds the maximum of {MAX_REGISTER_BATCH_SIZE}"
             )
+        
+        # Validate each item on its own so one bad item does not fail the batch
+        results: List[Optional[Dict]] = [None] * len(items)
+        valid: List[Tuple[int, RegisterAgentRequest]] = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, RegisterAgentRequest.model_validate(item)))
+            except ValidationError as validation_error:
+                results[index] = {
+                    "index": index,
+                    "status": "error",
+                    "error": validation_error.errors(include_url=False, include_context=False)
+                }
+        
+        # Resolve families for items without an explicit family ID in one query
+        lookup_keys = {
+            (request.name, request.environment.value)
+            for _, request in valid if not request.agentFamilyId
+        }
+        families: Dict[Tuple[str, str], str] = {}
+        if lookup_keys:
+            rows = (await db.execute(
+                select(Agent.name, Agent.environment, Agent.agent_family_id)
+                .where(tuple_(Agent.name, Agent.environment).in_(list(lookup_keys)))
+            )).all()
+            for row in rows:
+                families.setdefault((row.name, row.environment), row.agent_family_id)
+        
+        # Repeats of the same source identity within the batch collapse onto one row,
+        # since a single ON CONFLICT statement cannot affect a row twice
+        pending: Dict[Tuple[str, str, str], Tuple[Dict, Optional[Dict]]] = {}
+        for _, request in valid:
+            identity = (request.name, request.environment.value, request.sourceHash)
+            if identity in pending:
+                continue
             
-            db.add(deployment)
+            agent_family_id = request.agentFamilyId
+            if not agent_family_id:
+                # New names share one family across the batch, as sequential registration would
+                key = (request.name, request.environment.value)
+                agent_family_id = families.setdefault(key, str(uuid.uuid4()))
             
-            # Update agent status to DEPLOYED
-            agent.status = AgentStatus.DEPLOYED.value
+            pending[identity] = _registration_values(request, agent_family_id)
+        
+        registered = {}
+        if pending:
+            rows = (await db.execute(
+                _registration_upsert(db, [agent_values for agent_values, _ in pending.values()])
+            )).all()
+            registered = {
+                (row.name, row.environment, row.source_hash): row._mapping for row in rows
+            }
+        
+        created = {
+            identity for identity, (agent_values, _) in pending.items()
+            if registered[identity]["id"] == agent_values["id"]
+        }
         
-        db.commit()
-        db.refresh(agent)
+        # Deployments attach to the registered agent, new or existing, unless already recorded
+        deployment_rows = []
+        for identity, (_, deployment_values) in pending.items():
+            if deployment_values:
+                deployment_values["agent_id"] = registered[identity]["id"]
+                deployment_rows.append(deployment_values)
+        inserted = await _insert_new_deployments(db, deployment_rows)
+        if inserted:
+            await registry_service.refresh_current_deployments(
+                db, [deployment_values["agent_id"] for deployment_values in inserted]
+            )
+        await db.commit()
+        
+        # Only the first item for an inserted identity reports "created"
+        counts = {"created": 0, "existing": 0}
+        for index, request in valid:
+            identity = (request.name, request.environment.value, request.sourceHash)
+            row = registered[identity]
+            status = "created" if identity in created else "existing"
+            created.discard(identity)
+            counts[status] += 1
+            results[index] = {"index": index, "status": status, "agent": AGENT_MAPPER.from_values(row)}
         
         return {
-            "id": agent.id,
-            "name": agent.name,
-            "description": agent.description,
-            "agentFamilyId": agent.agent_family_id,
-            "framework": agent.framework,
-            "repositoryUrl": agent.repository_url,
-            "sourceHash": agent.source_hash,
-            "templateId": agent.template_id,
-            "status": agent.status,
-            "environment": agent.environment,
-            "modelId": agent.model_id,
-            "temperature": agent.temperature,
-            "maxOutputTokens": agent.max_output_tokens,
-            "systemInstruction": agent.system_instruction,
-            "configuration": agent.configuration,
-            "createdAt": agent.created_at,
-            "updatedAt": agent.updated_at,
-            "createdBy": agent.created_by
+            "created": counts["created"],
+            "existing": counts["existing"],
+            "failed": len(items) - len(valid),
+            "results": results
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error registering agent: {str(e)}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error registering agents: {str(e)}")
 
-@router.get("/agents", response_model=List[AgentResponse])
+@router.get("/agents", response_model=None, responses={200: {"model": AgentPageResponse}})
 async def list_agents(
     environment: Optional[EnvironmentType] = None,
     status: Optional[AgentStatus] = None,
     framework: Optional[str] = None,
-    db: Session = Depends(get_db)
-) -> List[Dict]:
-    """Lists all agents with optional filtering."""
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return, 'summary' (default) or 'all'"
+    ),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's nextCursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: Optional[StreamFormat] = Query(
+        None,
+        description="Stream every matching row as 'ndjson' or a 'json' array instead of paging"
+    ),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """Lists agents newest first with optional filtering, one page at a time."""
     try:
-        # Base query
-        query = db.query(Agent)
+        field_names = AGENT_MAPPER.parse_fields(fields)
+        
+        # Base query over plain columns: the requested fields plus the sort key
+        query = AGENT_MAPPER.select(field_names, Agent.created_at, Agent.id)
         
         # Apply filters
         if environment:
-            query = query.filter(Agent.environment == environment.value)
+            query = query.where(Agent.environment == environment.value)
         
         if status:
-            query = query.filter(Agent.status == status.value)
+            query = query.where(Agent.status == status.value)
             
         if framework:
-            query = query.filter(Agent.framework == framework)
-        
-        # Get agents from database
-        agents = query.all()
-        
-        return [
-            {
-                "id": agent.id,
-                "name": agent.name,
-                "description": agent.description,
-                "agentFamilyId": agent.agent_family_id,
-                "framework": agent.framework,
-                "repositoryUrl": agent.repository_url,
-                "sourceHash": agent.source_hash,
-                "templateId": agent.template_id,
-                "status": agent.status,
-                "environment": agent.environment,
-                "modelId": agent.model_id,
-                "temperature": agent.temperature,
-                "maxOutputTokens": agent.max_output_tokens,
-                "systemInstruction": agent.system_instruction,
-                "configuration": agent.configuration,
-                "createdAt": agent.created_at,
-                "updatedAt": agent.updated_at,
-                "createdBy": agent.created_by
-            }
-            for agent in agents
-        ]
+            query = query.where(Agent.framework == framework)
+        
+        # Get one page of agents from database
+        if stream:
+            # Encode rows as they come off a server-side cursor
+            query = query.order_by(Agent.created_at.desc(), Agent.id.desc())
+            # The stream reads through its own session; give this one's connection back now
+            await db.close()
+            return await streaming_response(query, AGENT_MAPPER.row_mapper(field_names), stream)
+        
+        query = paginate(query, Agent.created_at, Agent.id, cursor, limit)
+        rows = (await db.execute(query)).all()
+        
+        return FastJSONResponse(build_page(
+            rows,
+            limit,
+            sort_key=lambda row: (row.created_at, row.id),
+            serialize=AGENT_MAPPER.row_mapper(field_names)
+        ))
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing agents: {str(e)}")
 
-@router.get("/agents/{agent_id}", response_model=AgentResponse)
+@router.get("/agents/{agent_id}", response_model=None, responses={200: {"model": AgentResponse}})
 async def get_agent(
     agent_id: str = Path(..., description="The ID of the agent to retrieve"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """Gets a specific agent by ID."""
     try:
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        row = (await db.execute(
+            AGENT_MAPPER.select(AGENT_MAPPER.all_fields).where(Agent.id == agent_id)
+        )).first()
         
-        if not agent:
+        if not row:
             raise HTTPException(status_code=404, detail="Agent not found")
         
-        return {
-            "id": agent.id,
-            "name": agent.name,
-            "description": agent.description,
-            "agentFamilyId": agent.agent_family_id,
-            "framework": agent.framework,
-            "repositoryUrl": agent.repository_url,
-            "sourceHash": agent.source_hash,
-            "templateId": agent.template_id,
-            "status": agent.status,
-            "environment": agent.environment,
-            "modelId": agent.model_id,
-            "temperature": agent.temperature,
-            "maxOutputTokens": agent.max_output_tokens,
-            "systemInstruction": agent.system_instruction,
-            "configuration": agent.configuration,
-            "createdAt": agent.created_at,
-            "updatedAt": agent.updated_at,
-            "createdBy": agent.created_by
-        }
+        return FastJSONResponse(AGENT_MAPPER.row_mapper(AGENT_MAPPER.all_fields)(row))
         
     except HTTPException:
         raise
@@ -268,11 +420,11 @@ async def get_agent(
 async def update_agent(
     agent_id: str,
     request: UpdateAgentRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """Updates an existing agent."""
     try:
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        agent = await db.get(Agent, agent_id)
         
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
@@ -310,64 +462,48 @@ async def update_agent(
         
         agent.updated_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(agent)
+        await db.commit()
+        await db.refresh(agent)
         
-        return {
-            "id": agent.id,
-            "name": agent.name,
-            "description": agent.description,
-            "agentFamilyId": agent.agent_family_id,
-            "framework": agent.framework,
-            "repositoryUrl": agent.repository_url,
-            "sourceHash": agent.source_hash,
-            "templateId": agent.template_id,
-            "status": agent.status,
-            "environment": agent.environment,
-            "modelId": agent.model_id,
-            "temperature": agent.temperature,
-            "maxOutputTokens": agent.max_output_tokens,
-            "systemInstruction": agent.system_instruction,
-            "configuration": agent.configuration,
-            "createdAt": agent.created_at,
-            "updatedAt": agent.updated_at,
-            "createdBy": agent.created_by
-        }
+        return AGENT_MAPPER.from_instance(agent)
         
     except HTTPException:
         raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=DUPLICATE_SOURCE_DETAIL)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating agent: {str(e)}")
 
 @router.delete("/agents/{agent_id}")
 async def delete_agent(
     agent_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """Deletes an agent."""
     try:
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        agent = await db.get(Agent, agent_id)
         
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
         
         # Delete the agent
-        db.delete(agent)
-        db.commit()
+        await db.delete(agent)
+        await db.commit()
         
         return {"message": "Agent deleted successfully"}
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting agent: {str(e)}")
 
 @router.get("/agents/{agent_id}/lineage")
 async def get_agent_lineage(
     agent_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Gets the lineage of an agent, showing related agents across the current environment.
@@ -375,15 +511,15 @@ async def get_agent_lineage(
     For cross-environment lineage, a separate higher-level federation would be needed.
     """
     try:
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        agent = await db.get(Agent, agent_id)
         
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
         
         # Get all agents in the same family in the current environment
-        family_agents = db.query(Agent).filter(
-            Agent.agent_family_id == agent.agent_family_id
-        ).all()
+        family_agents = (await db.execute(
+            select(Agent).where(Agent.agent_family_id == agent.agent_family_id)
+        )).scalars().all()
         
         return {
             "agentId": agent.id,
@@ -405,18 +541,42 @@ async def get_agent_lineage(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting agent lineage: {str(e)}")
 
+@router.get("/agents/{agent_id}/lineage/graph")
+async def get_agent_lineage_graph(
+    agent_id: str,
+    max_depth: int = Query(5, ge=1, le=MAX_LINEAGE_DEPTH, description="Maximum hops to follow in each direction"),
+    registry_service: AgentRegistryService = Depends(get_registry_service),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """
+    Gets the ancestry and descendant graph of an agent from the lineage edges.
+    Ancestors sit in earlier environments and descendants in later ones; agents
+    registered in other AgentFleet instances appear as nodes known only by ID.
+    """
+    try:
+        if not await db.get(Agent, agent_id):
+            raise HTTPException(status_code=404, detail="Agent not found")
+        
+        return await registry_service.get_lineage_graph(db, agent_id, max_depth)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting agent lineage graph: {str(e)}")
+
 @router.post("/agents/{agent_id}/register-external-reference")
 async def register_external_reference(
     agent_id: str,
     reference_data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db)
+    registry_service: AgentRegistryService = Depends(get_registry_service),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Registers information about related agents in other environments.
     This allows for cross-environment awareness between separate AgentFleet instances.
     """
     try:
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        agent = await db.get(Agent, agent_id)
         
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
@@ -429,41 +589,34 @@ async def register_external_reference(
         if not all([external_environment, external_agent_id, external_endpoint]):
             raise HTTPException(status_code=400, detail="Missing required reference data")
             
-        # Update agent configuration with external reference
-        if not agent.configuration:
-            agent.configuration = {}
-            
-        if "externalReferences" not in agent.configuration:
-            agent.configuration["externalReferences"] = []
-            
-        # Add or update the external reference
-        external_refs = agent.configuration["externalReferences"]
-        existing_ref_index = next((i for i, ref in enumerate(external_refs) 
-                                 if ref.get("environment") == external_environment), None)
-        
-        if existing_ref_index is not None:
-            external_refs[existing_ref_index].update({
-                "externalAgentId": external_agent_id,
-                "externalEndpoint": external_endpoint,
-                "updatedAt": datetime.utcnow().isoformat()
-            })
-        else:
-            external_refs.append({
-                "environment": external_environment,
-                "externalAgentId": external_agent_id,
-                "externalEndpoint": external_endpoint,
-                "registeredAt": datetime.utcnow().isoformat()
-            })
-        
-        db.commit()
+        # Add or update the external reference edge for that environment
+        await registry_service.link_agents(
+            db,
+            agent,
+            external_agent_id,
+            external_environment,
+            LineageRelation.EXTERNAL_REFERENCE,
+            external_endpoint=external_endpoint
+        )
+        await db.commit()
         
+        links = await registry_service.get_agent_links(db, agent.id, LineageRelation.EXTERNAL_REFERENCE)
         return {
             "agentId": agent.id,
-            "externalReferences": agent.configuration.get("externalReferences", [])
+            "externalReferences": [
+                {
+                    "environment": link["environment"],
+                    "externalAgentId": link["agentId"],
+                    "externalEndpoint": link["externalEndpoint"],
+                    "registeredAt": link["createdAt"].isoformat(),
+                    "updatedAt": link["updatedAt"].isoformat()
+                }
+                for link in links
+            ]
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error registering external reference: {str(e)}")
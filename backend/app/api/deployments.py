@@ -1,20 +1,77 @@
 from typing import Dict, List, Optional, Any
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, Depends, HTTPException, Query, Body, Path
 from datetime import datetime
 import uuid
 
-from app.database import get_db, Agent, Deployment, DeploymentStatus
-from app.models.agent import DeploymentResponse
-from app.services.vertex_ai import VertexAIService
+from app.database import get_db, Agent, Deployment, DeploymentStatus, Job, JobType
+from app.models.agent import DeploymentResponse, DeploymentPageResponse
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, build_page
+from app.api.responses import FastJSONResponse, StreamFormat, streaming_response
+from app.api.projection import DEPLOYMENT_MAPPER
+from app.services.agent_registry import AgentRegistryService
+from app.services.container import get_registry_service, get_vertex_service
+from app.services.job_queue import JobHandler, JobProgress, enqueue, job_workers, register_handler
+from app.services.operation_poller import operation_poller, pending_operation_name
 
 router = APIRouter()
-vertex_service = VertexAIService()
+
+# Upper bound on items per batch request (keeps multi-row statements under the bind parameter limit)
+MAX_DEPLOYMENT_BATCH_SIZE = 500
+
+def _deployment_values(deployment_data: Dict[str, Any], environment: str) -> Dict:
+    """Builds a deployment row from a deployment payload; the environment comes from the agent."""
+    now = datetime.utcnow()
+    return {
+        "id": str(uuid.uuid4()),
+        "agent_id": deployment_data.get("agentId"),
+        "deployment_type": deployment_data.get("deploymentType", "AGENT_ENGINE"),
+        "version": deployment_data.get("version", "1.0.0"),
+        "environment": environment,  # Use agent's environment
+        "project_id": deployment_data.get("projectId"),
+        "region": deployment_data.get("region", "us-central1"),
+        "resource_name": deployment_data.get("resourceName"),
+        "status": deployment_data.get("status", DeploymentStatus.SUCCESSFUL.value),
+        "endpoint_url": deployment_data.get("endpointUrl"),
+        "deployed_at": now,
+        "updated_at": now,
+        "deployed_by": deployment_data.get("deployedBy"),
+        "configuration": deployment_data.get("configuration"),
+    }
+
+# NOT NULL deployment columns and the payload keys they come from
+REQUIRED_DEPLOYMENT_FIELDS = {
+    "deployment_type": "deploymentType",
+    "version": "version",
+    "project_id": "projectId",
+    "region": "region",
+    "status": "status",
+}
+DEPLOYMENT_STATUSES = {status.value for status in DeploymentStatus}
+
+def _deployment_error(values: Dict) -> Optional[str]:
+    """Reports why a deployment row would be rejected by the table, if it would."""
+    missing = [field for column, field in REQUIRED_DEPLOYMENT_FIELDS.items() if values[column] is None]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}"
+    if values["status"] not in DEPLOYMENT_STATUSES:
+        return f"Invalid status: {values['status']}"
+    return None
+
+def _check_batch_size(items: List) -> None:
+    if len(items) > MAX_DEPLOYMENT_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch size exceeds the maximum of {MAX_DEPLOYMENT_BATCH_SIZE}"
+        )
 
 @router.post("/deployments", response_model=DeploymentResponse)
 async def create_deployment(
     deployment_data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db)
+    registry_service: AgentRegistryService = Depends(get_registry_service),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Records a new deployment for an agent.
@@ -26,26 +83,12 @@ async def create_deployment(
             raise HTTPException(status_code=400, detail="Agent ID is required")
             
         # Check if agent exists
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        agent = await db.get(Agent, agent_id)
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
             
         # Create new deployment record
-        deployment = Deployment(
-            id=str(uuid.uuid4()),
-            agent_id=agent_id,
-            deployment_type=deployment_data.get("deploymentType", "AGENT_ENGINE"),
-            version=deployment_data.get("version", "1.0.0"),
-            environment=agent.environment,  # Use agent's environment
-            project_id=deployment_data.get("projectId"),
-            region=deployment_data.get("region", "us-central1"),
-            resource_name=deployment_data.get("resourceName"),
-            status=deployment_data.get("status", DeploymentStatus.SUCCESSFUL.value),
-            endpoint_url=deployment_data.get("endpointUrl"),
-            deployed_at=datetime.utcnow(),
-            deployed_by=deployment_data.get("deployedBy"),
-            configuration=deployment_data.get("configuration")
-        )
+        deployment = Deployment(**_deployment_values(deployment_data, agent.environment))
         
         db.add(deployment)
         
@@ -53,106 +96,91 @@ async def create_deployment(
         if deployment.status == DeploymentStatus.SUCCESSFUL.value:
             agent.status = "DEPLOYED"
             agent.updated_at = datetime.utcnow()
+            await registry_service.refresh_current_deployments(db, [agent_id])
             
-        db.commit()
-        db.refresh(deployment)
+        await db.commit()
+        await db.refresh(deployment)
         
-        return {
-            "id": deployment.id,
-            "agentId": deployment.agent_id,
-            "deploymentType": deployment.deployment_type,
-            "version": deployment.version,
-            "environment": deployment.environment,
-            "projectId": deployment.project_id,
-            "region": deployment.region,
-            "resourceName": deployment.resource_name,
-            "status": deployment.status,
-            "endpointUrl": deployment.endpoint_url,
-            "deployedAt": deployment.deployed_at,
-            "deployedBy": deployment.deployed_by,
-            "configuration": deployment.configuration
-        }
+        return DEPLOYMENT_MAPPER.from_instance(deployment)
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating deployment: {str(e)}")
 
-@router.get("/deployments", response_model=List[DeploymentResponse])
+@router.get("/deployments", response_model=None, responses={200: {"model": DeploymentPageResponse}})
 async def list_deployments(
     agent_id: Optional[str] = None,
     status: Optional[str] = None,
     environment: Optional[str] = None,
-    db: Session = Depends(get_db)
-) -> List[Dict]:
-    """Lists deployments with optional filtering."""
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return, 'summary' (default) or 'all'"
+    ),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's nextCursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: Optional[StreamFormat] = Query(
+        None,
+        description="Stream every matching row as 'ndjson' or a 'json' array instead of paging"
+    ),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """Lists deployments newest first with optional filtering, one page at a time."""
     try:
-        # Base query
-        query = db.query(Deployment)
+        field_names = DEPLOYMENT_MAPPER.parse_fields(fields)
+        
+        # Base query over plain columns: the requested fields plus the sort key
+        query = DEPLOYMENT_MAPPER.select(field_names, Deployment.deployed_at, Deployment.id)
         
         # Apply filters
         if agent_id:
-            query = query.filter(Deployment.agent_id == agent_id)
+            query = query.where(Deployment.agent_id == agent_id)
             
         if status:
-            query = query.filter(Deployment.status == status)
+            query = query.where(Deployment.status == status)
             
         if environment:
-            query = query.filter(Deployment.environment == environment)
+            query = query.where(Deployment.environment == environment)
             
-        # Get deployments
-        deployments = query.order_by(Deployment.deployed_at.desc()).all()
-        
-        return [
-            {
-                "id": deployment.id,
-                "agentId": deployment.agent_id,
-                "deploymentType": deployment.deployment_type,
-                "version": deployment.version,
-                "environment": deployment.environment,
-                "projectId": deployment.project_id,
-                "region": deployment.region,
-                "resourceName": deployment.resource_name,
-                "status": deployment.status,
-                "endpointUrl": deployment.endpoint_url,
-                "deployedAt": deployment.deployed_at,
-                "deployedBy": deployment.deployed_by,
-                "configuration": deployment.configuration
-            }
-            for deployment in deployments
-        ]
+        # Get one page of deployments
+        if stream:
+            # Encode rows as they come off a server-side cursor
+            query = query.order_by(Deployment.deployed_at.desc(), Deployment.id.desc())
+            # The stream reads through its own session; give this one's connection back now
+            await db.close()
+            return await streaming_response(query, DEPLOYMENT_MAPPER.row_mapper(field_names), stream)
         
+        query = paginate(query, Deployment.deployed_at, Deployment.id, cursor, limit)
+        rows = (await db.execute(query)).all()
+        
+        return FastJSONResponse(build_page(
+            rows,
+            limit,
+            sort_key=lambda row: (row.deployed_at, row.id),
+            serialize=DEPLOYMENT_MAPPER.row_mapper(field_names)
+        ))
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing deployments: {str(e)}")
 
-@router.get("/deployments/{deployment_id}", response_model=DeploymentResponse)
+@router.get("/deployments/{deployment_id}", response_model=None, responses={200: {"model": DeploymentResponse}})
 async def get_deployment(
     deployment_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """Gets a specific deployment by ID."""
     try:
-        deployment = db.query(Deployment).filter(Deployment.id == deployment_id).first()
+        row = (await db.execute(
+            DEPLOYMENT_MAPPER.select(DEPLOYMENT_MAPPER.all_fields).where(Deployment.id == deployment_id)
+        )).first()
         
-        if not deployment:
+        if not row:
             raise HTTPException(status_code=404, detail="Deployment not found")
             
-        return {
-            "id": deployment.id,
-            "agentId": deployment.agent_id,
-            "deploymentType": deployment.deployment_type,
-            "version": deployment.version,
-            "environment": deployment.environment,
-            "projectId": deployment.project_id,
-            "region": deployment.region,
-            "resourceName": deployment.resource_name,
-            "status": deployment.status,
-            "endpointUrl": deployment.endpoint_url,
-            "deployedAt": deployment.deployed_at,
-            "deployedBy": deployment.deployed_by,
-            "configuration": deployment.configuration
-        }
+        return FastJSONResponse(DEPLOYMENT_MAPPER.row_mapper(DEPLOYMENT_MAPPER.all_fields)(row))
         
     except HTTPException:
         raise
@@ -163,11 +191,12 @@ async def get_deployment(
 async def update_deployment_status(
     deployment_id: str,
     status_data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db)
+    registry_service: AgentRegistryService = Depends(get_registry_service),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """Updates the status of a deployment."""
     try:
-        deployment = db.query(Deployment).filter(Deployment.id == deployment_id).first()
+        deployment = await db.get(Deployment, deployment_id)
         
         if not deployment:
             raise HTTPException(status_code=404, detail="Deployment not found")
@@ -181,14 +210,17 @@ async def update_deployment_status(
         
         # If the deployment failed, update the agent status accordingly
         if new_status == DeploymentStatus.FAILED.value:
-            agent = db.query(Agent).filter(Agent.id == deployment.agent_id).first()
+            agent = await db.get(Agent, deployment.agent_id)
             if agent:
                 # Only revert to TESTED if it was previously set to DEPLOYED
                 if agent.status == "DEPLOYED":
                     agent.status = "TESTED"
                     agent.updated_at = datetime.utcnow()
                     
-        db.commit()
+        # The deployment may have become, or stopped being, the agent's current one
+        await registry_service.refresh_current_deployments(db, [deployment.agent_id])
+        
+        await db.commit()
         
         return {
             "id": deployment.id,
@@ -199,21 +231,250 @@ async def update_deployment_status(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating deployment status: {str(e)}")
 
-@router.post("/agents/{agent_id}/deploy")
+@router.post("/deployments:batch")
+async def create_deployments_batch(
+    items: List[Dict[str, Any]] = Body(...),
+    registry_service: AgentRegistryService = Depends(get_registry_service),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """
+    Records many deployments in one request, e.g. for multi-region rollouts.
+    Agent IDs are validated with one query, deployments are written with a multi-row
+    insert and agents with a successful deployment are marked DEPLOYED in one update.
+    Items that fail validation are reported individually. Should the insert still be
+    rejected, each row is retried in its own savepoint so only the offending items fail.
+    """
+    try:
+        _check_batch_size(items)
+        
+        agent_ids = {item.get("agentId") for item in items if item.get("agentId")}
+        environments = {}
+        if agent_ids:
+            rows = (await db.execute(
+                select(Agent.id, Agent.environment).where(Agent.id.in_(agent_ids))
+            )).all()
+            environments = {row.id: row.environment for row in rows}
+        
+        results = []
+        pending = []
+        for index, item in enumerate(items):
+            agent_id = item.get("agentId")
+            if not agent_id:
+                results.append({"index": index, "status": "error", "error": "Agent ID is required"})
+                continue
+            if agent_id not in environments:
+                results.append({"index": index, "status": "error", "error": "Agent not found"})
+                continue
+            
+            values = _deployment_values(item, environments[agent_id])
+            error = _deployment_error(values)
+            if error:
+                results.append({"index": index, "status": "error", "error": error})
+                continue
+            
+            result = {
+                "index": index,
+                "status": "created",
+                "deployment": DEPLOYMENT_MAPPER.from_values(values)
+            }
+            results.append(result)
+            pending.append((values, result))
+        
+        if pending:
+            try:
+                async with db.begin_nested():
+                    await db.execute(insert(Deployment.__table__).values([values for values, _ in pending]))
+            except DBAPIError:
+                for values, result in pending:
+                    try:
+                        async with db.begin_nested():
+                            await db.execute(insert(Deployment.__table__).values(values))
+                    except DBAPIError as e:
+                        result.update({"status": "error", "error": str(e.orig)})
+                        del result["deployment"]
+        
+        deployment_rows = [values for values, result in pending if result["status"] == "created"]
+        deployed_agent_ids = {
+            values["agent_id"] for values in deployment_rows
+            if values["status"] == DeploymentStatus.SUCCESSFUL.value
+        }
+        
+        # Update agent status for every agent with a successful deployment
+        if deployed_agent_ids:
+            await db.execute(
+                update(Agent)
+                .where(Agent.id.in_(deployed_agent_ids))
+                .values(status="DEPLOYED", updated_at=datetime.utcnow())
+            )
+            await registry_service.refresh_current_deployments(db, deployed_agent_ids)
+        
+        await db.commit()
+        
+        return {
+            "created": len(deployment_rows),
+            "failed": len(items) - len(deployment_rows),
+            "results": results
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error creating deployments: {str(e)}")
+
+@router.put("/deployments/status:batch")
+async def update_deployment_status_batch(
+    items: List[Dict[str, Any]] = Body(...),
+    registry_service: AgentRegistryService = Depends(get_registry_service),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """
+    Applies many deployment status transitions in one request.
+    Each item is {"id": ..., "status": ...}; when a deployment ID appears more than once
+    the last status wins. Deployments are updated with one statement per target status,
+    and agents of FAILED deployments revert from DEPLOYED to TESTED in one update.
+    """
+    try:
+        _check_batch_size(items)
+        
+        deployment_ids = {item.get("id") for item in items if item.get("id")}
+        agent_ids = {}
+        if deployment_ids:
+            rows = (await db.execute(
+                select(Deployment.id, Deployment.agent_id).where(Deployment.id.in_(deployment_ids))
+            )).all()
+            agent_ids = {row.id: row.agent_id for row in rows}
+        
+        results = []
+        new_statuses: Dict[str, str] = {}
+        for index, item in enumerate(items):
+            deployment_id = item.get("id")
+            new_status = item.get("status")
+            if not deployment_id:
+                results.append({"index": index, "status": "error", "error": "Deployment ID is required"})
+            elif not new_status:
+                results.append({"index": index, "id": deployment_id, "status": "error", "error": "Status is required"})
+            elif deployment_id not in agent_ids:
+                results.append({"index": index, "id": deployment_id, "status": "error", "error": "Deployment not found"})
+            else:
+                new_statuses[deployment_id] = new_status
+                results.append({"index": index, "id": deployment_id, "status": "updated", "deploymentStatus": new_status})
+        
+        # One UPDATE per distinct target status
+        by_status: Dict[str, List[str]] = {}
+        for deployment_id, new_status in new_statuses.items():
+            by_status.setdefault(new_status, []).append(deployment_id)
+        
+        now = datetime.utcnow()
+        for new_status, ids in by_status.items():
+            await db.execute(
+                update(Deployment)
+                .where(Deployment.id.in_(ids))
+                .values(status=new_status, updated_at=now)
+            )
+        
+        # If deployments failed, only revert their agents to TESTED if they were DEPLOYED
+        failed_agent_ids = {
+            agent_ids[deployment_id]
+            for deployment_id in by_status.get(DeploymentStatus.FAILED.value, [])
+        }
+        if failed_agent_ids:
+            await db.execute(
+                update(Agent)
+                .where(Agent.id.in_(failed_agent_ids), Agent.status == "DEPLOYED")
+                .values(status="TESTED", updated_at=now)
+            )
+        
+        await registry_service.refresh_current_deployments(
+            db, [agent_ids[deployment_id] for deployment_id in new_statuses]
+        )
+        await db.commit()
+        
+        updated = sum(1 for result in results if result["status"] == "updated")
+        return {
+            "updated": updated,
+            "failed": len(items) - updated,
+            "results": results
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error updating deployment statuses: {str(e)}")
+
+async def _run_deploy_job(db: AsyncSession, job: Job, progress: JobProgress) -> Dict:
+    """Deploys an agent to Vertex AI Agent Engine for a DEPLOY_AGENT job."""
+    deployment = await db.get(Deployment, job.deployment_id)
+    agent = await db.get(Agent, job.agent_id)
+    if not deployment or not agent:
+        raise ValueError("Deployment or agent no longer exists")
+    
+    deployment.status = DeploymentStatus.IN_PROGRESS.value
+    await progress(10, "Deploying agent to Vertex AI Agent Engine")
+    
+    # Call Vertex AI service to deploy the agent
+    response = await get_vertex_service().deploy_agent(agent.id, deployment.project_id, deployment.region)
+    
+    # Long-running deployments are finished by the operation poller, which also completes
+    # the job; until then the job stays RUNNING
+    operation_name = pending_operation_name(response)
+    if operation_name:
+        deployment.operation_name = operation_name
+        result = {
+            "deploymentId": deployment.id,
+            "agentId": agent.id,
+            "operationName": operation_name
+        }
+        await progress.hand_off(result, 50, "Waiting for Vertex AI operation to complete")
+        operation_poller.notify()
+        return result
+    
+    # Update deployment with success status
+    deployment.status = DeploymentStatus.SUCCESSFUL.value
+    deployment.resource_name = response.get("resourceName")
+    deployment.endpoint_url = response.get("endpointUrl")
+    
+    # Update agent status
+    agent.status = "DEPLOYED"
+    agent.updated_at = datetime.utcnow()
+    await get_registry_service().refresh_current_deployments(db, [agent.id])
+    
+    return {
+        "deploymentId": deployment.id,
+        "agentId": agent.id,
+        "resourceName": deployment.resource_name,
+        "endpointUrl": deployment.endpoint_url
+    }
+
+async def _fail_deploy_job(db: AsyncSession, job: Job, error: Exception) -> None:
+    """Marks the deployment failed once its job has used up its attempts."""
+    deployment = await db.get(Deployment, job.deployment_id)
+    if deployment:
+        deployment.status = DeploymentStatus.FAILED.value
+        deployment.configuration = {
+            **(deployment.configuration or {}),
+            "error": str(error)
+        }
+
+register_handler(JobType.DEPLOY_AGENT.value, JobHandler(_run_deploy_job, on_failure=_fail_deploy_job))
+
+@router.post("/agents/{agent_id}/deploy", status_code=202)
 async def deploy_agent(
     agent_id: str,
     deploy_data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Triggers deployment of an agent using the Vertex AI Agent Engine.
-    Note: In a real implementation, this would likely queue a deployment task.
+    Records a PENDING deployment and queues a job that performs the deployment in the
+    background; poll the returned job for status and progress.
     """
     try:
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        agent = await db.get(Agent, agent_id)
         
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
@@ -242,49 +503,29 @@ async def deploy_agent(
         )
         
         db.add(deployment)
-        db.commit()
         
-        # Note: In a real implementation, this would trigger an async deployment process
-        # For now, we'll simulate the deployment process
+        # Queue the deployment in the same transaction as its record
+        job = enqueue(
+            db,
+            JobType.DEPLOY_AGENT.value,
+            payload={"projectId": project_id, "region": region},
+            agent_id=agent_id,
+            deployment_id=deployment_id
+        )
+        await db.commit()
+        job_workers.notify()
         
-        try:
-            # Call Vertex AI service to deploy the agent
-            # This is a placeholder - would need to be implemented with actual Vertex AI API
-            response = await vertex_service.deploy_agent(agent_id, project_id, region)
-            
-            # Update deployment with success status
-            deployment.status = DeploymentStatus.SUCCESSFUL.value
-            deployment.resource_name = response.get("resourceName")
-            deployment.endpoint_url = response.get("endpointUrl")
-            
-            # Update agent status
-            agent.status = "DEPLOYED"
-            agent.updated_at = datetime.utcnow()
-            
-            db.commit()
-            
-            return {
-                "deploymentId": deployment.id,
-                "agentId": agent.id,
-                "status": deployment.status,
-                "resourceName": deployment.resource_name,
-                "endpointUrl": deployment.endpoint_url,
-                "message": "Agent deployed successfully"
-            }
-            
-        except Exception as deploy_error:
-            # Update deployment with failed status
-            deployment.status = DeploymentStatus.FAILED.value
-            deployment.configuration = {
-                **(deployment.configuration or {}),
-                "error": str(deploy_error)
-            }
-            db.commit()
-            
-            raise HTTPException(status_code=500, detail=f"Deployment failed: {str(deploy_error)}")
+        return {
+            "jobId": job.id,
+            "deploymentId": deployment_id,
+            "agentId": agent_id,
+            "status": job.status,
+            "statusUrl": f"/api/jobs/{job.id}",
+            "message": "Agent deployment queued"
+        }
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deploying agent: {str(e)}")
@@ -1,10 +1,11 @@
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
+import uuid
 from datetime import datetime
 
-from app.database import get_db
+from app.database import get_db, Agent
 from app.models.agent import EnvironmentType
 
 router = APIRouter()
@@ -121,7 +122,8 @@ async def delete_environment_connection(
 
 @router.post("/environment/promote-agent")
 async def promote_agent(
-    promotion_data: Dict[str, Any] = Body(...)
+    promotion_data: Dict[str, Any] = Body(...),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Initiates the promotion of an agent from this environment to another environment.
@@ -147,8 +149,7 @@ async def promote_agent(
             )
         
         # Get agent from database
-        db = next(get_db())
-        agent = db.query(db.Agent).filter(db.Agent.id == agent_id).first()
+        agent = await db.get(Agent, agent_id)
         
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
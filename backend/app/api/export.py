@@ -0,0 +1,63 @@
+from typing import Optional
+from enum import Enum
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timezone
+
+from app.database import Agent, Deployment, AgentTest, AgentMetrics
+from app.api.projection import AGENT_MAPPER, DEPLOYMENT_MAPPER, AGENT_TEST_MAPPER, AGENT_METRICS_MAPPER
+from app.api.responses import StreamFormat, streaming_response
+
+router = APIRouter()
+
+class ExportEntity(str, Enum):
+    AGENTS = "agents"
+    DEPLOYMENTS = "deployments"
+    AGENT_TESTS = "agent_tests"
+    AGENT_METRICS = "agent_metrics"
+
+# Entity -> (mapper, watermark column used by updated_since)
+EXPORTS = {
+    ExportEntity.AGENTS: (AGENT_MAPPER, Agent.updated_at),
+    ExportEntity.DEPLOYMENTS: (DEPLOYMENT_MAPPER, Deployment.updated_at),
+    ExportEntity.AGENT_TESTS: (AGENT_TEST_MAPPER, AgentTest.created_at),
+    ExportEntity.AGENT_METRICS: (AGENT_METRICS_MAPPER, AgentMetrics.date),
+}
+
+@router.get("/export/{entity}")
+async def export_entity(
+    entity: ExportEntity,
+    updated_since: Optional[datetime] = Query(
+        None,
+        description="Only export rows created or changed at or after this timestamp"
+    ),
+    gzip: bool = Query(False, description="Gzip-compress the stream on the fly"),
+) -> StreamingResponse:
+    """
+    Streams every row of a registry table as NDJSON for warehouse loads.
+    Rows are read from a server-side cursor in watermark order, so the export runs in
+    constant memory and the last row's timestamp can seed the next updated_since.
+    An export that fails part way ends with an {"error": ...} line instead of a row.
+    """
+    try:
+        mapper, watermark = EXPORTS[entity]
+        model = mapper.model
+
+        query = mapper.select(mapper.all_fields)
+        if updated_since:
+            # Timestamp columns hold naive UTC
+            if updated_since.tzinfo:
+                updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)
+            query = query.where(watermark >= updated_since)
+        query = query.order_by(watermark.asc(), model.id.asc())
+
+        return await streaming_response(
+            query,
+            mapper.row_mapper(mapper.all_fields),
+            StreamFormat.NDJSON,
+            headers={"Content-Disposition": f'attachment; filename="{entity.value}.ndjson"'},
+            gzip=gzip
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting {entity.value}: {str(e)}")
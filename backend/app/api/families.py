@@ -0,0 +1,141 @@
+from typing import Dict, Optional
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.database import get_db, Agent, Deployment, AgentStatus, DeploymentStatus, EnvironmentType
+from app.models.agent import AgentFamilyPageResponse
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, build_page
+from app.api.responses import FastJSONResponse
+
+router = APIRouter()
+
+# Member counts are computed per known environment and status value
+ENVIRONMENTS = [environment.value for environment in EnvironmentType]
+STATUSES = [status.value for status in AgentStatus]
+
+def _count_where(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+def _family_page_query(environment: Optional[str], cursor: Optional[str], limit: int):
+    """
+    Builds the single statement behind the family list: one page of per-family counts,
+    joined to each family's newest agent and newest successful deployment. The window
+    functions only rank rows of the families on the page.
+    """
+    counts = select(
+        Agent.agent_family_id,
+        func.count().label("agent_count"),
+        func.max(Agent.created_at).label("last_created_at"),
+        *[_count_where(Agent.environment == value).label(f"env_{value}") for value in ENVIRONMENTS],
+        *[_count_where(Agent.status == value).label(f"status_{value}") for value in STATUSES],
+    ).group_by(Agent.agent_family_id)
+
+    if environment:
+        counts = counts.having(_count_where(Agent.environment == environment) > 0)
+
+    counts = counts.subquery("family_counts")
+    page = paginate(
+        select(counts), counts.c.last_created_at, counts.c.agent_family_id, cursor, limit
+    ).cte("family_page")
+    page_families = select(page.c.agent_family_id)
+
+    ranked_agents = select(
+        Agent.agent_family_id,
+        Agent.id.label("agent_id"),
+        Agent.name.label("agent_name"),
+        Agent.environment.label("agent_environment"),
+        Agent.status.label("agent_status"),
+        Agent.source_hash.label("agent_source_hash"),
+        Agent.created_at.label("agent_created_at"),
+        func.row_number().over(
+            partition_by=Agent.agent_family_id,
+            order_by=(Agent.created_at.desc(), Agent.id.desc())
+        ).label("position"),
+    ).where(Agent.agent_family_id.in_(page_families)).subquery("ranked_agents")
+
+    ranked_deployments = select(
+        Agent.agent_family_id,
+        Deployment.id.label("deployment_id"),
+        Deployment.agent_id.label("deployment_agent_id"),
+        Deployment.version.label("deployment_version"),
+        Deployment.environment.label("deployment_environment"),
+        Deployment.project_id.label("deployment_project_id"),
+        Deployment.region.label("deployment_region"),
+        Deployment.endpoint_url.label("deployment_endpoint_url"),
+        Deployment.deployed_at.label("deployment_deployed_at"),
+        func.row_number().over(
+            partition_by=Agent.agent_family_id,
+            order_by=(Deployment.deployed_at.desc(), Deployment.id.desc())
+        ).label("position"),
+    ).join(Agent, Deployment.agent_id == Agent.id).where(
+        Agent.agent_family_id.in_(page_families),
+        Deployment.status == DeploymentStatus.SUCCESSFUL.value
+    ).subquery("ranked_deployments")
+
+    return (
+        select(
+            page,
+            *[column for column in ranked_agents.c if column.key not in ("agent_family_id", "position")],
+            *[column for column in ranked_deployments.c if column.key not in ("agent_family_id", "position")],
+        )
+        .join(ranked_agents, (ranked_agents.c.agent_family_id == page.c.agent_family_id)
+              & (ranked_agents.c.position == 1))
+        .outerjoin(ranked_deployments, (ranked_deployments.c.agent_family_id == page.c.agent_family_id)
+                   & (ranked_deployments.c.position == 1))
+        .order_by(page.c.last_created_at.desc(), page.c.agent_family_id.desc())
+    )
+
+def _family_to_dict(row) -> Dict:
+    return {
+        "agentFamilyId": row.agent_family_id,
+        "agentCount": row.agent_count,
+        "countsByEnvironment": {value: row._mapping[f"env_{value}"] for value in ENVIRONMENTS},
+        "countsByStatus": {value: row._mapping[f"status_{value}"] for value in STATUSES},
+        "latestAgent": {
+            "id": row.agent_id,
+            "name": row.agent_name,
+            "environment": row.agent_environment,
+            "status": row.agent_status,
+            "sourceHash": row.agent_source_hash,
+            "createdAt": row.agent_created_at
+        },
+        "latestSuccessfulDeployment": {
+            "id": row.deployment_id,
+            "agentId": row.deployment_agent_id,
+            "version": row.deployment_version,
+            "environment": row.deployment_environment,
+            "projectId": row.deployment_project_id,
+            "region": row.deployment_region,
+            "endpointUrl": row.deployment_endpoint_url,
+            "deployedAt": row.deployment_deployed_at
+        } if row.deployment_id else None
+    }
+
+@router.get("/agent-families", response_model=None, responses={200: {"model": AgentFamilyPageResponse}})
+async def list_agent_families(
+    environment: Optional[EnvironmentType] = Query(None, description="Only families with members in this environment"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's nextCursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """
+    Lists agent families, most recently extended first, one page at a time.
+    Each family carries member counts per environment and status, its newest agent
+    and its newest successful deployment, all computed in the database.
+    """
+    try:
+        query = _family_page_query(environment.value if environment else None, cursor, limit)
+        rows = (await db.execute(query)).all()
+
+        return FastJSONResponse(build_page(
+            rows,
+            limit,
+            sort_key=lambda row: (row.last_created_at, row.agent_family_id),
+            serialize=_family_to_dict
+        ))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing agent families: {str(e)}")
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.api.responses import dumps
+from app.database import AsyncSessionLocal, IdempotencyKey
+
+# How long a completed response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a request may hold its key before a duplicate may assume it died and run again
+IDEMPOTENCY_IN_FLIGHT_SECONDS = float(os.getenv("IDEMPOTENCY_IN_FLIGHT_SECONDS", "300"))
+
+# How often a duplicate checks on the request it is waiting for
+IDEMPOTENCY_POLL_SECONDS = 0.2
+# How often each process deletes expired keys
+IDEMPOTENCY_PURGE_SECONDS = 300
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+def _is_replayable(status: int) -> bool:
+    """Successes and conflicts are final; other errors may succeed once the client fixes the request."""
+    return 200 <= status < 300 or status == 409
+
+class IdempotencyStore:
+    """
+    Responses keyed by (Idempotency-Key, method, path) in the idempotency_keys table, so
+    every replica sees the same keys. A request claims its key with an insert that does
+    nothing on conflict; the claim is a lease of IDEMPOTENCY_IN_FLIGHT_SECONDS until the
+    response is stored for IDEMPOTENCY_TTL_SECONDS.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+        in_flight_seconds: float = IDEMPOTENCY_IN_FLIGHT_SECONDS
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.in_flight_seconds = in_flight_seconds
+        self._next_purge = 0.0
+
+    @staticmethod
+    def _where(key: Tuple[str, str, str]):
+        method, path, idempotency_key = key
+        return (
+            IdempotencyKey.idempotency_key == idempotency_key,
+            IdempotencyKey.method == method,
+            IdempotencyKey.path == path
+        )
+
+    async def claim(self, key: Tuple[str, str, str], fingerprint: str) -> Optional[str]:
+        """Claims the key for a new request and returns its owner token, or None if the key is taken."""
+        method, path, idempotency_key = key
+        owner = str(uuid.uuid4())
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            # ON CONFLICT is dialect-specific; SQLite is supported for local development
+            dialect_insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+            claimed = await db.execute(dialect_insert(IdempotencyKey.__table__).values(
+                idempotency_key=idempotency_key,
+                method=method,
+                path=path,
+                fingerprint=fingerprint,
+                owner=owner,
+                created_at=now,
+                expires_at=now + timedelta(seconds=self.in_flight_seconds)
+            ).on_conflict_do_nothing())
+
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + IDEMPOTENCY_PURGE_SECONDS
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+
+            await db.commit()
+        return owner if claimed.rowcount == 1 else None
+
+    async def get(self, key: Tuple[str, str, str]) -> Optional[IdempotencyKey]:
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(IdempotencyKey).where(*self._where(key)))).scalar()
+
+    async def expire(self, key: Tuple[str, str, str]) -> None:
+        """Deletes the key if its replay window or in-flight lease has run out."""
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(IdempotencyKey).where(*self._where(key), IdempotencyKey.expires_at <= datetime.utcnow())
+            )
+            await db.commit()
+
+    async def complete(
+        self,
+        key: Tuple[str, str, str],
+        owner: str,
+        status: int,
+        headers: List[Tuple[bytes, bytes]],
+        body: bytes
+    ) -> None:
+        """Stores the response for replay, unless the claim was lost to a duplicate meanwhile."""
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(IdempotencyKey)
+                .where(*self._where(key), IdempotencyKey.owner == owner)
+                .values(
+                    status=status,
+                    headers=[[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers],
+                    body=body,
+                    expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+                )
+            )
+            await db.commit()
+
+    async def abandon(self, key: Tuple[str, str, str], owner: str) -> None:
+        """Forgets a request that should run again on retry."""
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(IdempotencyKey).where(*self._where(key), IdempotencyKey.owner == owner))
+            await db.commit()
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response for mutating requests that repeat an Idempotency-Key.
+    A duplicate that arrives while the first request is still running, on any replica,
+    waits for it instead of redoing the work. Only successes and 409 conflicts are
+    stored; other responses are forgotten so a retry, possibly with a fixed request,
+    runs again. Reusing a key with a different request body is rejected with 422.
+    """
+
+    def __init__(self, app, store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.store = store or IdempotencyStore()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+
+        # Read the whole body up front to fingerprint it, then hand it back to the app
+        messages = []
+        body_hash = hashlib.sha256()
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body_hash.update(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        fingerprint = body_hash.hexdigest()
+
+        async def replay_receive():
+            return messages.pop(0) if messages else await receive()
+
+        key = (scope["method"], scope["path"], idempotency_key.decode("latin-1"))
+        while True:
+            owner = await self.store.claim(key, fingerprint)
+            if owner:
+                break
+
+            record = await self.store.get(key)
+            if record is None:
+                # Abandoned since the claim was attempted; try again
+                continue
+            if record.expires_at <= datetime.utcnow():
+                await self.store.expire(key)
+                continue
+            if record.fingerprint != fingerprint:
+                await self._send_json(send, 422, {
+                    "detail": "Idempotency-Key has already been used with a different request"
+                })
+                return
+            if record.status is not None:
+                await self._replay(send, record)
+                return
+            await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+        response = {"status": None, "headers": [], "body": b""}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await asyncio.shield(self.store.abandon(key, owner))
+            raise
+
+        if response["status"] is not None and _is_replayable(response["status"]):
+            await self.store.complete(key, owner, response["status"], response["headers"], response["body"])
+        else:
+            await self.store.abandon(key, owner)
+
+    async def _replay(self, send, record: IdempotencyKey) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": record.status,
+            "headers": [
+                (name.encode("latin-1"), value.encode("latin-1")) for name, value in record.headers or []
+            ] + [(REPLAYED_HEADER, b"true")],
+        })
+        await send({"type": "http.response.body", "body": record.body or b""})
+
+    async def _send_json(self, send, status: int, content: Dict) -> None:
+        body = dumps(content)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,58 @@
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.responses import StreamFormat, stream_batches
+from app.services.container import get_vertex_service
+from app.services.inventory import FLEET_PROJECTS, FLEET_REGIONS, inventory_targets, stream_inventory
+from app.services.vertex_ai import VertexAIService
+
+router = APIRouter()
+
+# Upper bound on project/region pairs scanned by one request
+MAX_INVENTORY_TARGETS = 500
+
+@router.get("/inventory/targets")
+async def get_inventory_targets() -> Dict:
+    """Gets the projects and regions the fleet inventory scans by default."""
+    try:
+        return {
+            "projects": FLEET_PROJECTS,
+            "regions": FLEET_REGIONS
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting inventory targets: {str(e)}")
+
+@router.get("/inventory/agents")
+async def stream_agent_inventory(
+    projects: Optional[List[str]] = Query(None, description="Projects to scan; defaults to FLEET_PROJECTS"),
+    regions: Optional[List[str]] = Query(None, description="Regions to scan; defaults to FLEET_REGIONS"),
+    stream: StreamFormat = Query(StreamFormat.NDJSON, description="Stream as 'ndjson' or a 'json' array"),
+    gzip: bool = Query(False, description="Gzip-compress the stream on the fly"),
+    vertex_service: VertexAIService = Depends(get_vertex_service)
+) -> StreamingResponse:
+    """
+    Streams the reasoning engines of every project and region in the fleet.
+    Targets are listed concurrently with pagination followed, and items are streamed
+    as pages arrive, each tagged with projectId and region. A target that cannot be
+    listed contributes one item with an error instead of failing the stream.
+    """
+    try:
+        targets = inventory_targets(projects or FLEET_PROJECTS, regions or FLEET_REGIONS)
+
+        if not targets:
+            raise HTTPException(status_code=400, detail="No projects to scan; pass projects or set FLEET_PROJECTS")
+
+        if len(targets) > MAX_INVENTORY_TARGETS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Inventory is limited to {MAX_INVENTORY_TARGETS} project/region pairs"
+            )
+
+        return stream_batches(stream_inventory(vertex_service, targets), stream, gzip=gzip)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error streaming agent inventory: {str(e)}")
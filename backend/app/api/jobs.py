@@ -0,0 +1,71 @@
+from typing import Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.database import get_db, Job, JobStatus
+from app.models.deployment import JobResponse, JobPageResponse
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, build_page
+from app.api.responses import FastJSONResponse
+from app.api.projection import JOB_MAPPER
+
+router = APIRouter()
+
+@router.get("/jobs", response_model=None, responses={200: {"model": JobPageResponse}})
+async def list_jobs(
+    status: Optional[JobStatus] = None,
+    job_type: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's nextCursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """Lists background jobs newest first with optional filtering, one page at a time."""
+    try:
+        field_names = JOB_MAPPER.summary_fields
+        query = JOB_MAPPER.select(field_names, Job.created_at, Job.id)
+
+        # Apply filters
+        if status:
+            query = query.where(Job.status == status.value)
+
+        if job_type:
+            query = query.where(Job.job_type == job_type)
+
+        if agent_id:
+            query = query.where(Job.agent_id == agent_id)
+
+        query = paginate(query, Job.created_at, Job.id, cursor, limit)
+        rows = (await db.execute(query)).all()
+
+        return FastJSONResponse(build_page(
+            rows,
+            limit,
+            sort_key=lambda row: (row.created_at, row.id),
+            serialize=JOB_MAPPER.row_mapper(field_names)
+        ))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing jobs: {str(e)}")
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """Gets the status, progress and result of a background job."""
+    try:
+        row = (await db.execute(
+            JOB_MAPPER.select(JOB_MAPPER.all_fields).where(Job.id == job_id)
+        )).first()
+
+        if not row:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        return JOB_MAPPER.row_mapper(JOB_MAPPER.all_fields)(row)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting job: {str(e)}")
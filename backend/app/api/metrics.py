@@ -0,0 +1,31 @@
+from typing import Dict
+from fastapi import APIRouter, HTTPException
+
+from app.database import get_pool_status
+from app.services.vertex_ai import vertex_cache
+
+router = APIRouter()
+
+@router.get("/metrics/db-pool")
+async def get_db_pool_metrics() -> Dict:
+    """
+    Reports database connection pool saturation.
+    Includes checked-out connections, acquire wait times, overflow events and timeouts.
+    """
+    try:
+        return get_pool_status()
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting pool metrics: {str(e)}")
+
+@router.get("/metrics/vertex-cache")
+async def get_vertex_cache_metrics() -> Dict:
+    """
+    Reports the Vertex AI read cache.
+    Includes size, hits, misses, coalesced loads, evictions, expirations and invalidations.
+    """
+    try:
+        return vertex_cache.stats()
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting cache metrics: {str(e)}")
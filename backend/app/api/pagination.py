@@ -0,0 +1,55 @@
+import base64
+import json
+from typing import Any, Callable, Dict, Optional, Sequence
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+
+# Page size limits shared by all list endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(sort_value: datetime, row_id: str) -> str:
+    """Encodes a (timestamp, id) sort key into an opaque cursor token."""
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decodes a cursor token back into its (timestamp, id) sort key."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), str(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def paginate(query: Select, sort_column, id_column, cursor: Optional[str], limit: int) -> Select:
+    """
+    Applies keyset pagination ordered newest first on (sort_column, id_column).
+    Fetches one extra row so the caller can tell whether another page exists.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+
+    return query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+
+def build_page(
+    rows: Sequence[Any],
+    limit: int,
+    sort_key: Callable[[Any], tuple],
+    serialize: Callable[[Any], Dict]
+) -> Dict:
+    """Builds the page envelope returned by list endpoints."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(*sort_key(rows[-1]))
+
+    return {
+        "items": [serialize(row) for row in rows],
+        "nextCursor": next_cursor,
+        "limit": limit
+    }
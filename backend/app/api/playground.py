@@ -1,21 +1,25 @@
 from typing import Dict, List, Optional, Any
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, Depends, HTTPException, Query, Body, Path, File, UploadFile, Form
 from datetime import datetime
 import uuid
 
-from app.database import get_db, Agent, AgentTest
+from app.database import get_db, Agent, AgentCurrentDeployment, AgentTest, Deployment
 from app.services.vertex_ai import VertexAIService
 from app.services.agent_tester import AgentTesterService
+from app.services.container import get_agent_tester, get_vertex_service
+from app.api.pagination import paginate, build_page
+from app.api.responses import FastJSONResponse
+from app.api.projection import AGENT_TEST_MAPPER
 
 router = APIRouter()
-vertex_service = VertexAIService()
-agent_tester = AgentTesterService()
 
 @router.post("/playground/test")
 async def test_agent(
     test_data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db)
+    agent_tester: AgentTesterService = Depends(get_agent_tester),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Tests an agent in the local playground.
@@ -39,7 +43,7 @@ async def test_agent(
         success = True
         
         # Get agent
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        agent = await db.get(Agent, agent_id)
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
         
@@ -82,7 +86,7 @@ async def test_agent(
         )
         
         db.add(test_record)
-        db.commit()
+        await db.commit()
         
         # Return the response
         return {
@@ -106,34 +110,32 @@ async def test_agent(
 @router.get("/playground/tests")
 async def list_tests(
     agent_id: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's nextCursor"),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
-) -> List[Dict]:
-    """Lists test history for an agent or all tests."""
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """Lists test history for an agent or all tests, newest first, one page at a time."""
     try:
-        # Base query
-        query = db.query(AgentTest)
+        # Base query over plain columns
+        query = AGENT_TEST_MAPPER.select(AGENT_TEST_MAPPER.all_fields)
         
         # Filter by agent if provided
         if agent_id:
-            query = query.filter(AgentTest.agent_id == agent_id)
+            query = query.where(AgentTest.agent_id == agent_id)
             
-        # Get tests
-        tests = query.order_by(AgentTest.created_at.desc()).limit(limit).all()
+        # Get one page of tests
+        query = paginate(query, AgentTest.created_at, AgentTest.id, cursor, limit)
+        rows = (await db.execute(query)).all()
         
-        return [
-            {
-                "id": test.id,
-                "agentId": test.agent_id,
-                "query": test.query,
-                "response": test.response,
-                "metrics": test.metrics,
-                "success": test.success,
-                "createdAt": test.created_at
-            }
-            for test in tests
-        ]
+        return FastJSONResponse(build_page(
+            rows,
+            limit,
+            sort_key=lambda row: (row.created_at, row.id),
+            serialize=AGENT_TEST_MAPPER.row_mapper(AGENT_TEST_MAPPER.all_fields)
+        ))
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing tests: {str(e)}")
 
@@ -181,7 +183,8 @@ async def upload_test_files(
 @router.post("/playground/query")
 async def query_deployed_agent(
     query_data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db)
+    vertex_service: VertexAIService = Depends(get_vertex_service),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Queries an agent that has already been deployed to Vertex AI.
@@ -203,27 +206,20 @@ async def query_deployed_agent(
             raise HTTPException(status_code=400, detail="Project ID is required")
             
         # Get agent
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        agent = await db.get(Agent, agent_id)
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
         
-        # Find the latest successful deployment
-        from sqlalchemy import and_
-        from app.database import DeploymentStatus
-        
-        deployment = (
-            db.query(db.Deployment)
-            .filter(
-                and_(
-                    db.Deployment.agent_id == agent_id,
-                    db.Deployment.project_id == project_id,
-                    db.Deployment.region == region,
-                    db.Deployment.status == DeploymentStatus.SUCCESSFUL.value
-                )
+        # Find the latest successful deployment through the current deployment pointer
+        deployment = (await db.execute(
+            select(Deployment)
+            .join(AgentCurrentDeployment, AgentCurrentDeployment.deployment_id == Deployment.id)
+            .where(
+                AgentCurrentDeployment.agent_id == agent_id,
+                AgentCurrentDeployment.project_id == project_id,
+                AgentCurrentDeployment.region == region
             )
-            .order_by(db.Deployment.deployed_at.desc())
-            .first()
-        )
+        )).scalars().first()
         
         if not deployment:
             raise HTTPException(status_code=404, detail="No successful deployment found for this agent")
@@ -271,7 +267,7 @@ async def query_deployed_agent(
         )
         
         db.add(test_record)
-        db.commit()
+        await db.commit()
         
         # Return the response
         return {
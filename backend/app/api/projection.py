@@ -0,0 +1,188 @@
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import Select, select
+
+from app.database import Agent, Deployment, Template, AgentTest, AgentMetrics, Job
+
+class ResponseMapper:
+    """
+    Precompiled mapping between a model's columns and its camelCase response fields.
+    Reads select plain column tuples through SQLAlchemy Core, so rows never enter the
+    session identity map; the same mapper serializes ORM instances on write paths.
+    """
+
+    def __init__(self, model, fields: Dict[str, str], summary_exclude: Sequence[str] = ()):
+        self.model = model
+        self.fields = fields
+        self.columns = {field: model.__table__.c[attr] for field, attr in fields.items()}
+        self.all_fields = tuple(fields)
+        self.summary_fields = tuple(field for field in fields if field not in summary_exclude)
+        self._instance_getter = attrgetter(*fields.values())
+        self._row_mappers: Dict[Tuple[str, ...], Callable] = {}
+
+    def parse_fields(self, fields: Optional[str]) -> Tuple[str, ...]:
+        """
+        Resolves a fields= query value into response field names.
+        Accepts "summary" (the default), "all", or a comma-separated list of field names.
+        """
+        if not fields or fields == "summary":
+            return self.summary_fields
+
+        if fields == "all":
+            return self.all_fields
+
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in self.fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+        # The id is always returned so items stay addressable
+        return ("id",) + tuple(dict.fromkeys(field for field in requested if field != "id"))
+
+    def select(self, field_names: Sequence[str], *extra_columns) -> Select:
+        """
+        Builds a Core select of the columns behind field_names.
+        Extra columns (e.g. pagination sort keys) are appended after them when not already selected.
+        """
+        columns = [self.columns[field] for field in field_names]
+        for column in extra_columns:
+            column = self.model.__table__.c[column.key]
+            if not any(column is selected for selected in columns):
+                columns.append(column)
+        return select(*columns)
+
+    def row_mapper(self, field_names: Sequence[str]) -> Callable[[Any], Dict]:
+        """Returns the cached row -> dict mapper for a field selection."""
+        keys = tuple(field_names)
+        mapper = self._row_mappers.get(keys)
+        if mapper is None:
+            # Rows carry the field columns first, so zip stops before any extra sort columns
+            mapper = self._row_mappers[keys] = lambda row: dict(zip(keys, row))
+        return mapper
+
+    def from_instance(self, obj: Any) -> Dict:
+        """Serializes a loaded ORM instance into its full response shape."""
+        return dict(zip(self.all_fields, self._instance_getter(obj)))
+
+    def from_values(self, values: Dict[str, Any]) -> Dict:
+        """Serializes a column-name -> value dict (e.g. an inserted row) into its full response shape."""
+        return {field: values.get(attr) for field, attr in self.fields.items()}
+
+AGENT_MAPPER = ResponseMapper(
+    Agent,
+    {
+        "id": "id",
+        "name": "name",
+        "description": "description",
+        "agentFamilyId": "agent_family_id",
+        "framework": "framework",
+        "repositoryUrl": "repository_url",
+        "sourceHash": "source_hash",
+        "templateId": "template_id",
+        "status": "status",
+        "environment": "environment",
+        "modelId": "model_id",
+        "temperature": "temperature",
+        "maxOutputTokens": "max_output_tokens",
+        "systemInstruction": "system_instruction",
+        "configuration": "configuration",
+        "createdAt": "created_at",
+        "updatedAt": "updated_at",
+        "createdBy": "created_by",
+        "currentDeploymentId": "current_deployment_id",
+    },
+    # Compact list shape leaves out the large Text/JSON columns
+    summary_exclude=("systemInstruction", "configuration")
+)
+
+DEPLOYMENT_MAPPER = ResponseMapper(
+    Deployment,
+    {
+        "id": "id",
+        "agentId": "agent_id",
+        "deploymentType": "deployment_type",
+        "version": "version",
+        "environment": "environment",
+        "projectId": "project_id",
+        "region": "region",
+        "resourceName": "resource_name",
+        "operationName": "operation_name",
+        "status": "status",
+        "endpointUrl": "endpoint_url",
+        "deployedAt": "deployed_at",
+        "updatedAt": "updated_at",
+        "deployedBy": "deployed_by",
+        "configuration": "configuration",
+    },
+    summary_exclude=("configuration",)
+)
+
+TEMPLATE_MAPPER = ResponseMapper(
+    Template,
+    {
+        "id": "id",
+        "name": "name",
+        "description": "description",
+        "framework": "framework",
+        "category": "category",
+        "repositoryUrl": "repository_url",
+        "configuration": "configuration",
+        "usageCount": "usage_count",
+        "createdAt": "created_at",
+        "updatedAt": "updated_at",
+    }
+)
+
+AGENT_TEST_MAPPER = ResponseMapper(
+    AgentTest,
+    {
+        "id": "id",
+        "agentId": "agent_id",
+        "query": "query",
+        "response": "response",
+        "metrics": "metrics",
+        "success": "success",
+        "createdAt": "created_at",
+    }
+)
+
+AGENT_METRICS_MAPPER = ResponseMapper(
+    AgentMetrics,
+    {
+        "id": "id",
+        "agentId": "agent_id",
+        "date": "date",
+        "requestCount": "request_count",
+        "avgResponseTimeMs": "avg_response_time_ms",
+        "tokenCountInput": "token_count_input",
+        "tokenCountOutput": "token_count_output",
+        "errorCount": "error_count",
+        "estimatedCost": "estimated_cost",
+    }
+)
+
+JOB_MAPPER = ResponseMapper(
+    Job,
+    {
+        "id": "id",
+        "jobType": "job_type",
+        "status": "status",
+        "progress": "progress",
+        "progressMessage": "progress_message",
+        "agentId": "agent_id",
+        "deploymentId": "deployment_id",
+        "payload": "payload",
+        "result": "result",
+        "error": "error",
+        "attempts": "attempts",
+        "maxAttempts": "max_attempts",
+        "runAfter": "run_after",
+        "lockedBy": "locked_by",
+        "createdAt": "created_at",
+        "updatedAt": "updated_at",
+        "startedAt": "started_at",
+        "finishedAt": "finished_at",
+    },
+    summary_exclude=("payload", "result")
+)
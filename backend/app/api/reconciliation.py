@@ -0,0 +1,94 @@
+from typing import Dict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Response
+
+from app.database import get_db, Job, JobStatus, JobType, ReconciliationWatermark
+from app.services.inventory import FLEET_PROJECTS
+from app.services.reconciliation import queue_reconciliation
+
+router = APIRouter()
+
+@router.post("/reconciliation/run", status_code=202)
+async def run_reconciliation(
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """
+    Queues a reconciliation pass of the deployments table against Vertex AI. When a pass
+    is already pending or running, that job is returned instead of queueing another.
+    """
+    try:
+        if not FLEET_PROJECTS:
+            raise HTTPException(status_code=400, detail="No projects to reconcile; set FLEET_PROJECTS")
+
+        job, queued = await queue_reconciliation(db)
+        if not queued:
+            response.status_code = 200
+
+        return {
+            "jobId": job.id,
+            "status": job.status,
+            "queued": queued,
+            "statusUrl": f"/api/jobs/{job.id}"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error queueing reconciliation: {str(e)}")
+
+@router.get("/reconciliation/status")
+async def get_reconciliation_status(
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """
+    Gets the drift report and duration of the last finished reconciliation pass, the pass in
+    flight if any, and how far each project and region has been reconciled.
+    """
+    try:
+        def latest(*statuses: JobStatus):
+            return (
+                select(Job)
+                .where(
+                    Job.job_type == JobType.RECONCILE_FLEET.value,
+                    Job.status.in_([status.value for status in statuses])
+                )
+                .order_by(Job.created_at.desc())
+                .limit(1)
+            )
+
+        finished = (await db.execute(latest(JobStatus.SUCCEEDED, JobStatus.FAILED))).scalar()
+        active = (await db.execute(latest(JobStatus.PENDING, JobStatus.RUNNING))).scalar()
+        watermarks = (await db.execute(
+            select(ReconciliationWatermark).order_by(
+                ReconciliationWatermark.project_id, ReconciliationWatermark.region
+            )
+        )).scalars().all()
+
+        return {
+            "lastRun": {
+                "jobId": finished.id,
+                "status": finished.status,
+                "startedAt": finished.started_at,
+                "finishedAt": finished.finished_at,
+                "report": finished.result,
+                "error": finished.error
+            } if finished else None,
+            "activeJobId": active.id if active else None,
+            "watermarks": [
+                {
+                    "projectId": watermark.project_id,
+                    "region": watermark.region,
+                    "updateTime": watermark.update_time,
+                    "fullSweepAt": watermark.full_sweep_at
+                }
+                for watermark in watermarks
+            ]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting reconciliation status: {str(e)}")
@@ -0,0 +1,120 @@
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict
+import zlib
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+
+from app.database import AsyncSessionLocal
+
+# Rows fetched per round trip from the server-side cursor when streaming
+STREAM_BATCH_SIZE = 1000
+
+def _default(obj: Any) -> Any:
+    """Encodes the few types responses use that orjson does not handle natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # Anything else is a bug in the caller, not something to stringify
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Serializes content to JSON bytes with orjson."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; used as the app-wide default response class."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    JSON = "json"
+
+async def stream_rows(query: Select, to_dict: Callable[[Any], Dict]) -> AsyncIterator[list]:
+    """
+    Yields batches of mapped rows from a server-side cursor.
+    Opens its own session because the stream outlives the request handler; routes
+    release their request session first, so a streamed request holds one connection.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield [to_dict(row) for row in rows]
+
+async def _encode_ndjson(batches: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield b"".join(dumps(item) + b"\n" for item in batch)
+
+async def _encode_json_array(batches: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    yield b"["
+    first = True
+    async for batch in batches:
+        if not batch:
+            continue
+        chunk = b",".join(dumps(item) for item in batch)
+        yield chunk if first else b"," + chunk
+        first = False
+    yield b"]"
+
+async def _gzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compresses a byte stream on the fly into a single gzip member."""
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+async def _resume(first: list, batches: AsyncIterator[list]) -> AsyncIterator[list]:
+    """Yields the prefetched batch and then the rest; a later failure ends the stream with an error item."""
+    yield first
+    try:
+        async for batch in batches:
+            yield batch
+    except Exception as e:
+        # The status line is already sent, so the error goes in the body for clients to check
+        print(f"Error streaming rows: {str(e)}")
+        yield [{"error": f"Stream ended early: {str(e)}"}]
+
+async def streaming_response(
+    query: Select,
+    to_dict: Callable[[Any], Dict],
+    stream_format: StreamFormat,
+    headers: Dict[str, str] = None,
+    gzip: bool = False
+) -> StreamingResponse:
+    """
+    Streams every row of query as NDJSON or a JSON array, encoding batch by batch.
+    The query runs and its first batch is fetched before the response starts, so a
+    failing query raises here rather than producing a short 200; should the stream fail
+    after that, its last item is {"error": ...}.
+    """
+    batches = stream_rows(query, to_dict)
+    try:
+        first = await batches.__anext__()
+    except StopAsyncIteration:
+        first = []
+    return stream_batches(_resume(first, batches), stream_format, headers, gzip)
+
+def stream_batches(
+    batches: AsyncIterator[list],
+    stream_format: StreamFormat,
+    headers: Dict[str, str] = None,
+    gzip: bool = False
+) -> StreamingResponse:
+    """Streams items from batches of dicts as NDJSON or a JSON array as each batch arrives."""
+    if stream_format == StreamFormat.NDJSON:
+        body, media_type = _encode_ndjson(batches), "application/x-ndjson"
+    else:
+        body, media_type = _encode_json_array(batches), "application/json"
+
+    headers = dict(headers or {})
+    if gzip:
+        body = _gzip(body)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -1,79 +1,70 @@
 from typing import Dict, List, Optional, Any
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, Depends, HTTPException, Query, Body, Path
 from datetime import datetime
 import uuid
 
 from app.database import get_db, Template
 from app.services.agent_starter_pack import AgentStarterPackService
+from app.services.container import get_agent_starter_pack
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, build_page
+from app.api.responses import FastJSONResponse
+from app.api.projection import TEMPLATE_MAPPER
 
 router = APIRouter()
-agent_starter_pack = AgentStarterPackService()
 
 @router.get("/templates")
 async def list_templates(
     framework: Optional[str] = None,
     category: Optional[str] = None,
-    db: Session = Depends(get_db)
-) -> List[Dict]:
-    """Lists available agent templates with optional filtering."""
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's nextCursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """Lists available agent templates newest first with optional filtering, one page at a time."""
     try:
-        # Base query
-        query = db.query(Template)
+        # Base query over plain columns
+        query = TEMPLATE_MAPPER.select(TEMPLATE_MAPPER.all_fields)
         
         # Apply filters
         if framework:
-            query = query.filter(Template.framework == framework)
+            query = query.where(Template.framework == framework)
             
         if category:
-            query = query.filter(Template.category == category)
+            query = query.where(Template.category == category)
             
-        # Get templates
-        templates = query.all()
+        # Get one page of templates
+        query = paginate(query, Template.created_at, Template.id, cursor, limit)
+        rows = (await db.execute(query)).all()
         
-        return [
-            {
-                "id": template.id,
-                "name": template.name,
-                "description": template.description,
-                "framework": template.framework,
-                "category": template.category,
-                "repositoryUrl": template.repository_url,
-                "configuration": template.configuration,
-                "usageCount": template.usage_count,
-                "createdAt": template.created_at,
-                "updatedAt": template.updated_at
-            }
-            for template in templates
-        ]
+        return FastJSONResponse(build_page(
+            rows,
+            limit,
+            sort_key=lambda row: (row.created_at, row.id),
+            serialize=TEMPLATE_MAPPER.row_mapper(TEMPLATE_MAPPER.all_fields)
+        ))
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing templates: {str(e)}")
 
 @router.get("/templates/{template_id}")
 async def get_template(
     template_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """Gets a specific template by ID."""
     try:
-        template = db.query(Template).filter(Template.id == template_id).first()
+        row = (await db.execute(
+            TEMPLATE_MAPPER.select(TEMPLATE_MAPPER.all_fields).where(Template.id == template_id)
+        )).first()
         
-        if not template:
+        if not row:
             raise HTTPException(status_code=404, detail="Template not found")
             
-        return {
-            "id": template.id,
-            "name": template.name,
-            "description": template.description,
-            "framework": template.framework,
-            "category": template.category,
-            "repositoryUrl": template.repository_url,
-            "configuration": template.configuration,
-            "usageCount": template.usage_count,
-            "createdAt": template.created_at,
-            "updatedAt": template.updated_at
-        }
+        return TEMPLATE_MAPPER.row_mapper(TEMPLATE_MAPPER.all_fields)(row)
         
     except HTTPException:
         raise
@@ -83,7 +74,7 @@ async def get_template(
 @router.post("/templates")
 async def create_template(
     template_data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """Creates a new template."""
     try:
@@ -107,37 +98,26 @@ async def create_template(
         )
         
         db.add(template)
-        db.commit()
-        db.refresh(template)
+        await db.commit()
+        await db.refresh(template)
         
-        return {
-            "id": template.id,
-            "name": template.name,
-            "description": template.description,
-            "framework": template.framework,
-            "category": template.category,
-            "repositoryUrl": template.repository_url,
-            "configuration": template.configuration,
-            "usageCount": template.usage_count,
-            "createdAt": template.created_at,
-            "updatedAt": template.updated_at
-        }
+        return TEMPLATE_MAPPER.from_instance(template)
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating template: {str(e)}")
 
 @router.put("/templates/{template_id}")
 async def update_template(
     template_id: str,
     template_data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """Updates an existing template."""
     try:
-        template = db.query(Template).filter(Template.id == template_id).first()
+        template = await db.get(Template, template_id)
         
         if not template:
             raise HTTPException(status_code=404, detail="Template not found")
@@ -163,63 +143,53 @@ async def update_template(
             
         template.updated_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(template)
+        await db.commit()
+        await db.refresh(template)
         
-        return {
-            "id": template.id,
-            "name": template.name,
-            "description": template.description,
-            "framework": template.framework,
-            "category": template.category,
-            "repositoryUrl": template.repository_url,
-            "configuration": template.configuration,
-            "usageCount": template.usage_count,
-            "createdAt": template.created_at,
-            "updatedAt": template.updated_at
-        }
+        return TEMPLATE_MAPPER.from_instance(template)
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating template: {str(e)}")
 
 @router.delete("/templates/{template_id}")
 async def delete_template(
     template_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """Deletes a template."""
     try:
-        template = db.query(Template).filter(Template.id == template_id).first()
+        template = await db.get(Template, template_id)
         
         if not template:
             raise HTTPException(status_code=404, detail="Template not found")
             
-        db.delete(template)
-        db.commit()
+        await db.delete(template)
+        await db.commit()
         
         return {"message": "Template deleted successfully"}
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting template: {str(e)}")
 
 @router.post("/templates/{template_id}/initialize")
 async def initialize_from_template(
     template_id: str,
     initialization_data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db)
+    agent_starter_pack: AgentStarterPackService = Depends(get_agent_starter_pack),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Initializes a new agent project from a template.
     This endpoint interacts with the Agent Starter Pack to create a new project.
     """
     try:
-        template = db.query(Template).filter(Template.id == template_id).first()
+        template = await db.get(Template, template_id)
         
         if not template:
             raise HTTPException(status_code=404, detail="Template not found")
@@ -233,7 +203,7 @@ async def initialize_from_template(
             
         # Update usage count
         template.usage_count += 1
-        db.commit()
+        await db.commit()
         
         # Initialize project using Agent Starter Pack service
         try:
@@ -259,12 +229,13 @@ async def initialize_from_template(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error initializing from template: {str(e)}")
 
 @router.get("/templates/synchronize")
 async def synchronize_templates(
-    db: Session = Depends(get_db)
+    agent_starter_pack: AgentStarterPackService = Depends(get_agent_starter_pack),
+    db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
     Synchronizes templates with the Agent Starter Pack repository.
@@ -281,7 +252,9 @@ async def synchronize_templates(
         for template_data in result.get("templates", []):
             # Check if template already exists
             template_name = template_data.get("name")
-            existing_template = db.query(Template).filter(Template.name == template_name).first()
+            existing_template = (await db.execute(
+                select(Template).where(Template.name == template_name).limit(1)
+            )).scalars().first()
             
             if existing_template:
                 # Update existing template
@@ -309,7 +282,7 @@ async def synchronize_templates(
                 db.add(template)
                 templates_added += 1
                 
-        db.commit()
+        await db.commit()
         
         return {
             "status": "success",
@@ -319,5 +292,5 @@ async def synchronize_templates(
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error synchronizing templates: {str(e)}")
@@ -1,21 +1,57 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 
-from app.api import agents, deployments, templates, environments, playground
-
-# Load environment variables
+# Settings are read with os.getenv when app modules are imported, so .env is loaded first
 load_dotenv()
 
+from app.api import agents, deployments, templates, environments, playground, metrics, export, families, jobs, inventory, reconciliation
+from app.database import async_engine
+from app.services.job_queue import job_workers
+from app.services.operation_poller import operation_poller
+from app.services.reconciliation import reconciliation_scheduler
+from app.services.vertex_ai import close_http_client
+from app.services.container import SERVICE_WARMUP, warm_up_services
+from app.api.responses import FastJSONResponse
+from app.api.idempotency import IdempotencyMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manages resources that live for the lifetime of the app."""
+    # Services, credentials and the Vertex AI connection pool are prepared in the background
+    warmup = asyncio.create_task(warm_up_services()) if SERVICE_WARMUP else None
+    # Background workers for queued jobs such as deployments
+    job_workers.start()
+    # Tracks Vertex AI long-running operations of in-progress deployments
+    operation_poller.start()
+    # Periodically reconciles recorded deployments with the engines in Vertex AI
+    reconciliation_scheduler.start()
+    yield
+    if warmup:
+        warmup.cancel()
+    await reconciliation_scheduler.stop()
+    await operation_poller.stop()
+    await job_workers.stop()
+    await close_http_client()
+    # Close pooled database connections on shutdown
+    await async_engine.dispose()
+
 # Create FastAPI app
 app = FastAPI(
     title="AgentFleet.io API",
     description="Management plane for Vertex AI Agent Engine",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
+# Replay responses for retried requests that carry an Idempotency-Key header
+app.add_middleware(IdempotencyMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -27,10 +63,16 @@ app.add_middleware(
 
 # Include routers
 app.include_router(agents.router, prefix="/api", tags=["agents"])
+app.include_router(families.router, prefix="/api", tags=["agent-families"])
 app.include_router(deployments.router, prefix="/api", tags=["deployments"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+app.include_router(inventory.router, prefix="/api", tags=["inventory"])
+app.include_router(reconciliation.router, prefix="/api", tags=["reconciliation"])
 app.include_router(templates.router, prefix="/api", tags=["templates"])
 app.include_router(environments.router, prefix="/api", tags=["environments"])
 app.include_router(playground.router, prefix="/api", tags=["playground"])
+app.include_router(metrics.router, prefix="/api", tags=["metrics"])
+app.include_router(export.router, prefix="/api", tags=["export"])
 
 # Mount static files directory for uploaded files (if needed)
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
@@ -20,6 +20,7 @@ class DeploymentStatus(str, Enum):
     SUCCESSFUL = "SUCCESSFUL"
     FAILED = "FAILED"
     ROLLED_BACK = "ROLLED_BACK"
+    DELETED = "DELETED"
 
 class FrameworkType(str, Enum):
     CUSTOM = "CUSTOM"
@@ -109,6 +110,7 @@ class AgentResponse(BaseModel):
     createdAt: datetime
     updatedAt: datetime
     createdBy: Optional[str] = None
+    currentDeploymentId: Optional[str] = None
 
 class DeploymentResponse(BaseModel):
     id: str
@@ -119,17 +121,100 @@ class DeploymentResponse(BaseModel):
     projectId: str
     region: str
     resourceName: Optional[str] = None
+    operationName: Optional[str] = None
     status: str
     endpointUrl: Optional[str] = None
     deployedAt: datetime
+    updatedAt: Optional[datetime] = None
     deployedBy: Optional[str] = None
     configuration: Optional[Dict[str, Any]] = None
 
+class PartialAgentResponse(BaseModel):
+    """Agent projection returned by list endpoints; only the selected fields are set."""
+    id: str
+    name: Optional[str] = None
+    description: Optional[str] = None
+    agentFamilyId: Optional[str] = None
+    framework: Optional[str] = None
+    repositoryUrl: Optional[str] = None
+    sourceHash: Optional[str] = None
+    templateId: Optional[str] = None
+    status: Optional[str] = None
+    environment: Optional[str] = None
+    modelId: Optional[str] = None
+    temperature: Optional[float] = None
+    maxOutputTokens: Optional[int] = None
+    systemInstruction: Optional[str] = None
+    configuration: Optional[Dict[str, Any]] = None
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+    createdBy: Optional[str] = None
+    currentDeploymentId: Optional[str] = None
+
+class PartialDeploymentResponse(BaseModel):
+    """Deployment projection returned by list endpoints; only the selected fields are set."""
+    id: str
+    agentId: Optional[str] = None
+    deploymentType: Optional[str] = None
+    version: Optional[str] = None
+    environment: Optional[str] = None
+    projectId: Optional[str] = None
+    region: Optional[str] = None
+    resourceName: Optional[str] = None
+    operationName: Optional[str] = None
+    status: Optional[str] = None
+    endpointUrl: Optional[str] = None
+    deployedAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+    deployedBy: Optional[str] = None
+    configuration: Optional[Dict[str, Any]] = None
+
+class AgentPageResponse(BaseModel):
+    items: List[PartialAgentResponse]
+    nextCursor: Optional[str] = None
+    limit: int
+
+class DeploymentPageResponse(BaseModel):
+    items: List[PartialDeploymentResponse]
+    nextCursor: Optional[str] = None
+    limit: int
+
 class AgentFamilyResponse(BaseModel):
     id: str
     name: str
     agents: List[AgentResponse]
 
+class FamilyLatestAgent(BaseModel):
+    id: str
+    name: str
+    environment: str
+    status: str
+    sourceHash: Optional[str] = None
+    createdAt: datetime
+
+class FamilyLatestDeployment(BaseModel):
+    id: str
+    agentId: str
+    version: str
+    environment: str
+    projectId: Optional[str] = None
+    region: str
+    endpointUrl: Optional[str] = None
+    deployedAt: datetime
+
+class AgentFamilySummaryResponse(BaseModel):
+    agentFamilyId: str
+    agentCount: int
+    countsByEnvironment: Dict[str, int]
+    countsByStatus: Dict[str, int]
+    latestAgent: FamilyLatestAgent
+    latestSuccessfulDeployment: Optional[FamilyLatestDeployment] = None
+
+class AgentFamilyPageResponse(BaseModel):
+    items: List[AgentFamilySummaryResponse]
+    nextCursor: Optional[str] = None
+    limit: int
+
 class AgentTestResponse(BaseModel):
     id: str
     agentId: str
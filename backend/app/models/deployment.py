@@ -1 +1,28 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from datetime import datetime
 
+class JobResponse(BaseModel):
+    id: str
+    jobType: str
+    status: str
+    progress: int
+    progressMessage: Optional[str] = None
+    agentId: Optional[str] = None
+    deploymentId: Optional[str] = None
+    payload: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    maxAttempts: int
+    runAfter: datetime
+    lockedBy: Optional[str] = None
+    createdAt: datetime
+    updatedAt: datetime
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
+
+class JobPageResponse(BaseModel):
+    items: List[JobResponse]
+    nextCursor: Optional[str] = None
+    limit: int
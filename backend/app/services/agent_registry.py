@@ -1,11 +1,34 @@
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional
 from datetime import datetime
 import uuid
 import json
 import os
-from sqlalchemy.orm import Session
-from app.database import Agent, Deployment, AgentStatus
+from sqlalchemy import and_, delete, func, literal, or_, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from app.database import (
+    Agent, AgentCurrentDeployment, AgentLineage, Deployment, AgentStatus, DeploymentStatus,
+    LineageRelation, ENVIRONMENT_ORDER
+)
+
+def _edge_columns(edge) -> tuple:
+    """Columns carried through the lineage CTEs for an (aliased) AgentLineage entity."""
+    return (
+        edge.id.label("edge_id"),
+        edge.parent_agent_id,
+        edge.parent_environment,
+        edge.child_agent_id,
+        edge.child_environment,
+        edge.relation,
+        edge.external_endpoint,
+    )
+
+def _environment_rank(environment: str) -> int:
+    """Position of an environment in the promotion order; unknown environments sort last."""
+    return ENVIRONMENT_ORDER.index(environment) if environment in ENVIRONMENT_ORDER else len(ENVIRONMENT_ORDER)
 
 class AgentRegistryService:
     """Service for managing the agent registry."""
@@ -14,7 +37,7 @@ class AgentRegistryService:
         # Get current environment
         self.environment = os.getenv("AGENTFLEET_ENVIRONMENT", "DEVELOPMENT")
     
-    async def register_agent(self, db: Session, agent_data: Dict[str, Any]) -> Agent:
+    async def register_agent(self, db: AsyncSession, agent_data: Dict[str, Any]) -> Agent:
         """
         Registers a new agent in the registry.
         Returns the created agent.
@@ -46,23 +69,23 @@ class AgentRegistryService:
             )
 
             db.add(agent)
-            db.commit()
-            db.refresh(agent)
+            await db.commit()
+            await db.refresh(agent)
             
             return agent
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             print(f"Error registering agent: {str(e)}")
             raise
     
-    async def update_agent(self, db: Session, agent_id: str, agent_data: Dict[str, Any]) -> Agent:
+    async def update_agent(self, db: AsyncSession, agent_id: str, agent_data: Dict[str, Any]) -> Agent:
         """
         Updates an existing agent in the registry.
         Returns the updated agent.
         """
         try:
-            agent = db.query(Agent).filter(Agent.id == agent_id).first()
+            agent = await db.get(Agent, agent_id)
             if not agent:
                 raise ValueError(f"Agent not found with ID: {agent_id}")
             
@@ -90,17 +113,17 @@ class AgentRegistryService:
                     agent.configuration = value
             
             agent.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(agent)
+            await db.commit()
+            await db.refresh(agent)
             
             return agent
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             print(f"Error updating agent: {str(e)}")
             raise
     
-    async def register_deployment(self, db: Session, deployment_data: Dict[str, Any]) -> Deployment:
+    async def register_deployment(self, db: AsyncSession, deployment_data: Dict[str, Any]) -> Deployment:
         """
         Registers a new deployment for an agent.
         Returns the created deployment.
@@ -111,7 +134,7 @@ class AgentRegistryService:
                 raise ValueError("Agent ID is required for deployment registration")
             
             # Check if agent exists
-            agent = db.query(Agent).filter(Agent.id == agent_id).first()
+            agent = await db.get(Agent, agent_id)
             if not agent:
                 raise ValueError(f"Agent not found with ID: {agent_id}")
             
@@ -138,65 +161,281 @@ class AgentRegistryService:
             if deployment.status == "SUCCESSFUL":
                 agent.status = "DEPLOYED"
                 agent.updated_at = datetime.utcnow()
+                await self.refresh_current_deployments(db, [agent_id])
             
-            db.commit()
-            db.refresh(deployment)
+            await db.commit()
+            await db.refresh(deployment)
             
             return deployment
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             print(f"Error registering deployment: {str(e)}")
             raise
     
-    async def track_agent_lineage(self, db: Session, agent_id: str, related_agents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def refresh_current_deployments(self, db: AsyncSession, agent_ids: Iterable[str]) -> None:
+        """
+        Recomputes the current deployment pointers of the given agents from their successful
+        deployments: one row per project/region in agent_current_deployments, and the newest
+        overall in agents.current_deployment_id. Runs set-wise in the caller's transaction,
+        so the pointers commit together with the deployment change that moved them.
+        """
+        agent_ids = list(set(agent_ids))
+        if not agent_ids:
+            return
+        
+        # Make pending deployment rows visible to the statements below
+        await db.flush()
+        
+        ranked = select(
+            Deployment.agent_id,
+            Deployment.project_id,
+            Deployment.region,
+            Deployment.id.label("deployment_id"),
+            func.row_number().over(
+                partition_by=(Deployment.agent_id, Deployment.project_id, Deployment.region),
+                order_by=(Deployment.deployed_at.desc(), Deployment.id.desc())
+            ).label("position")
+        ).where(
+            Deployment.agent_id.in_(agent_ids),
+            Deployment.status == DeploymentStatus.SUCCESSFUL.value
+        ).subquery()
+        
+        pointers = AgentCurrentDeployment.__table__
+        # Upserted rather than deleted and re-inserted, so transactions refreshing the same
+        # agent at once wait on each other's rows instead of colliding on the primary key.
+        # ON CONFLICT is dialect-specific; SQLite is supported for local development
+        dialect_insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+        upsert = dialect_insert(pointers).from_select(
+            ["agent_id", "project_id", "region", "deployment_id", "updated_at"],
+            select(
+                ranked.c.agent_id, ranked.c.project_id, ranked.c.region, ranked.c.deployment_id,
+                literal(datetime.utcnow())
+            ).where(ranked.c.position == 1).order_by(
+                # A consistent lock order across transactions
+                ranked.c.agent_id, ranked.c.project_id, ranked.c.region
+            )
+        )
+        await db.execute(upsert.on_conflict_do_update(
+            index_elements=["agent_id", "project_id", "region"],
+            set_={"deployment_id": upsert.excluded.deployment_id, "updated_at": upsert.excluded.updated_at}
+        ))
+        
+        # Project/regions left without a successful deployment lose their pointer
+        await db.execute(delete(pointers).where(
+            pointers.c.agent_id.in_(agent_ids),
+            ~select(Deployment.id).where(
+                Deployment.agent_id == pointers.c.agent_id,
+                Deployment.project_id == pointers.c.project_id,
+                Deployment.region == pointers.c.region,
+                Deployment.status == DeploymentStatus.SUCCESSFUL.value
+            ).exists()
+        ))
+        
+        agents = Agent.__table__
+        latest = select(Deployment.id).where(
+            Deployment.agent_id == agents.c.id,
+            Deployment.status == DeploymentStatus.SUCCESSFUL.value
+        ).order_by(Deployment.deployed_at.desc(), Deployment.id.desc()).limit(1).scalar_subquery()
+        await db.execute(
+            update(agents).where(agents.c.id.in_(agent_ids)).values(current_deployment_id=latest)
+        )
+    
+    async def link_agents(
+        self,
+        db: AsyncSession,
+        agent: Agent,
+        related_agent_id: str,
+        related_environment: str,
+        relation: LineageRelation,
+        external_endpoint: Optional[str] = None
+    ) -> AgentLineage:
+        """
+        Records the lineage edge between an agent and its related agent in another environment.
+        An agent has at most one related agent per environment and relation, so an existing
+        edge is updated in place. The edge points from the earlier environment to the later one.
+        Does not commit.
+        """
+        local = (agent.id, agent.environment)
+        related = (related_agent_id, related_environment)
+        if _environment_rank(agent.environment) <= _environment_rank(related_environment):
+            parent, child = local, related
+        else:
+            parent, child = related, local
+        
+        edge = (await db.execute(
+            select(AgentLineage).where(
+                AgentLineage.relation == relation.value,
+                or_(
+                    and_(AgentLineage.parent_agent_id == agent.id,
+                         AgentLineage.child_environment == related_environment),
+                    and_(AgentLineage.child_agent_id == agent.id,
+                         AgentLineage.parent_environment == related_environment)
+                )
+            ).limit(1)
+        )).scalars().first()
+        
+        now = datetime.utcnow()
+        if not edge:
+            edge = AgentLineage(id=str(uuid.uuid4()), relation=relation.value, created_at=now)
+            db.add(edge)
+        
+        edge.parent_agent_id, edge.parent_environment = parent
+        edge.child_agent_id, edge.child_environment = child
+        edge.external_endpoint = external_endpoint
+        edge.updated_at = now
+        return edge
+    
+    async def get_agent_links(self, db: AsyncSession, agent_id: str, relation: LineageRelation) -> List[Dict[str, Any]]:
+        """Lists the agents directly linked to an agent by one relation, from the agent's point of view."""
+        edges = (await db.execute(
+            select(AgentLineage).where(
+                AgentLineage.relation == relation.value,
+                or_(AgentLineage.parent_agent_id == agent_id, AgentLineage.child_agent_id == agent_id)
+            ).order_by(AgentLineage.created_at)
+        )).scalars().all()
+        
+        return [
+            {
+                "agentId": edge.child_agent_id if edge.parent_agent_id == agent_id else edge.parent_agent_id,
+                "environment": edge.child_environment if edge.parent_agent_id == agent_id else edge.parent_environment,
+                "externalEndpoint": edge.external_endpoint,
+                "createdAt": edge.created_at,
+                "updatedAt": edge.updated_at
+            }
+            for edge in edges
+        ]
+    
+    async def track_agent_lineage(self, db: AsyncSession, agent_id: str, related_agents: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Tracks the lineage of an agent across environments.
         This allows for identifying related agents in different environments.
         """
         try:
-            agent = db.query(Agent).filter(Agent.id == agent_id).first()
+            agent = await db.get(Agent, agent_id)
             if not agent:
                 raise ValueError(f"Agent not found with ID: {agent_id}")
             
-            # Initialize configuration if needed
-            if not agent.configuration:
-                agent.configuration = {}
-            
-            # Update lineage information
-            if "lineage" not in agent.configuration:
-                agent.configuration["lineage"] = {}
-            
             # Add related agents to lineage
             for related_agent in related_agents:
                 env = related_agent.get("environment")
                 if env and env != agent.environment:
-                    agent.configuration["lineage"][env] = {
-                        "agentId": related_agent.get("agentId"),
-                        "lastUpdated": datetime.utcnow().isoformat()
-                    }
+                    await self.link_agents(db, agent, related_agent.get("agentId"), env, LineageRelation.LINEAGE)
             
             agent.updated_at = datetime.utcnow()
-            db.commit()
+            await db.commit()
             
+            links = await self.get_agent_links(db, agent.id, LineageRelation.LINEAGE)
             return {
                 "agentId": agent.id,
                 "agentFamilyId": agent.agent_family_id,
-                "lineage": agent.configuration.get("lineage", {})
+                "lineage": {
+                    link["environment"]: {
+                        "agentId": link["agentId"],
+                        "lastUpdated": link["updatedAt"].isoformat()
+                    }
+                    for link in links
+                }
             }
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             print(f"Error tracking agent lineage: {str(e)}")
             raise
     
-    async def get_agent_family(self, db: Session, agent_family_id: str) -> List[Agent]:
+    async def get_lineage_graph(self, db: AsyncSession, agent_id: str, max_depth: int) -> Dict[str, Any]:
+        """
+        Walks the lineage edges up to max_depth hops in both directions with recursive CTEs
+        in a single query, then loads the agents that live in this instance in a second one.
+        """
+        # Ancestors: follow edges from child to parent
+        ancestors = select(*_edge_columns(AgentLineage), literal(1).label("depth")).where(
+            AgentLineage.child_agent_id == agent_id
+        ).cte("ancestors", recursive=True)
+        parent_edge = aliased(AgentLineage)
+        ancestors = ancestors.union_all(
+            select(*_edge_columns(parent_edge), (ancestors.c.depth + 1).label("depth"))
+            .join(ancestors, parent_edge.child_agent_id == ancestors.c.parent_agent_id)
+            .where(ancestors.c.depth < max_depth)
+        )
+        
+        # Descendants: follow edges from parent to child
+        descendants = select(*_edge_columns(AgentLineage), literal(1).label("depth")).where(
+            AgentLineage.parent_agent_id == agent_id
+        ).cte("descendants", recursive=True)
+        child_edge = aliased(AgentLineage)
+        descendants = descendants.union_all(
+            select(*_edge_columns(child_edge), (descendants.c.depth + 1).label("depth"))
+            .join(descendants, child_edge.parent_agent_id == descendants.c.child_agent_id)
+            .where(descendants.c.depth < max_depth)
+        )
+        
+        rows = (await db.execute(union_all(
+            select(literal("ancestor").label("direction"), ancestors),
+            select(literal("descendant").label("direction"), descendants)
+        ))).all()
+        
+        # The depth cap bounds cycles; keep each edge and node at its shortest distance
+        edges: Dict[str, Any] = {}
+        nodes: Dict[str, Dict[str, Any]] = {agent_id: {"direction": "self", "depth": 0, "environment": None}}
+        for row in sorted(rows, key=lambda row: row.depth):
+            edges.setdefault(row.edge_id, row)
+            node_id, environment = (
+                (row.parent_agent_id, row.parent_environment) if row.direction == "ancestor"
+                else (row.child_agent_id, row.child_environment)
+            )
+            if node_id not in nodes:
+                nodes[node_id] = {"direction": row.direction, "depth": row.depth, "environment": environment}
+        
+        local_agents = {
+            agent.id: agent
+            for agent in (await db.execute(
+                select(Agent.id, Agent.name, Agent.status, Agent.environment, Agent.agent_family_id)
+                .where(Agent.id.in_(list(nodes)))
+            )).all()
+        }
+        
+        graph_nodes = []
+        for node_id, node in nodes.items():
+            agent = local_agents.get(node_id)
+            graph_nodes.append({
+                "id": node_id,
+                # Agents in other environments' instances are only known by ID
+                "name": agent.name if agent else None,
+                "status": agent.status if agent else None,
+                "environment": agent.environment if agent else node["environment"],
+                "agentFamilyId": agent.agent_family_id if agent else None,
+                "local": agent is not None,
+                "direction": node["direction"],
+                "depth": node["depth"]
+            })
+        
+        return {
+            "agentId": agent_id,
+            "maxDepth": max_depth,
+            "nodes": graph_nodes,
+            "edges": [
+                {
+                    "parentAgentId": edge.parent_agent_id,
+                    "parentEnvironment": edge.parent_environment,
+                    "childAgentId": edge.child_agent_id,
+                    "childEnvironment": edge.child_environment,
+                    "relation": edge.relation,
+                    "externalEndpoint": edge.external_endpoint
+                }
+                for edge in edges.values()
+            ]
+        }
+    
+    async def get_agent_family(self, db: AsyncSession, agent_family_id: str) -> List[Agent]:
         """
         Gets all agents in a specific family.
         This allows for viewing all versions of an agent.
         """
         try:
-            agents = db.query(Agent).filter(Agent.agent_family_id == agent_family_id).all()
+            agents = (await db.execute(
+                select(Agent).where(Agent.agent_family_id == agent_family_id)
+            )).scalars().all()
             return agents
             
         except Exception as e:
@@ -2,7 +2,6 @@ import os
 import json
 import subprocess
 from typing import Dict, List, Any, Optional
-import httpx
 import uuid
 import tempfile
 import shutil
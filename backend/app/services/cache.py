@@ -0,0 +1,90 @@
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class AsyncTTLCache:
+    """
+    Process-local TTL + LRU cache for async loaders. Concurrent misses for one key share
+    a single load, at most max_entries values are kept (least recently used go first),
+    and callers get a copy so cached values cannot be mutated through them.
+    A load that overlaps an invalidation of its key is returned but not stored.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if self.ttl_seconds <= 0:
+            return await loader()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return copy.deepcopy(entry[1])
+            del self._entries[key]
+            self.expirations += 1
+
+        loading = self._loading.get(key)
+        if loading is not None:
+            self.coalesced += 1
+            # Shielded so one cancelled waiter does not cancel the load for the rest
+            return copy.deepcopy(await asyncio.shield(loading))
+
+        self.misses += 1
+        loading = self._loading[key] = asyncio.ensure_future(loader())
+        # Finished by the load itself, so it is stored even if the caller that started it is cancelled
+        loading.add_done_callback(lambda done: self._finish_load(key, done))
+        return copy.deepcopy(await asyncio.shield(loading))
+
+    def _finish_load(self, key: Hashable, loading: asyncio.Future) -> None:
+        if self._loading.get(key) is not loading:
+            return  # Invalidated while loading
+        del self._loading[key]
+        if not loading.cancelled() and loading.exception() is None:
+            self._store(key, loading.result())
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drops matching entries and keeps loads already in flight for them from being stored."""
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+            self.invalidations += 1
+        for key in [key for key in self._loading if predicate(key)]:
+            del self._loading[key]
+
+    def clear(self) -> None:
+        self.invalidate_where(lambda key: True)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hitRatio": (self.hits + self.coalesced) / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict
+
+from app.services.agent_registry import AgentRegistryService
+from app.services.agent_starter_pack import AgentStarterPackService
+from app.services.agent_tester import AgentTesterService
+from app.services.vertex_ai import VertexAIService, open_http_client
+
+# Build services and fetch a first access token in the background at startup
+SERVICE_WARMUP = os.getenv("SERVICE_WARMUP", "true").lower() == "true"
+
+class ServiceContainer:
+    """
+    Holds one instance of each service, built on first use rather than at import, so
+    the app imports without Google credentials and replicas only pay for what they call.
+    Routes receive the instances through the get_* dependencies below.
+    """
+
+    def __init__(self):
+        self._instances: Dict[Callable[[], Any], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(factory)
+        if instance is None:
+            # Worker threads may ask too; build each service exactly once
+            with self._lock:
+                instance = self._instances.get(factory)
+                if instance is None:
+                    instance = self._instances[factory] = factory()
+        return instance
+
+    def override(self, factory: Callable[[], Any], instance: Any) -> None:
+        """Replaces a service, e.g. with a fake in tests."""
+        with self._lock:
+            self._instances[factory] = instance
+
+    def reset(self) -> None:
+        with self._lock:
+            self._instances.clear()
+
+services = ServiceContainer()
+
+def get_vertex_service() -> VertexAIService:
+    return services.get(VertexAIService)
+
+def get_registry_service() -> AgentRegistryService:
+    return services.get(AgentRegistryService)
+
+def get_agent_tester() -> AgentTesterService:
+    return services.get(AgentTesterService)
+
+def get_agent_starter_pack() -> AgentStarterPackService:
+    return services.get(AgentStarterPackService)
+
+async def warm_up_services() -> None:
+    """
+    Started from the app lifespan without being awaited, so the app answers health
+    checks immediately while credentials, the HTTP pool and the first token are
+    prepared for the first real request. A service that fails here is built again on use.
+    """
+    try:
+        for factory in (AgentRegistryService, AgentTesterService, AgentStarterPackService, VertexAIService):
+            # Imports and credential files are loaded off the event loop
+            await asyncio.to_thread(services.get, factory)
+        await asyncio.to_thread(open_http_client)
+        await get_vertex_service().token_provider.get_token()
+    except Exception as e:
+        print(f"Error warming up services: {str(e)}")
@@ -0,0 +1,59 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from app.services.vertex_ai import VertexAIService
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+# Projects and regions the fleet inventory scans unless a request names its own
+FLEET_PROJECTS = _split(os.getenv("FLEET_PROJECTS", ""))
+FLEET_REGIONS = _split(os.getenv("FLEET_REGIONS", "us-central1"))
+# Project/region pairs listed at the same time
+INVENTORY_CONCURRENCY = int(os.getenv("INVENTORY_CONCURRENCY", "8"))
+
+def inventory_targets(projects: List[str], regions: List[str]) -> List[Tuple[str, str]]:
+    """Every project/region pair to scan, without duplicates, in request order."""
+    return list(dict.fromkeys((project, region) for project in projects for region in regions))
+
+async def stream_inventory(
+    vertex_service: VertexAIService,
+    targets: List[Tuple[str, str]]
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Lists the reasoning engines of every target concurrently, at most
+    INVENTORY_CONCURRENCY at a time, and yields each page as soon as it arrives,
+    tagged with its project and region. A target that fails yields one error item
+    instead of failing the whole inventory. The bounded queue applies backpressure,
+    so a slow client pauses the listing rather than buffering the fleet in memory.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=INVENTORY_CONCURRENCY * 2)
+    semaphore = asyncio.Semaphore(INVENTORY_CONCURRENCY)
+    done = object()
+
+    async def crawl(project_id: str, region: str) -> None:
+        async with semaphore:
+            try:
+                async for page in vertex_service.iter_agent_pages(project_id, region):
+                    await queue.put([
+                        {"projectId": project_id, "region": region, **engine} for engine in page
+                    ])
+            except Exception as e:
+                await queue.put([{"projectId": project_id, "region": region, "error": str(e)}])
+
+    async def crawl_all() -> None:
+        await asyncio.gather(*[crawl(project_id, region) for project_id, region in targets])
+        await queue.put(done)
+
+    producer = asyncio.create_task(crawl_all())
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is done:
+                break
+            yield batch
+    finally:
+        # Stops outstanding listings when the client goes away
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
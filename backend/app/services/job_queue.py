@@ -0,0 +1,341 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal, Job, JobStatus
+
+# Concurrent jobs per process; 0 leaves this replica serving the API only
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# How often idle workers look for new jobs enqueued by other replicas
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+# A running job's lease; heartbeats renew it, and jobs whose lease lapsed are reclaimed
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Delay before the first retry; doubles with every further attempt
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "10"))
+
+class LeaseLostError(Exception):
+    """Raised in a job handler once its worker no longer holds the job's lease."""
+
+class JobProgress:
+    """
+    Passed to job handlers to record progress. Each report commits the handler's session,
+    so changes made so far become visible to other processes, and raises LeaseLostError
+    once another worker has reclaimed the job.
+    """
+
+    def __init__(self, db: AsyncSession, job: Job, worker_id: str):
+        self.db = db
+        self.job = job
+        self.worker_id = worker_id
+        self.handed_off = False
+
+    async def __call__(self, percent: int, message: Optional[str] = None) -> None:
+        await self._report(progress=percent, progress_message=message)
+
+    async def hand_off(self, result: Dict[str, Any], percent: int, message: Optional[str] = None) -> None:
+        """
+        Hands the job over to another process, such as the operation poller, which completes
+        it with finish_handed_off_jobs. The job stays RUNNING with this result but no lease,
+        so it is not reclaimed; the handler should return right after.
+        """
+        await self._report(
+            progress=percent,
+            progress_message=message,
+            result=result,
+            locked_by=None,
+            locked_until=None
+        )
+        self.handed_off = True
+
+    async def _report(self, **values) -> None:
+        # Read before a rollback expires the job; reloading it lazily fails under asyncio
+        job_id = self.job.id
+        await self.db.flush()
+        reported = await self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == self.worker_id)
+            .values(updated_at=datetime.utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        if reported.rowcount != 1:
+            await self.db.rollback()
+            raise LeaseLostError(f"Job {job_id} was reclaimed by another worker")
+        await self.db.commit()
+
+class JobHandler:
+    """
+    Runs one job type. run returns the job result; its changes commit at each progress
+    report and, for the rest, together with the job's success. on_failure runs once the
+    job has used up its attempts. Handlers should tolerate running again after a
+    partial attempt, since a retried job starts over.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[AsyncSession, Job, JobProgress], Awaitable[Optional[Dict[str, Any]]]],
+        on_failure: Optional[Callable[[AsyncSession, Job, Exception], Awaitable[None]]] = None
+    ):
+        self.run = run
+        self.on_failure = on_failure
+
+_handlers: Dict[str, JobHandler] = {}
+
+def register_handler(job_type: str, handler: JobHandler) -> None:
+    """Registers the handler workers use for a job type."""
+    _handlers[job_type] = handler
+
+def enqueue(
+    db: AsyncSession,
+    job_type: str,
+    payload: Optional[Dict[str, Any]] = None,
+    agent_id: Optional[str] = None,
+    deployment_id: Optional[str] = None,
+    max_attempts: int = JOB_MAX_ATTEMPTS
+) -> Job:
+    """
+    Adds a job to the caller's session. Workers see it once the caller commits, so the
+    job and the records it acts on are created atomically.
+    """
+    now = datetime.utcnow()
+    job = Job(
+        id=str(uuid.uuid4()),
+        job_type=job_type,
+        status=JobStatus.PENDING.value,
+        payload=payload,
+        progress=0,
+        agent_id=agent_id,
+        deployment_id=deployment_id,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=now,
+        created_at=now,
+        updated_at=now
+    )
+    db.add(job)
+    return job
+
+async def finish_handed_off_jobs(db: AsyncSession, *criteria, error: Optional[str] = None) -> None:
+    """
+    Completes the handed-off jobs matching criteria, as SUCCEEDED or, given an error, FAILED.
+    Runs in the caller's transaction, so the outcome commits together with its effects.
+    """
+    now = datetime.utcnow()
+    values = {"status": JobStatus.FAILED.value, "error": error} if error else {
+        "status": JobStatus.SUCCEEDED.value,
+        "progress": 100
+    }
+    await db.execute(
+        update(Job)
+        .where(Job.status == JobStatus.RUNNING.value, Job.locked_by.is_(None), *criteria)
+        .values(progress_message=None, finished_at=now, updated_at=now, **values)
+        .execution_options(synchronize_session=False)
+    )
+
+def _claimable(now: datetime):
+    """Pending jobs that are due, and running jobs whose worker stopped renewing the lease."""
+    return or_(
+        and_(Job.status == JobStatus.PENDING.value, Job.run_after <= now),
+        and_(Job.status == JobStatus.RUNNING.value, Job.locked_until < now)
+    )
+
+class JobWorkerPool:
+    """
+    In-process asyncio workers for the jobs table. Jobs are claimed with
+    FOR UPDATE SKIP LOCKED, so any number of replicas can share the queue, and
+    the lease lets another worker pick up jobs from a replica that died.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def start(self) -> None:
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._run_worker()))
+
+    async def stop(self) -> None:
+        """Cancels the workers; their running jobs are released for another worker."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wakes idle workers in this process, e.g. right after a job is enqueued."""
+        self._wakeup.set()
+
+    async def _run_worker(self) -> None:
+        while True:
+            try:
+                job_id = await self._claim()
+            except Exception as e:
+                print(f"Error claiming job: {str(e)}")
+                job_id = None
+
+            if job_id:
+                await self._execute(job_id)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim(self) -> Optional[str]:
+        """Claims the next due job and returns its ID, or None when there is nothing to do."""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            job_id = (await db.execute(
+                select(Job.id)
+                .where(_claimable(now))
+                .order_by(Job.run_after)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )).scalar()
+            if not job_id:
+                return None
+
+            # Re-checking the condition keeps the claim safe on databases without SKIP LOCKED
+            claimed = await db.execute(
+                update(Job)
+                .where(Job.id == job_id, _claimable(now))
+                .values(
+                    status=JobStatus.RUNNING.value,
+                    locked_by=self.worker_id,
+                    locked_until=now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    attempts=Job.attempts + 1,
+                    started_at=func.coalesce(Job.started_at, now),
+                    updated_at=now
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            return job_id if claimed.rowcount == 1 else None
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Renews the lease of a running job until cancelled."""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(Job)
+                        .where(Job.id == job_id, Job.locked_by == self.worker_id)
+                        .values(locked_until=datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS))
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+            except Exception as e:
+                # Renewals come three times per lease, so the next one can still save it
+                print(f"Error renewing lease of job {job_id}: {str(e)}")
+
+    async def _finish(self, db: AsyncSession, job_id: str, **values) -> bool:
+        """
+        Writes a job's outcome if this worker still holds its lease. Returns False when
+        another worker has reclaimed the job, whose outcome must then not be overwritten.
+        """
+        finished = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == self.worker_id)
+            .values(locked_by=None, locked_until=None, updated_at=datetime.utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        return finished.rowcount == 1
+
+    async def _execute(self, job_id: str) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            async with AsyncSessionLocal() as db:
+                job = await db.get(Job, job_id)
+                handler = _handlers.get(job.job_type)
+                try:
+                    if not handler:
+                        raise ValueError(f"No handler registered for job type {job.job_type}")
+
+                    progress = JobProgress(db, job, self.worker_id)
+                    result = await handler.run(db, job, progress)
+
+                    if not progress.handed_off:
+                        await db.flush()
+                        succeeded = await self._finish(
+                            db,
+                            job_id,
+                            status=JobStatus.SUCCEEDED.value,
+                            result=result,
+                            error=None,
+                            progress=100,
+                            finished_at=datetime.utcnow()
+                        )
+                        if not succeeded:
+                            raise LeaseLostError(f"Job {job_id} was reclaimed by another worker")
+                    await db.commit()
+
+                except asyncio.CancelledError:
+                    # Shutting down is not a failed attempt; hand the job straight back
+                    await db.rollback()
+                    await asyncio.shield(self._release(job_id))
+                    raise
+
+                except LeaseLostError as e:
+                    # The worker that reclaimed the job owns its outcome; drop this attempt's changes
+                    await db.rollback()
+                    print(f"Discarding job attempt: {str(e)}")
+
+                except Exception as e:
+                    await db.rollback()
+                    await db.refresh(job)
+
+                    if job.attempts < job.max_attempts:
+                        backoff = JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+                        outcome = {
+                            "status": JobStatus.PENDING.value,
+                            "run_after": datetime.utcnow() + timedelta(seconds=backoff)
+                        }
+                    else:
+                        outcome = {
+                            "status": JobStatus.FAILED.value,
+                            "finished_at": datetime.utcnow()
+                        }
+
+                    if await self._finish(db, job_id, error=str(e), **outcome):
+                        if outcome["status"] == JobStatus.FAILED.value and handler and handler.on_failure:
+                            await handler.on_failure(db, job, e)
+                        await db.commit()
+                    else:
+                        await db.rollback()
+                        print(f"Discarding failure of job {job_id}: it was reclaimed by another worker")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error running job {job_id}: {str(e)}")
+        finally:
+            heartbeat.cancel()
+
+    async def _release(self, job_id: str) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.locked_by == self.worker_id)
+                .values(
+                    status=JobStatus.PENDING.value,
+                    attempts=Job.attempts - 1,
+                    locked_by=None,
+                    locked_until=None,
+                    run_after=datetime.utcnow()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+job_workers = JobWorkerPool()
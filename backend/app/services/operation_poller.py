@@ -0,0 +1,272 @@
+import asyncio
+import os
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+
+from app.database import AsyncSessionLocal, Agent, AgentStatus, Deployment, DeploymentStatus, Job, JobType
+from app.services.container import get_registry_service, get_vertex_service
+from app.services.job_queue import finish_handed_off_jobs
+from app.services.vertex_ai import invalidate_cached_resource
+
+# Delay before an operation is first polled, and the cap its interval grows to
+OPERATION_POLL_INITIAL_SECONDS = float(os.getenv("OPERATION_POLL_INITIAL_SECONDS", "5"))
+OPERATION_POLL_MAX_SECONDS = float(os.getenv("OPERATION_POLL_MAX_SECONDS", "60"))
+OPERATION_POLL_BACKOFF_FACTOR = float(os.getenv("OPERATION_POLL_BACKOFF_FACTOR", "1.5"))
+# Operations polled at the same time across all outstanding deployments
+OPERATION_POLL_CONCURRENCY = int(os.getenv("OPERATION_POLL_CONCURRENCY", "8"))
+# How often the outstanding set is reloaded to pick up operations started elsewhere
+OPERATION_POLL_REFRESH_SECONDS = float(os.getenv("OPERATION_POLL_REFRESH_SECONDS", "10"))
+# How long a replica owns the operations it polls; each refresh renews it
+OPERATION_POLL_LEASE_SECONDS = float(os.getenv("OPERATION_POLL_LEASE_SECONDS", "60"))
+
+def pending_operation_name(response: Dict[str, Any]) -> Optional[str]:
+    """Returns the name of a long-running operation that is not done yet, if the response is one."""
+    name = response.get("name") or ""
+    if "/operations/" in name and not response.get("done"):
+        return name
+    return None
+
+@dataclass
+class _TrackedOperation:
+    deployment_id: str
+    region: str
+    interval: float
+    next_poll: float
+
+class OperationPoller:
+    """
+    Tracks the long-running Vertex AI operations of IN_PROGRESS deployments in one loop.
+    Each cycle polls only the operations that are due, with bounded concurrency, and
+    writes every completed operation in a single transaction. An operation's polling
+    interval grows while it is still running, so slow rollouts cost few requests.
+    The outstanding set lives in the deployments table, so restarts lose nothing, and
+    replicas lease operations from it with SKIP LOCKED so each is polled by one replica.
+    """
+
+    def __init__(self):
+        self.poller_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._operations: Dict[str, _TrackedOperation] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancels the loop and releases this replica's operations to the other replicas."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(Deployment)
+                        .where(Deployment.operation_polled_by == self.poller_id)
+                        .values(
+                            operation_polled_by=None,
+                            operation_lease_until=None,
+                            updated_at=Deployment.updated_at
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+            except Exception as e:
+                print(f"Error releasing polled operations: {str(e)}")
+
+    def notify(self) -> None:
+        """Reloads the outstanding set now, e.g. once a new operation has been committed."""
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_refresh = 0.0
+        failures = 0
+        while True:
+            try:
+                if self._wakeup.is_set() or loop.time() >= next_refresh:
+                    self._wakeup.clear()
+                    await self._refresh(loop.time())
+                    next_refresh = loop.time() + OPERATION_POLL_REFRESH_SECONDS
+
+                await self._poll_due(loop.time())
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print(f"Error polling operations: {str(e)}")
+
+            next_poll = min((op.next_poll for op in self._operations.values()), default=next_refresh)
+            timeout = max(min(next_poll, next_refresh) - loop.time(), 0)
+            if failures:
+                # Operations that were due are still due; wait before retrying them
+                timeout = max(timeout, min(
+                    OPERATION_POLL_INITIAL_SECONDS * 2 ** (failures - 1), OPERATION_POLL_MAX_SECONDS
+                ))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(self, now: float) -> None:
+        """
+        Leases the operations of IN_PROGRESS deployments that no other replica holds, renews
+        the leases this replica holds, and syncs the tracked operations with them.
+        """
+        utcnow = datetime.utcnow()
+        claimable = and_(
+            Deployment.status == DeploymentStatus.IN_PROGRESS.value,
+            Deployment.operation_name.isnot(None),
+            or_(
+                Deployment.operation_polled_by == self.poller_id,
+                Deployment.operation_lease_until.is_(None),
+                Deployment.operation_lease_until < utcnow
+            )
+        )
+        async with AsyncSessionLocal() as db:
+            deployment_ids = (await db.execute(
+                select(Deployment.id).where(claimable).with_for_update(skip_locked=True)
+            )).scalars().all()
+            if deployment_ids:
+                # Re-checking the condition keeps the lease safe on databases without SKIP LOCKED;
+                # keeping updated_at leaves leases out of incremental exports
+                await db.execute(
+                    update(Deployment)
+                    .where(Deployment.id.in_(deployment_ids), claimable)
+                    .values(
+                        operation_polled_by=self.poller_id,
+                        operation_lease_until=utcnow + timedelta(seconds=OPERATION_POLL_LEASE_SECONDS),
+                        updated_at=Deployment.updated_at
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            rows = (await db.execute(
+                select(Deployment.id, Deployment.region, Deployment.operation_name)
+                .where(
+                    Deployment.status == DeploymentStatus.IN_PROGRESS.value,
+                    Deployment.operation_name.isnot(None),
+                    Deployment.operation_polled_by == self.poller_id
+                )
+            )).all()
+            await db.commit()
+
+        outstanding = {row.operation_name: row for row in rows}
+        for name in list(self._operations):
+            if name not in outstanding:
+                del self._operations[name]
+        for name, row in outstanding.items():
+            if name not in self._operations:
+                self._operations[name] = _TrackedOperation(
+                    deployment_id=row.id,
+                    region=row.region,
+                    interval=OPERATION_POLL_INITIAL_SECONDS,
+                    next_poll=now + OPERATION_POLL_INITIAL_SECONDS
+                )
+
+    async def _poll_due(self, now: float) -> None:
+        due = [name for name, op in self._operations.items() if op.next_poll <= now]
+        if not due:
+            return
+
+        semaphore = asyncio.Semaphore(OPERATION_POLL_CONCURRENCY)
+
+        async def poll(name: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await get_vertex_service().get_operation(self._operations[name].region, name)
+                except Exception:
+                    # Transient API errors back off like a running operation
+                    return None
+
+        results = await asyncio.gather(*[poll(name) for name in due])
+
+        completed = []
+        for name, operation in zip(due, results):
+            if operation and operation.get("done"):
+                completed.append((name, operation))
+                continue
+            op = self._operations[name]
+            op.interval = min(op.interval * OPERATION_POLL_BACKOFF_FACTOR, OPERATION_POLL_MAX_SECONDS)
+            op.next_poll = now + op.interval
+
+        if completed:
+            await self._complete(completed)
+            for name, _ in completed:
+                self._operations.pop(name, None)
+                # The operation changed its reasoning engine; drop cached reads of it
+                invalidate_cached_resource(name.split("/operations/")[0])
+
+    async def _complete(self, completed: List[tuple]) -> None:
+        """
+        Records the outcome of finished operations on their deployments, and completes the
+        deploy jobs waiting on them, in one transaction.
+        """
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            deployed_ids = []
+            for name, operation in completed:
+                deployment_id = self._operations[name].deployment_id
+                error = operation.get("error")
+                await finish_handed_off_jobs(
+                    db,
+                    Job.job_type == JobType.DEPLOY_AGENT.value,
+                    Job.deployment_id == deployment_id,
+                    error=error.get("message", str(error)) if error else None
+                )
+                # Only the deployment still waiting on this operation is moved on
+                pending = (
+                    update(Deployment)
+                    .where(
+                        Deployment.id == deployment_id,
+                        Deployment.operation_name == name,
+                        Deployment.status == DeploymentStatus.IN_PROGRESS.value
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+
+                if error:
+                    result = await db.execute(pending.values(
+                        status=DeploymentStatus.FAILED.value,
+                        operation_polled_by=None,
+                        operation_lease_until=None,
+                        updated_at=now
+                    ))
+                    if result.rowcount:
+                        deployment = await db.get(Deployment, deployment_id)
+                        deployment.configuration = {
+                            **(deployment.configuration or {}),
+                            "error": error.get("message", str(error))
+                        }
+                    continue
+
+                values = {
+                    "status": DeploymentStatus.SUCCESSFUL.value,
+                    "operation_polled_by": None,
+                    "operation_lease_until": None,
+                    "updated_at": now
+                }
+                resource_name = (operation.get("response") or {}).get("name")
+                if resource_name:
+                    values["resource_name"] = resource_name
+                result = await db.execute(pending.values(**values))
+                if result.rowcount:
+                    deployed_ids.append(deployment_id)
+
+            if deployed_ids:
+                agent_ids = (await db.execute(
+                    select(Deployment.agent_id).where(Deployment.id.in_(deployed_ids))
+                )).scalars().all()
+                await db.execute(
+                    update(Agent)
+                    .where(Agent.id.in_(agent_ids))
+                    .values(status=AgentStatus.DEPLOYED.value, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                await get_registry_service().refresh_current_deployments(db, agent_ids)
+
+            await db.commit()
+
+operation_poller = OperationPoller()
@@ -0,0 +1,376 @@
+import asyncio
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import (
+    AsyncSessionLocal, Agent, Deployment, DeploymentStatus, Job, JobStatus, JobType, ReconciliationWatermark
+)
+from app.services.container import get_registry_service, get_vertex_service
+from app.services.inventory import FLEET_PROJECTS, FLEET_REGIONS, INVENTORY_CONCURRENCY, inventory_targets
+from app.services.job_queue import JobHandler, JobProgress, enqueue, job_workers, register_handler
+
+# How often a reconciliation pass is queued; 0 turns the schedule off
+RECONCILE_INTERVAL_SECONDS = float(os.getenv("RECONCILE_INTERVAL_SECONDS", "900"))
+# Deleted engines only show up in a full listing, so each target gets one at least this often
+RECONCILE_FULL_SWEEP_SECONDS = float(os.getenv("RECONCILE_FULL_SWEEP_SECONDS", "3600"))
+
+# Resource names per IN (...) list, to stay under the bind parameter limit
+RECONCILE_BATCH_SIZE = 500
+# Unmatched engines named in a pass report; the rest are only counted
+RECONCILE_REPORT_SAMPLE = 20
+
+_RFC3339 = re.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d+))?(Z|[+-]\d{2}:\d{2})?$")
+_ENGINE_NAME = re.compile(r"^projects/[^/]+/(locations/[^/]+/reasoningEngines/[^/]+)$")
+
+def parse_update_time(value: Optional[str]) -> Optional[datetime]:
+    """Parses a Vertex AI RFC 3339 timestamp into naive UTC; digits past microseconds are dropped."""
+    match = _RFC3339.match(value or "")
+    if not match:
+        return None
+    seconds, fraction, offset = match.groups()
+    offset = "+00:00" if offset in (None, "Z") else offset
+    parsed = datetime.fromisoformat(f"{seconds}.{(fraction or '0')[:6].ljust(6, '0')}{offset}")
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+def engine_suffix(name: str) -> str:
+    """
+    Returns a reasoning engine name without its project. Vertex AI lists engines under the
+    project number while deployments may record the project ID, so names are compared on this.
+    """
+    match = _ENGINE_NAME.match(name or "")
+    return match.group(1) if match else name
+
+def _match_agent(agents: List[Any], environments: Set[str]) -> Optional[Any]:
+    """
+    Picks the agent an out-of-band engine belongs to among the agents with its display name:
+    the newest in the environment the project's deployments belong to. A name that still spans
+    several environments, e.g. in a project without deployments yet, is left unmatched.
+    """
+    if environments:
+        agents = [agent for agent in agents if agent.environment in environments]
+    if len({agent.environment for agent in agents}) != 1:
+        return None
+    return agents[-1]
+
+def _update_time_filter(watermark: datetime) -> str:
+    # Inclusive, so engines sharing the watermark's timestamp are not missed; reapplying them is a no-op
+    return f'update_time>="{watermark.strftime("%Y-%m-%dT%H:%M:%S.%fZ")}"'
+
+def _chunks(items: List[Any]) -> List[List[Any]]:
+    return [items[i:i + RECONCILE_BATCH_SIZE] for i in range(0, len(items), RECONCILE_BATCH_SIZE)]
+
+def _needs_full_sweep(watermark: Optional[ReconciliationWatermark], now: datetime) -> bool:
+    return (
+        watermark is None
+        or watermark.update_time is None
+        or watermark.full_sweep_at is None
+        or now - watermark.full_sweep_at >= timedelta(seconds=RECONCILE_FULL_SWEEP_SECONDS)
+    )
+
+async def _list_engines(
+    project_id: str,
+    region: str,
+    watermark: Optional[ReconciliationWatermark],
+    full_sweep: bool
+) -> List[Dict[str, Any]]:
+    """Lists every engine on a full sweep, otherwise only those updated since the watermark."""
+    list_filter = None if full_sweep else _update_time_filter(watermark.update_time)
+    engines = []
+    async for page in get_vertex_service().iter_agent_pages(project_id, region, list_filter):
+        engines.extend(engine for engine in page if engine.get("name"))
+
+    if full_sweep:
+        return engines
+    # Also applied here in case the API ignores the filter
+    changed = []
+    for engine in engines:
+        update_time = parse_update_time(engine.get("updateTime"))
+        if update_time is None or update_time >= watermark.update_time:
+            changed.append(engine)
+    return changed
+
+async def _apply_target(
+    db: AsyncSession,
+    project_id: str,
+    region: str,
+    engines: List[Dict[str, Any]],
+    full_sweep: bool,
+    listed_at: datetime,
+    report: Dict[str, Any]
+) -> None:
+    """
+    Diffs the listed engines of one target against deployments by resource name and applies
+    the drift set-wise: engines unknown to the table are recorded as deployments of the agent
+    with the same name in the project's environment, DELETED deployments whose engine is back
+    are restored, and on a full sweep SUCCESSFUL deployments whose engine is gone are marked
+    DELETED. Names are compared without their project, see engine_suffix.
+    """
+    now = datetime.utcnow()
+    live = {engine_suffix(engine["name"]): engine for engine in engines}
+    # Deployments may name an engine as listed, by project number, or by the target's project ID
+    names = list({
+        name
+        for suffix, engine in live.items()
+        for name in (engine["name"], f"projects/{project_id}/{suffix}")
+    })
+    affected_agent_ids: Set[str] = set()
+
+    known: Set[str] = set()
+    for chunk in _chunks(names):
+        known.update(engine_suffix(name) for name in (await db.execute(
+            select(Deployment.resource_name).where(Deployment.resource_name.in_(chunk)).distinct()
+        )).scalars())
+
+    # Engines created out-of-band are attributed by display name within the project's environment
+    unknown = [engine for suffix, engine in live.items() if suffix not in known]
+    environments: Set[str] = set()
+    if unknown:
+        environments.update((await db.execute(
+            select(Deployment.environment).where(Deployment.project_id == project_id).distinct()
+        )).scalars())
+    display_names = list({engine.get("displayName") for engine in unknown if engine.get("displayName")})
+    agents_by_name: Dict[str, List[Any]] = {}
+    for chunk in _chunks(display_names):
+        for agent in (await db.execute(
+            select(Agent.id, Agent.name, Agent.environment)
+            .where(Agent.name.in_(chunk))
+            .order_by(Agent.created_at)
+        )).all():
+            agents_by_name.setdefault(agent.name, []).append(agent)
+
+    rows = []
+    for engine in unknown:
+        agent = _match_agent(agents_by_name.get(engine.get("displayName"), []), environments)
+        if not agent:
+            report["unmatched"] += 1
+            if len(report["unmatchedEngines"]) < RECONCILE_REPORT_SAMPLE:
+                report["unmatchedEngines"].append({
+                    "resourceName": engine["name"],
+                    "displayName": engine.get("displayName")
+                })
+            continue
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "agent_id": agent.id,
+            "deployment_type": "AGENT_ENGINE",
+            "version": "unknown",
+            "environment": agent.environment,
+            "project_id": project_id,
+            "region": region,
+            "resource_name": engine["name"],
+            "status": DeploymentStatus.SUCCESSFUL.value,
+            "deployed_at": parse_update_time(engine.get("createTime")) or now,
+            "updated_at": now,
+            "deployed_by": "reconciliation",
+            "configuration": {
+                "source": "reconciliation",
+                "displayName": engine.get("displayName"),
+                "updateTime": engine.get("updateTime")
+            }
+        })
+        affected_agent_ids.add(agent.id)
+
+    for chunk in _chunks(rows):
+        await db.execute(insert(Deployment.__table__).values(chunk))
+    report["inserted"] += len(rows)
+
+    for chunk in _chunks(names):
+        restored = (await db.execute(
+            update(Deployment)
+            .where(Deployment.resource_name.in_(chunk), Deployment.status == DeploymentStatus.DELETED.value)
+            .values(status=DeploymentStatus.SUCCESSFUL.value, updated_at=now)
+            .returning(Deployment.agent_id)
+            .execution_options(synchronize_session=False)
+        )).scalars().all()
+        report["restored"] += len(restored)
+        affected_agent_ids.update(restored)
+
+    if full_sweep:
+        # Deployments written after the listing started may point at engines it could not see yet
+        tracked = (await db.execute(
+            select(Deployment.id, Deployment.agent_id, Deployment.resource_name)
+            .where(
+                Deployment.project_id == project_id,
+                Deployment.region == region,
+                Deployment.status == DeploymentStatus.SUCCESSFUL.value,
+                Deployment.resource_name.like("%/reasoningEngines/%"),
+                Deployment.updated_at < listed_at
+            )
+        )).all()
+        missing = [row for row in tracked if engine_suffix(row.resource_name) not in live]
+        for chunk in _chunks([row.id for row in missing]):
+            await db.execute(
+                update(Deployment)
+                .where(Deployment.id.in_(chunk), Deployment.status == DeploymentStatus.SUCCESSFUL.value)
+                .values(status=DeploymentStatus.DELETED.value, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        report["markedDeleted"] += len(missing)
+        affected_agent_ids.update(row.agent_id for row in missing)
+
+    await get_registry_service().refresh_current_deployments(db, affected_agent_ids)
+
+    # Only move the watermark past what has been applied
+    watermark = await db.get(ReconciliationWatermark, (project_id, region))
+    if watermark is None:
+        watermark = ReconciliationWatermark(project_id=project_id, region=region)
+        db.add(watermark)
+    update_times = [parse_update_time(engine.get("updateTime")) for engine in engines]
+    newest = max((update_time for update_time in update_times if update_time), default=None)
+    if newest and (watermark.update_time is None or newest > watermark.update_time):
+        watermark.update_time = newest
+    elif watermark.update_time is None:
+        # Nothing listed yet; later passes only need engines changed from now on
+        watermark.update_time = listed_at
+    if full_sweep:
+        watermark.full_sweep_at = listed_at
+    watermark.updated_at = now
+
+async def _run_reconcile_job(db: AsyncSession, job: Job, progress: JobProgress) -> Dict:
+    """
+    Reconciles the deployments table with the reasoning engines of every fleet target for a
+    RECONCILE_FLEET job. Targets are listed concurrently and applied one at a time as their
+    listing finishes; each target commits with its watermark, so a failed pass resumes where
+    it stopped. The returned drift report becomes the job result.
+    """
+    start = time.perf_counter()
+    payload = job.payload or {}
+    targets = inventory_targets(payload.get("projects") or FLEET_PROJECTS, payload.get("regions") or FLEET_REGIONS)
+    if not targets:
+        raise ValueError("No projects to reconcile; set FLEET_PROJECTS")
+
+    watermarks = {
+        (row.project_id, row.region): row
+        for row in (await db.execute(select(ReconciliationWatermark))).scalars()
+    }
+    report: Dict[str, Any] = {
+        "targets": len(targets),
+        "fullSweeps": 0,
+        "enginesListed": 0,
+        "inserted": 0,
+        "restored": 0,
+        "markedDeleted": 0,
+        "unmatched": 0,
+        "unmatchedEngines": [],
+        "failedTargets": []
+    }
+
+    semaphore = asyncio.Semaphore(INVENTORY_CONCURRENCY)
+
+    async def list_target(target: Tuple[str, str]):
+        project_id, region = target
+        watermark = watermarks.get(target)
+        full_sweep = _needs_full_sweep(watermark, datetime.utcnow())
+        async with semaphore:
+            listed_at = datetime.utcnow()
+            try:
+                engines = await _list_engines(project_id, region, watermark, full_sweep)
+                return target, full_sweep, listed_at, engines, None
+            except Exception as e:
+                return target, full_sweep, listed_at, None, e
+
+    tasks = [asyncio.ensure_future(list_target(target)) for target in targets]
+    try:
+        for finished, listing in enumerate(asyncio.as_completed(tasks), start=1):
+            (project_id, region), full_sweep, listed_at, engines, error = await listing
+            if error is not None:
+                report["failedTargets"].append({"projectId": project_id, "region": region, "error": str(error)})
+            else:
+                await _apply_target(db, project_id, region, engines, full_sweep, listed_at, report)
+                report["enginesListed"] += len(engines)
+                report["fullSweeps"] += int(full_sweep)
+            await progress(int(finished * 99 / len(targets)), f"Reconciled {finished} of {len(targets)} targets")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if len(report["failedTargets"]) == len(targets):
+        raise RuntimeError(f"Could not list any target: {report['failedTargets'][0]['error']}")
+
+    report["drift"] = report["inserted"] + report["restored"] + report["markedDeleted"] + report["unmatched"]
+    report["durationMs"] = round((time.perf_counter() - start) * 1000, 1)
+    return report
+
+register_handler(JobType.RECONCILE_FLEET.value, JobHandler(_run_reconcile_job))
+
+# A reconciliation job in one of these states blocks queueing another
+ACTIVE_RECONCILE_STATUSES = (JobStatus.PENDING.value, JobStatus.RUNNING.value)
+
+async def queue_reconciliation(db: AsyncSession, min_interval_seconds: float = 0) -> Tuple[Job, bool]:
+    """
+    Queues a reconciliation pass over the fleet and returns (job, queued). A pass that is
+    already pending or running, or one created within min_interval_seconds, is returned
+    instead of queueing another, so replicas sharing a schedule do not pile up passes.
+    """
+    recent = (await db.execute(
+        select(Job)
+        .where(Job.job_type == JobType.RECONCILE_FLEET.value)
+        .order_by(Job.created_at.desc())
+        .limit(1)
+    )).scalar()
+    if recent and (
+        recent.status in ACTIVE_RECONCILE_STATUSES
+        or recent.created_at > datetime.utcnow() - timedelta(seconds=min_interval_seconds)
+    ):
+        return recent, False
+
+    job = enqueue(
+        db,
+        JobType.RECONCILE_FLEET.value,
+        payload={"projects": FLEET_PROJECTS, "regions": FLEET_REGIONS}
+    )
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another replica queued a pass since the check; uq_jobs_active_reconcile_fleet allows one
+        await db.rollback()
+        active = (await db.execute(
+            select(Job)
+            .where(
+                Job.job_type == JobType.RECONCILE_FLEET.value,
+                Job.status.in_(ACTIVE_RECONCILE_STATUSES)
+            )
+            .order_by(Job.created_at.desc())
+            .limit(1)
+        )).scalar()
+        if active is None:
+            raise
+        return active, False
+    job_workers.notify()
+    return job, True
+
+class ReconciliationScheduler:
+    """Queues a reconciliation pass every RECONCILE_INTERVAL_SECONDS while FLEET_PROJECTS is set."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if RECONCILE_INTERVAL_SECONDS > 0 and FLEET_PROJECTS:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    # Slightly under the interval, so this replica's own last pass does not delay the next
+                    await queue_reconciliation(db, min_interval_seconds=RECONCILE_INTERVAL_SECONDS * 0.9)
+            except Exception as e:
+                print(f"Error scheduling reconciliation: {str(e)}")
+            await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+
+reconciliation_scheduler = ReconciliationScheduler()
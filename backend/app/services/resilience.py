@@ -0,0 +1,198 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, Dict, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+# Attempts per call, including the first; delays grow as base * 2^n with full jitter up to max
+RETRY_MAX_ATTEMPTS = int(os.getenv("VERTEX_RETRY_MAX_ATTEMPTS", "4"))
+RETRY_BASE_SECONDS = float(os.getenv("VERTEX_RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_SECONDS = float(os.getenv("VERTEX_RETRY_MAX_SECONDS", "20"))
+# Opt-in: a read that is slower than this percentile of recent calls gets a second, hedged request
+HEDGE_ENABLED = os.getenv("VERTEX_HEDGE_ENABLED", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("VERTEX_HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("VERTEX_HEDGE_MIN_SAMPLES", "20"))
+# Consecutive failures that open a region's circuit, and how long it stays open
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("VERTEX_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("VERTEX_BREAKER_RESET_SECONDS", "30"))
+
+# Worth retrying when the call is idempotent
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# The server rejected the request without acting on it, so even non-idempotent calls retry
+REJECTED_STATUS = {429, 503}
+# Signs that the region itself is unhealthy; quota errors (429) are not
+BREAKER_STATUS = {500, 502, 503, 504}
+
+LATENCY_WINDOW = 200
+
+class CircuitOpenError(Exception):
+    """Raised without calling the API while a region's circuit is open."""
+
+class CircuitBreaker:
+    """
+    Opens after consecutive failures and fails calls fast until the reset timeout has
+    passed; then one trial call is let through, and its outcome closes or reopens it.
+    A trial that never reports back (e.g. a cancelled call) is replaced after another timeout.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_seconds:
+            return False
+        if self._trial_started is not None and now - self._trial_started < self.reset_seconds:
+            return False
+        self._trial_started = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_started is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_started = None
+
+class LatencyTracker:
+    """Recent latencies of one kind of call, for picking the hedging delay."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+def retry_after_seconds(response: "httpx.Response") -> Optional[float]:
+    """Parses a Retry-After header given either in seconds or as an HTTP date."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def backoff_seconds(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given 1-based attempt."""
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+
+class ResilientSender:
+    """
+    Sends HTTP requests with retries, optional hedging and a circuit breaker per
+    breaker key (a Vertex AI region, or the Cloud Monitoring API).
+    """
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+
+    async def send(
+        self,
+        request: Callable[[], Awaitable["httpx.Response"]],
+        breaker_key: str,
+        operation: str,
+        idempotent: bool,
+        hedge: bool = False
+    ) -> "httpx.Response":
+        """
+        Runs request until it succeeds or retries are exhausted, then raises for an error
+        status like httpx's raise_for_status. Non-idempotent requests are only retried
+        when the server certainly did not act on them.
+        """
+        import httpx
+
+        breaker = self.breakers.setdefault(breaker_key, CircuitBreaker())
+        latency = self.latencies.setdefault(operation, LatencyTracker())
+
+        for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Vertex AI calls to {breaker_key} are failing; circuit is open")
+
+            last_attempt = attempt == RETRY_MAX_ATTEMPTS
+            try:
+                if hedge and HEDGE_ENABLED:
+                    response = await self._hedged(request, latency)
+                else:
+                    response = await self._timed(request, latency)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                # A failed connect never reached the server
+                if last_attempt or not (idempotent or isinstance(e, httpx.ConnectError)):
+                    raise
+                await asyncio.sleep(backoff_seconds(attempt))
+                continue
+
+            if response.status_code in BREAKER_STATUS:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            retryable = RETRYABLE_STATUS if idempotent else REJECTED_STATUS
+            if response.status_code not in retryable or last_attempt:
+                response.raise_for_status()
+                return response
+
+            delay = backoff_seconds(attempt)
+            retry_after = retry_after_seconds(response)
+            if retry_after is not None:
+                if retry_after > RETRY_MAX_SECONDS:
+                    # Not worth holding the caller for; report the server's answer
+                    response.raise_for_status()
+                delay = max(delay, retry_after)
+            await asyncio.sleep(delay)
+
+    async def _timed(self, request, latency: LatencyTracker) -> "httpx.Response":
+        start = time.monotonic()
+        response = await request()
+        if response.status_code < 400:
+            latency.record(time.monotonic() - start)
+        return response
+
+    async def _hedged(self, request, latency: LatencyTracker) -> "httpx.Response":
+        """Sends a second request if the first is slower than usual; the first answer wins."""
+        delay = latency.percentile(HEDGE_PERCENTILE)
+        tasks = {asyncio.ensure_future(self._timed(request, latency))}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    tasks.add(asyncio.ensure_future(self._timed(request, latency)))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also stops both requests if the caller is cancelled
+            for task in tasks:
+                task.cancel()
@@ -1,15 +1,126 @@
+import asyncio
 import json
 import os
-from typing import Dict, List, Any, Optional
-import httpx
-import google.auth
-from google.oauth2 import service_account
-from google.auth.transport.requests import Request
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Any, Optional
+
+from app.services.cache import AsyncTTLCache
+from app.services.resilience import ResilientSender
+
+# httpx and google-auth are imported on first use so importing the app stays fast
+if TYPE_CHECKING:
+    import httpx
+
+# Shared HTTP client settings; the timeout bounds reads, writes and pool waits
+VERTEX_HTTP_TIMEOUT_SECONDS = float(os.getenv("VERTEX_HTTP_TIMEOUT_SECONDS", "60"))
+VERTEX_HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("VERTEX_HTTP_CONNECT_TIMEOUT_SECONDS", "10"))
+VERTEX_HTTP_MAX_CONNECTIONS = int(os.getenv("VERTEX_HTTP_MAX_CONNECTIONS", "100"))
+VERTEX_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("VERTEX_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+VERTEX_HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("VERTEX_HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+VERTEX_HTTP2 = os.getenv("VERTEX_HTTP2", "true").lower() == "true"
+# Access tokens are refreshed in the background once they are this close to expiry
+VERTEX_TOKEN_REFRESH_MARGIN_SECONDS = float(os.getenv("VERTEX_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+
+# Cloud Monitoring is global, so its calls share one circuit breaker
+MONITORING_BREAKER_KEY = "monitoring"
+# Reasoning engine reads are cached per (project, region, resource); 0 disables the cache
+VERTEX_CACHE_TTL_SECONDS = float(os.getenv("VERTEX_CACHE_TTL_SECONDS", "60"))
+VERTEX_CACHE_MAX_ENTRIES = int(os.getenv("VERTEX_CACHE_MAX_ENTRIES", "1000"))
+# Reasoning engines requested per list page
+VERTEX_LIST_PAGE_SIZE = int(os.getenv("VERTEX_LIST_PAGE_SIZE", "100"))
+
+_http_client: Optional["httpx.AsyncClient"] = None
+
+vertex_cache = AsyncTTLCache(VERTEX_CACHE_TTL_SECONDS, VERTEX_CACHE_MAX_ENTRIES)
+
+def invalidate_cached_resource(resource_name: str) -> None:
+    """Drops cached reads of a resource and of the collections that list it."""
+    vertex_cache.invalidate_where(
+        lambda key: key[2] == resource_name or resource_name.startswith(f"{key[2]}/")
+    )
+
+def open_http_client() -> "httpx.AsyncClient":
+    """
+    Creates the pooled client every VertexAIService shares. Connections are kept alive
+    between calls, and with HTTP/2 concurrent requests to one regional endpoint are
+    multiplexed over a single connection.
+    """
+    import httpx
+
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=VERTEX_HTTP2,
+            timeout=httpx.Timeout(VERTEX_HTTP_TIMEOUT_SECONDS, connect=VERTEX_HTTP_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=VERTEX_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=VERTEX_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=VERTEX_HTTP_KEEPALIVE_EXPIRY_SECONDS
+            )
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def get_http_client() -> "httpx.AsyncClient":
+    """Returns the shared client, opening it on first use outside the app lifespan."""
+    return open_http_client()
+
+class TokenProvider:
+    """
+    Hands out access tokens without blocking the event loop. The OAuth round trip of a
+    refresh runs in a worker thread, and at most one refresh is in flight: concurrent
+    callers await the same one. Tokens close to expiry are still served while a
+    background refresh replaces them, so callers only wait when no usable token exists.
+    """
+
+    def __init__(self, credentials):
+        from google.auth.transport.requests import Request
+
+        self.credentials = credentials
+        self.request = Request()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _expires_within(self, seconds: float) -> bool:
+        # google-auth keeps expiry as a naive UTC datetime
+        expiry = self.credentials.expiry
+        return expiry is not None and expiry - timedelta(seconds=seconds) <= datetime.utcnow()
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(
+                asyncio.to_thread(self.credentials.refresh, self.request)
+            )
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+        return self._refresh_task
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            print(f"Error refreshing access token: {str(task.exception())}")
+
+    async def get_token(self) -> str:
+        """Returns a valid access token, refreshing it first only when there is none."""
+        # credentials.valid already turns false minutes before expiry; only an expired token waits
+        if not self.credentials.token or self._expires_within(0):
+            # Shielded so a cancelled caller does not cancel the refresh others wait on
+            await asyncio.shield(self._start_refresh())
+        elif self._expires_within(VERTEX_TOKEN_REFRESH_MARGIN_SECONDS):
+            self._start_refresh()
+
+        return self.credentials.token
 
 class VertexAIService:
     """Service for interacting with Vertex AI API."""
     
     def __init__(self):
+        import google.auth
+        from google.oauth2 import service_account
+
         # Load credentials either from service account key file or application default credentials
         credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
         if credentials_path and os.path.exists(credentials_path):
@@ -23,95 +134,165 @@ class VertexAIService:
                 scopes=["https://www.googleapis.com/auth/cloud-platform"]
             )
         
-        # Initialize token request adapter
-        self.request = Request()
+        # Refreshes tokens off the event loop
+        self.token_provider = TokenProvider(self.credentials)
+        # Retries, hedging and a circuit breaker per region
+        self.sender = ResilientSender()
     
     async def _get_auth_header(self) -> Dict[str, str]:
         """Gets authorization header with valid token."""
-        # Refresh token if expired
-        if not self.credentials.valid:
-            self.credentials.refresh(self.request)
+        token = await self.token_provider.get_token()
             
         return {
-            "Authorization": f"Bearer {self.credentials.token}",
+            "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
     
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        breaker_key: str,
+        operation: str,
+        idempotent: bool,
+        hedge: bool = False,
+        **kwargs
+    ) -> "httpx.Response":
+        """
+        Sends a request on the shared client; raises for error statuses once retries are exhausted.
+        The auth header is fetched for every attempt, so a retry never sends an expired token.
+        """
+        client = get_http_client()
+
+        async def request() -> "httpx.Response":
+            return await client.request(method, url, headers=await self._get_auth_header(), **kwargs)
+
+        return await self.sender.send(
+            request,
+            breaker_key,
+            operation,
+            idempotent=idempotent,
+            hedge=hedge
+        )
+    
     async def list_agents(self, project_id: str, region: str) -> List[Dict[str, Any]]:
-        """Lists all agents in a project using Vertex AI API."""
+        """Lists all agents in a project using Vertex AI API; cached for VERTEX_CACHE_TTL_SECONDS."""
         try:
-            # Get auth header
-            headers = await self._get_auth_header()
-            
-            # Make API request
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://{region}-aiplatform.googleapis.com/v1/projects/{project_id}/locations/{region}/reasoningEngines",
-                    headers=headers
-                )
-                
-                # Raise exception for error responses
-                response.raise_for_status()
-                
-                # Parse response
-                data = response.json()
-                return data.get("reasoningEngines", [])
+            collection = f"projects/{project_id}/locations/{region}/reasoningEngines"
+            return await vertex_cache.get_or_load(
+                (project_id, region, collection),
+                lambda: self._fetch_agents(region, collection)
+            )
                 
         except Exception as e:
             print(f"Error listing agents: {str(e)}")
             raise
     
+    async def _fetch_agents(self, region: str, collection: str) -> List[Dict[str, Any]]:
+        agents = []
+        async for page in self._iter_agent_pages(region, collection):
+            agents.extend(page)
+        return agents
+    
+    async def iter_agent_pages(
+        self,
+        project_id: str,
+        region: str,
+        list_filter: Optional[str] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yields every page of agents in a project and region, following nextPageToken.
+        list_filter is passed through as the API's filter expression.
+        """
+        collection = f"projects/{project_id}/locations/{region}/reasoningEngines"
+        async for page in self._iter_agent_pages(region, collection, list_filter):
+            yield page
+    
+    async def _iter_agent_pages(
+        self,
+        region: str,
+        collection: str,
+        list_filter: Optional[str] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        page_token = None
+        while True:
+            params = {"pageSize": VERTEX_LIST_PAGE_SIZE}
+            if list_filter:
+                params["filter"] = list_filter
+            if page_token:
+                params["pageToken"] = page_token
+            
+            # Make API request
+            response = await self._send(
+                "GET",
+                f"https://{region}-aiplatform.googleapis.com/v1/{collection}",
+                region,
+                "list_agents",
+                idempotent=True,
+                hedge=True,
+                params=params
+            )
+            
+            # Parse response
+            data = response.json()
+            yield data.get("reasoningEngines", [])
+            
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                break
+    
     async def get_agent(self, project_id: str, region: str, agent_id: str) -> Dict[str, Any]:
-        """Gets a specific agent using Vertex AI API."""
+        """Gets a specific agent using Vertex AI API; cached for VERTEX_CACHE_TTL_SECONDS."""
         try:
             # Format the resource name if not already formatted
             agent_name = agent_id
             if not agent_name.startswith("projects/"):
                 agent_name = f"projects/{project_id}/locations/{region}/reasoningEngines/{agent_id}"
                 
-            # Get auth header
-            headers = await self._get_auth_header()
+            return await vertex_cache.get_or_load(
+                (project_id, region, agent_name),
+                lambda: self._fetch_agent(region, agent_name)
+            )
             
-            # Make API request
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://{region}-aiplatform.googleapis.com/v1/{agent_name}",
-                    headers=headers
-                )
-                
-                # Raise exception for error responses
-                response.raise_for_status()
-                
-                # Parse response
-                return response.json()
-                
         except Exception as e:
             print(f"Error getting agent: {str(e)}")
             raise
     
+    async def _fetch_agent(self, region: str, agent_name: str) -> Dict[str, Any]:
+        # Make API request
+        response = await self._send(
+            "GET",
+            f"https://{region}-aiplatform.googleapis.com/v1/{agent_name}",
+            region,
+            "get_agent",
+            idempotent=True,
+            hedge=True
+        )
+        
+        # Parse response
+        return response.json()
+    
     async def create_agent(self, project_id: str, region: str, agent_data: Dict[str, Any]) -> Dict[str, Any]:
         """Creates a new agent using Vertex AI API."""
         try:
-            # Get auth header
-            headers = await self._get_auth_header()
-            
             # Make API request
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"https://{region}-aiplatform.googleapis.com/v1/projects/{project_id}/locations/{region}/reasoningEngines",
-                    headers=headers,
-                    json=agent_data
-                )
-                
-                # Raise exception for error responses
-                response.raise_for_status()
-                
-                # Parse response
-                return response.json()
-                
+            response = await self._send(
+                "POST",
+                f"https://{region}-aiplatform.googleapis.com/v1/projects/{project_id}/locations/{region}/reasoningEngines",
+                region,
+                "create_agent",
+                idempotent=False,
+                json=agent_data
+            )
+            
+            # Parse response
+            return response.json()
+            
         except Exception as e:
             print(f"Error creating agent: {str(e)}")
             raise
+        finally:
+            invalidate_cached_resource(f"projects/{project_id}/locations/{region}/reasoningEngines")
     
     async def update_agent(self, project_id: str, region: str, agent_id: str, agent_data: Dict[str, Any]) -> Dict[str, Any]:
         """Updates an existing agent using Vertex AI API."""
@@ -121,26 +302,24 @@ class VertexAIService:
             if not agent_name.startswith("projects/"):
                 agent_name = f"projects/{project_id}/locations/{region}/reasoningEngines/{agent_id}"
                 
-            # Get auth header
-            headers = await self._get_auth_header()
-            
             # Make API request
-            async with httpx.AsyncClient() as client:
-                response = await client.patch(
-                    f"https://{region}-aiplatform.googleapis.com/v1/{agent_name}",
-                    headers=headers,
-                    json=agent_data
-                )
-                
-                # Raise exception for error responses
-                response.raise_for_status()
-                
-                # Parse response
-                return response.json()
-                
+            response = await self._send(
+                "PATCH",
+                f"https://{region}-aiplatform.googleapis.com/v1/{agent_name}",
+                region,
+                "update_agent",
+                idempotent=True,
+                json=agent_data
+            )
+            
+            # Parse response
+            return response.json()
+            
         except Exception as e:
             print(f"Error updating agent: {str(e)}")
             raise
+        finally:
+            invalidate_cached_resource(agent_name)
     
     async def delete_agent(self, project_id: str, region: str, agent_id: str) -> Dict[str, Any]:
         """Deletes an agent using Vertex AI API."""
@@ -150,28 +329,26 @@ class VertexAIService:
             if not agent_name.startswith("projects/"):
                 agent_name = f"projects/{project_id}/locations/{region}/reasoningEngines/{agent_id}"
                 
-            # Get auth header
-            headers = await self._get_auth_header()
-            
             # Make API request
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    f"https://{region}-aiplatform.googleapis.com/v1/{agent_name}",
-                    headers=headers
-                )
-                
-                # Raise exception for error responses
-                response.raise_for_status()
-                
-                # Parse response (might be empty for delete operations)
-                if response.content:
-                    return response.json()
-                else:
-                    return {"status": "success"}
-                
+            response = await self._send(
+                "DELETE",
+                f"https://{region}-aiplatform.googleapis.com/v1/{agent_name}",
+                region,
+                "delete_agent",
+                idempotent=True
+            )
+            
+            # Parse response (might be empty for delete operations)
+            if response.content:
+                return response.json()
+            else:
+                return {"status": "success"}
+            
         except Exception as e:
             print(f"Error deleting agent: {str(e)}")
             raise
+        finally:
+            invalidate_cached_resource(agent_name)
     
     async def deploy_agent(self, agent_id: str, project_id: str, region: str) -> Dict[str, Any]:
         """Deploys an agent using Vertex AI API."""
@@ -181,32 +358,49 @@ class VertexAIService:
             if not agent_name.startswith("projects/"):
                 agent_name = f"projects/{project_id}/locations/{region}/reasoningEngines/{agent_id}"
                 
-            # Get auth header
-            headers = await self._get_auth_header()
-            
             # Make API request
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"https://{region}-aiplatform.googleapis.com/v1/{agent_name}:deploy",
-                    headers=headers
-                )
-                
-                # Raise exception for error responses
-                response.raise_for_status()
-                
-                # Parse response
-                if response.content:
-                    return response.json()
-                else:
-                    return {
-                        "resourceName": agent_name,
-                        "status": "deploying"
-                    }
-                
+            response = await self._send(
+                "POST",
+                f"https://{region}-aiplatform.googleapis.com/v1/{agent_name}:deploy",
+                region,
+                "deploy_agent",
+                idempotent=False
+            )
+            
+            # Parse response
+            if response.content:
+                return response.json()
+            else:
+                return {
+                    "resourceName": agent_name,
+                    "status": "deploying"
+                }
+            
         except Exception as e:
             print(f"Error deploying agent: {str(e)}")
             raise
-    
+        finally:
+            invalidate_cached_resource(agent_name)
+
+    async def get_operation(self, region: str, operation_name: str) -> Dict[str, Any]:
+        """Gets the state of a long-running operation using Vertex AI API."""
+        try:
+            # Make API request
+            response = await self._send(
+                "GET",
+                f"https://{region}-aiplatform.googleapis.com/v1/{operation_name}",
+                region,
+                "get_operation",
+                idempotent=True
+            )
+
+            # Parse response
+            return response.json()
+
+        except Exception as e:
+            print(f"Error getting operation: {str(e)}")
+            raise
+
     async def query_agent(self, project_id: str, region: str, resource_name: str, query: str) -> Dict[str, Any]:
         """Queries an agent using Vertex AI API."""
         try:
@@ -215,9 +409,6 @@ class VertexAIService:
             if not agent_name.startswith("projects/"):
                 agent_name = f"projects/{project_id}/locations/{region}/reasoningEngines/{resource_name}"
                 
-            # Get auth header
-            headers = await self._get_auth_header()
-            
             # Prepare request body
             request_body = {
                 "query": query,
@@ -225,19 +416,19 @@ class VertexAIService:
             }
             
             # Make API request
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"https://{region}-aiplatform.googleapis.com/v1/{agent_name}:query",
-                    headers=headers,
-                    json=request_body
-                )
-                
-                # Raise exception for error responses
-                response.raise_for_status()
-                
-                # Parse response
-                return response.json()
-                
+            response = await self._send(
+                "POST",
+                f"https://{region}-aiplatform.googleapis.com/v1/{agent_name}:query",
+                region,
+                "query_agent",
+                # A query runs the agent, which may act on tools; a duplicate is not harmless
+                idempotent=False,
+                json=request_body
+            )
+            
+            # Parse response
+            return response.json()
+            
         except Exception as e:
             print(f"Error querying agent: {str(e)}")
             raise
@@ -250,9 +441,6 @@ class VertexAIService:
             if not agent_name.startswith("projects/"):
                 agent_name = f"projects/{project_id}/locations/{region}/reasoningEngines/{agent_id}"
                 
-            # Get auth header
-            headers = await self._get_auth_header()
-            
             # Prepare request body for Cloud Monitoring API
             request_body = {
                 "name": f"projects/{project_id}",
@@ -269,33 +457,33 @@ class VertexAIService:
             }
             
             # Make API request to Cloud Monitoring
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"https://monitoring.googleapis.com/v3/projects/{project_id}/timeSeries:query",
-                    headers=headers,
-                    json=request_body
-                )
-                
-                # Raise exception for error responses
-                response.raise_for_status()
-                
-                # Parse and process the metrics
-                metrics_data = response.json()
-                
-                # Process the metrics into a more usable format
-                # This is a simplified version - in a real implementation, 
-                # you would process the specific metrics you're interested in
-                processed_metrics = {
-                    "agent_id": agent_id,
-                    "time_range": {
-                        "start": start_time,
-                        "end": end_time
-                    },
-                    "metrics": metrics_data.get("timeSeries", [])
-                }
-                
-                return processed_metrics
-                
+            response = await self._send(
+                "POST",
+                f"https://monitoring.googleapis.com/v3/projects/{project_id}/timeSeries:query",
+                MONITORING_BREAKER_KEY,
+                "get_agent_metrics",
+                idempotent=True,
+                hedge=True,
+                json=request_body
+            )
+            
+            # Parse and process the metrics
+            metrics_data = response.json()
+            
+            # Process the metrics into a more usable format
+            # This is a simplified version - in a real implementation, 
+            # you would process the specific metrics you're interested in
+            processed_metrics = {
+                "agent_id": agent_id,
+                "time_range": {
+                    "start": start_time,
+                    "end": end_time
+                },
+                "metrics": metrics_data.get("timeSeries", [])
+            }
+            
+            return processed_metrics
+            
         except Exception as e:
             print(f"Error getting agent metrics: {str(e)}")
             raise
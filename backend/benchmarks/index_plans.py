@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the query-shape indexes.
+
+Seeds a scratch schema with synthetic registry data, then runs EXPLAIN ANALYZE for
+each hot query with and without the composite indexes and prints the scan type and
+execution time of each plan. Requires DATABASE_URL to point at a PostgreSQL database;
+everything is created in (and dropped with) the agentfleet_bench schema.
+
+Usage:
+    python benchmarks/index_plans.py --agents 5000 --deployments 200000
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import create_engine, text
+from app.database import Base, DATABASE_URL
+
+SCHEMA = "agentfleet_bench"
+
+# Indexes that existed before the query-shape migration
+BASELINE_INDEXES = {"ix_agents_agent_family_id"}
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO agents (id, name, agent_family_id, framework, status, environment,
+                        created_at, updated_at, system_instruction, configuration)
+    SELECT 'agent-' || g,
+           'agent-name-' || (g % 1000),
+           'family-' || (g % 1000),
+           (ARRAY['CUSTOM','LANGCHAIN','LANGGRAPH','CREWAI','LLAMAINDEX'])[1 + g % 5],
+           (ARRAY['DRAFT','TESTED','DEPLOYED','ARCHIVED'])[1 + g % 4],
+           (ARRAY['DEVELOPMENT','UAT','PRODUCTION'])[1 + g % 3],
+           now() - g * interval '1 minute',
+           now() - g * interval '1 minute',
+           repeat('x', 500),
+           '{}'
+    FROM generate_series(1, :agents) AS g
+    """,
+    """
+    INSERT INTO deployments (id, agent_id, deployment_type, version, environment, project_id,
+                             region, resource_name, status, deployed_at)
+    SELECT 'deployment-' || g,
+           'agent-' || (1 + g % :agents),
+           'AGENT_ENGINE',
+           '1.0.' || (g % 50),
+           (ARRAY['DEVELOPMENT','UAT','PRODUCTION'])[1 + g % 3],
+           'project-' || (g % 20),
+           (ARRAY['us-central1','europe-west1','asia-east1'])[1 + g % 3],
+           'projects/p/locations/us-central1/reasoningEngines/' || g,
+           (ARRAY['SUCCESSFUL','SUCCESSFUL','SUCCESSFUL','FAILED','PENDING'])[1 + g % 5],
+           now() - g * interval '10 seconds'
+    FROM generate_series(1, :deployments) AS g
+    """,
+    """
+    INSERT INTO agent_tests (id, agent_id, query, response, success, created_at)
+    SELECT 'test-' || g, 'agent-' || (1 + g % :agents), 'query', 'response', true,
+           now() - g * interval '10 seconds'
+    FROM generate_series(1, :deployments) AS g
+    """,
+    """
+    INSERT INTO agent_metrics (id, agent_id, date, request_count)
+    SELECT 'metric-' || g, 'agent-' || (1 + g % :agents), now() - (g / :agents) * interval '1 day', g % 100
+    FROM generate_series(1, :deployments) AS g
+    """,
+]
+
+# (label, SQL) for each query shape the API issues
+QUERIES = [
+    ("list_agents filters",
+     "SELECT id FROM agents WHERE environment = 'PRODUCTION' AND status = 'DEPLOYED' AND framework = 'LANGCHAIN' "
+     "ORDER BY created_at DESC, id DESC LIMIT 51"),
+    ("list_agents page",
+     "SELECT id FROM agents ORDER BY created_at DESC, id DESC LIMIT 51"),
+    ("register_agent family lookup",
+     "SELECT agent_family_id FROM agents WHERE name = 'agent-name-42' AND environment = 'UAT' LIMIT 1"),
+    ("list_deployments by agent",
+     "SELECT id FROM deployments WHERE agent_id = 'agent-42' ORDER BY deployed_at DESC, id DESC LIMIT 51"),
+    ("query_deployed_agent latest",
+     "SELECT id FROM deployments WHERE agent_id = 'agent-42' AND project_id = 'project-2' "
+     "AND region = 'us-central1' AND status = 'SUCCESSFUL' ORDER BY deployed_at DESC LIMIT 1"),
+    ("list_tests by agent",
+     "SELECT id FROM agent_tests WHERE agent_id = 'agent-42' ORDER BY created_at DESC, id DESC LIMIT 11"),
+    ("agent_metrics by agent/date",
+     "SELECT id FROM agent_metrics WHERE agent_id = 'agent-42' AND date >= now() - interval '30 days'"),
+]
+
+def _scan_nodes(plan):
+    """Collects the scan node types of a JSON plan tree."""
+    nodes = []
+    if "Scan" in plan["Node Type"]:
+        nodes.append(plan["Node Type"])
+    for child in plan.get("Plans", []):
+        nodes.extend(_scan_nodes(child))
+    return nodes
+
+def explain_all(conn):
+    """Runs EXPLAIN ANALYZE for every query shape."""
+    results = {}
+    for label, sql in QUERIES:
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")).scalar()[0]
+        results[label] = (", ".join(_scan_nodes(plan["Plan"])), plan["Execution Time"])
+    return results
+
+def run_benchmark(agents, deployments):
+    """Seeds the scratch schema and compares plans before and after indexing."""
+    engine = create_engine(DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    query_indexes = [
+        index
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes
+        if index.name not in BASELINE_INDEXES
+    ]
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+    try:
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
+            for index in query_indexes:
+                index.drop(conn)
+
+            print(f"Seeding {agents} agents and {deployments} deployments/tests/metrics...")
+            for statement in SEED_STATEMENTS:
+                conn.execute(text(statement), {"agents": agents, "deployments": deployments})
+            conn.execute(text("ANALYZE"))
+
+        with engine.begin() as conn:
+            before = explain_all(conn)
+            for index in query_indexes:
+                index.create(conn)
+            conn.execute(text("ANALYZE"))
+            after = explain_all(conn)
+
+        print(f"{'query':<32} {'before':<38} {'ms':>9}   {'after':<38} {'ms':>9}")
+        for label, _ in QUERIES:
+            (before_scan, before_ms), (after_scan, after_ms) = before[label], after[label]
+            print(f"{label:<32} {before_scan:<38} {before_ms:>9.3f}   {after_scan:<38} {after_ms:>9.3f}")
+
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare query plans with and without the query-shape indexes")
+    parser.add_argument("--agents", type=int, default=5000)
+    parser.add_argument("--deployments", type=int, default=200000)
+    args = parser.parse_args()
+    run_benchmark(args.agents, args.deployments)
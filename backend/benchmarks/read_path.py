@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the agent list read path.
+
+Compares the original list_agents path (ORM instances, a hand-built dict per agent,
+then response_model validation) against the Core read path (column tuples mapped
+through the precompiled AGENT_MAPPER). Runs against an in-memory SQLite database so
+it measures the Python-side materialization cost rather than the network.
+
+Usage:
+    python benchmarks/read_path.py --rows 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import Base, Agent
+from app.models.agent import AgentResponse
+from app.api.projection import AGENT_MAPPER
+
+def seed(engine, rows):
+    """Inserts synthetic agents with realistic prompt and configuration sizes."""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Agent), [
+            {
+                "id": str(uuid.uuid4()),
+                "name": f"agent-{i}",
+                "description": "Synthetic benchmark agent",
+                "agent_family_id": f"family-{i % 1000}",
+                "framework": "LANGCHAIN",
+                "repository_url": "https://github.com/example/agents",
+                "source_hash": uuid.uuid4().hex,
+                "status": "DEPLOYED",
+                "environment": "PRODUCTION",
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now - timedelta(minutes=i),
+                "model_id": "gemini-1.5-pro",
+                "temperature": 0.2,
+                "max_output_tokens": 1024,
+                "system_instruction": "You are a helpful agent. " * 100,
+                "configuration": {"tools": [{"name": "search"}, {"name": "calculator"}]},
+            }
+            for i in range(rows)
+        ])
+
+def orm_path(session) -> List:
+    """The list_agents implementation before the Core read path."""
+    agents = session.execute(select(Agent)).scalars().all()
+    items = [
+        {
+            "id": agent.id,
+            "name": agent.name,
+            "description": agent.description,
+            "agentFamilyId": agent.agent_family_id,
+            "framework": agent.framework,
+            "repositoryUrl": agent.repository_url,
+            "sourceHash": agent.source_hash,
+            "templateId": agent.template_id,
+            "status": agent.status,
+            "environment": agent.environment,
+            "modelId": agent.model_id,
+            "temperature": agent.temperature,
+            "maxOutputTokens": agent.max_output_tokens,
+            "systemInstruction": agent.system_instruction,
+            "configuration": agent.configuration,
+            "createdAt": agent.created_at,
+            "updatedAt": agent.updated_at,
+            "createdBy": agent.created_by
+        }
+        for agent in agents
+    ]
+    # FastAPI validated the returned dicts against response_model=List[AgentResponse]
+    return TypeAdapter(List[AgentResponse]).validate_python(items)
+
+def core_path(session, field_names) -> List:
+    """The Core read path: plain column tuples through the precompiled mapper."""
+    rows = session.execute(AGENT_MAPPER.select(field_names)).all()
+    to_dict = AGENT_MAPPER.row_mapper(field_names)
+    return [to_dict(row) for row in rows]
+
+def timed(fn, repeat):
+    """Returns the best wall time of repeat runs in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+def run_benchmark(row_counts, repeat):
+    print(f"{'rows':>8} {'orm + validate (ms)':>20} {'core all (ms)':>15} {'core summary (ms)':>19} {'speedup':>9}")
+    for rows in row_counts:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        seed(engine, rows)
+
+        with Session(engine) as session:
+            # A fresh session per run so the ORM path pays for its identity map each time
+            orm_ms = timed(lambda: (orm_path(session), session.expunge_all()), repeat)
+            core_ms = timed(lambda: core_path(session, AGENT_MAPPER.all_fields), repeat)
+            summary_ms = timed(lambda: core_path(session, AGENT_MAPPER.summary_fields), repeat)
+
+        print(f"{rows:>8} {orm_ms:>20.1f} {core_ms:>15.1f} {summary_ms:>19.1f} {orm_ms / core_ms:>8.1f}x")
+        engine.dispose()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the ORM and Core read paths for list_agents")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.repeat)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark and regression gate for backend cold start.
+
+Measures, each in a fresh interpreter, how long `import app.main` takes and how long
+a uvicorn process takes from spawn to its first healthy /api/health response. Also
+checks that importing the app leaves the Google and HTTP client SDKs unloaded. Exits
+non-zero when a median exceeds its budget or an SDK is imported eagerly, so CI can
+run it as a startup check. Runs against a scratch SQLite database.
+
+Usage:
+    python benchmarks/startup.py --repeat 5 --max-import-seconds 2 --max-ready-seconds 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported when a Vertex AI call is first made
+LAZY_MODULES = ["google.auth", "google.oauth2", "httpx"]
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+def scratch_env(workdir):
+    """Environment for the probes: a scratch SQLite database and no background work."""
+    db_path = os.path.join(workdir, "startup.sqlite")
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{db_path}",
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "JOB_WORKERS": "0",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    return env
+
+def create_schema(env):
+    subprocess.run(
+        [sys.executable, "-c", "from app.database import create_tables; create_tables()"],
+        cwd=BACKEND_DIR, env=env, check=True
+    )
+
+def measure_import(env):
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_ready(env, timeout):
+    """Seconds from spawning uvicorn until /api/health first answers 200."""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited before becoming healthy")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"no healthy response within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def run_benchmark(repeat, max_import_seconds, max_ready_seconds):
+    with tempfile.TemporaryDirectory() as workdir:
+        env = scratch_env(workdir)
+        create_schema(env)
+
+        imports = [measure_import(env) for _ in range(repeat)]
+        ready = [measure_ready(env, timeout=max_ready_seconds * 4) for _ in range(repeat)]
+
+    import_median = statistics.median(probe["seconds"] for probe in imports)
+    ready_median = statistics.median(ready)
+    loaded = sorted({module for probe in imports for module in probe["loaded"]})
+
+    print(f"{'check':<28} {'median (s)':>11} {'min (s)':>9} {'budget (s)':>11}")
+    print(f"{'import app.main':<28} {import_median:>11.3f} {min(p['seconds'] for p in imports):>9.3f} {max_import_seconds:>11.3f}")
+    print(f"{'first healthy response':<28} {ready_median:>11.3f} {min(ready):>9.3f} {max_ready_seconds:>11.3f}")
+    print(f"SDKs imported eagerly: {', '.join(loaded) or 'none'}")
+
+    failures = []
+    if import_median > max_import_seconds:
+        failures.append(f"import took {import_median:.3f}s (budget {max_import_seconds}s)")
+    if ready_median > max_ready_seconds:
+        failures.append(f"first healthy response took {ready_median:.3f}s (budget {max_ready_seconds}s)")
+    if loaded:
+        failures.append(f"importing the app loaded {', '.join(loaded)}")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure backend import time and time to first healthy response")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-import-seconds", type=float, default=2.0)
+    parser.add_argument("--max-ready-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    sys.exit(run_benchmark(args.repeat, args.max_import_seconds, args.max_ready_seconds))
@@ -0,0 +1,38 @@
+"""Add operation name to deployments
+
+Revision ID: 3f7a1c9e5d20
+Revises: 9d4a6c1e27b8
+Create Date: 2026-10-17 19:12:44.630218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7a1c9e5d20'
+down_revision: Union[str, None] = '9d4a6c1e27b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('deployments', sa.Column('operation_name', sa.String(), nullable=True))
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_deployments_status_operation_name', 'deployments', ['status', 'operation_name'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_deployments_status_operation_name', table_name='deployments', postgresql_concurrently=True
+        )
+    op.drop_column('deployments', 'operation_name')
@@ -0,0 +1,48 @@
+"""Add composite indexes for the API query shapes
+
+Revision ID: 3f9c1d2a7b64
+Revises: 0625bb3db4b3
+Create Date: 2026-10-17 09:12:40.512318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1d2a7b64'
+down_revision: Union[str, None] = '0625bb3db4b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_agents_environment_status_framework', 'agents', ['environment', 'status', 'framework']),
+    ('ix_agents_name_environment', 'agents', ['name', 'environment']),
+    ('ix_agents_created_at_id', 'agents', ['created_at', 'id']),
+    ('ix_deployments_agent_id_deployed_at', 'deployments', ['agent_id', 'deployed_at', 'id']),
+    ('ix_deployments_agent_project_region_status_deployed_at', 'deployments',
+     ['agent_id', 'project_id', 'region', 'status', 'deployed_at']),
+    ('ix_deployments_deployed_at_id', 'deployments', ['deployed_at', 'id']),
+    ('ix_agent_tests_agent_id_created_at', 'agent_tests', ['agent_id', 'created_at', 'id']),
+    ('ix_agent_tests_created_at_id', 'agent_tests', ['created_at', 'id']),
+    ('ix_agent_metrics_agent_id_date', 'agent_metrics', ['agent_id', 'date']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,58 @@
+"""Add current deployment pointers per agent and per project/region
+
+Revision ID: 5b2d8e07c4f1
+Revises: e18b6f3a9c05
+Create Date: 2026-10-17 16:48:12.907355
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2d8e07c4f1'
+down_revision: Union[str, None] = 'e18b6f3a9c05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('agents', sa.Column('current_deployment_id', sa.String(), nullable=True))
+    op.create_table('agent_current_deployments',
+    sa.Column('agent_id', sa.String(), nullable=False),
+    sa.Column('project_id', sa.String(), nullable=False),
+    sa.Column('region', sa.String(), nullable=False),
+    sa.Column('deployment_id', sa.String(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ),
+    sa.ForeignKeyConstraint(['deployment_id'], ['deployments.id'], ),
+    sa.PrimaryKeyConstraint('agent_id', 'project_id', 'region')
+    )
+
+    # Point at the latest successful deployment, as the query path used to compute per call
+    op.execute("""
+        INSERT INTO agent_current_deployments (agent_id, project_id, region, deployment_id, updated_at)
+        SELECT DISTINCT ON (agent_id, project_id, region) agent_id, project_id, region, id, now()
+        FROM deployments
+        WHERE status = 'SUCCESSFUL'
+        ORDER BY agent_id, project_id, region, deployed_at DESC, id DESC
+    """)
+    op.execute("""
+        UPDATE agents SET current_deployment_id = latest.id
+        FROM (
+            SELECT DISTINCT ON (agent_id) agent_id, id
+            FROM deployments
+            WHERE status = 'SUCCESSFUL'
+            ORDER BY agent_id, deployed_at DESC, id DESC
+        ) AS latest
+        WHERE agents.id = latest.agent_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('agent_current_deployments')
+    op.drop_column('agents', 'current_deployment_id')
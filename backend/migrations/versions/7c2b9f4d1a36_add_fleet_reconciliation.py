@@ -0,0 +1,44 @@
+"""Add fleet reconciliation watermarks and resource name index
+
+Revision ID: 7c2b9f4d1a36
+Revises: 3f7a1c9e5d20
+Create Date: 2026-10-17 23:05:18.402761
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2b9f4d1a36'
+down_revision: Union[str, None] = '3f7a1c9e5d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'reconciliation_watermarks',
+        sa.Column('project_id', sa.String(), nullable=False),
+        sa.Column('region', sa.String(), nullable=False),
+        sa.Column('update_time', sa.DateTime(), nullable=True),
+        sa.Column('full_sweep_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('project_id', 'region')
+    )
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_deployments_resource_name', 'deployments', ['resource_name'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_deployments_resource_name', table_name='deployments', postgresql_concurrently=True)
+    op.drop_table('reconciliation_watermarks')
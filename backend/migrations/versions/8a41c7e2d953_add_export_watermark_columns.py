@@ -0,0 +1,64 @@
+"""Add deployments.updated_at and export watermark indexes
+
+Revision ID: 8a41c7e2d953
+Revises: 3f9c1d2a7b64
+Create Date: 2026-10-17 11:02:18.734105
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a41c7e2d953'
+down_revision: Union[str, None] = '3f9c1d2a7b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rows backfilled per statement, so no single UPDATE holds row locks on the whole table
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Deployments change status after they are created, so exports need their own watermark
+    op.add_column('deployments', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        # Each batch commits on its own instead of rewriting the table in one transaction
+        backfill = sa.text(
+            'UPDATE deployments SET updated_at = deployed_at WHERE id IN '
+            '(SELECT id FROM deployments WHERE updated_at IS NULL LIMIT :batch_size)'
+        )
+        while op.get_bind().execute(backfill, {'batch_size': BACKFILL_BATCH_SIZE}).rowcount:
+            pass
+
+        if op.get_bind().dialect.name == 'postgresql':
+            # SET NOT NULL would scan the table under an exclusive lock; a CHECK constraint
+            # validated beforehand (which takes a weaker lock) lets Postgres skip that scan
+            op.execute(
+                'ALTER TABLE deployments ADD CONSTRAINT ck_deployments_updated_at_not_null '
+                'CHECK (updated_at IS NOT NULL) NOT VALID'
+            )
+            op.execute('ALTER TABLE deployments VALIDATE CONSTRAINT ck_deployments_updated_at_not_null')
+            op.alter_column('deployments', 'updated_at', nullable=False)
+            op.drop_constraint('ck_deployments_updated_at_not_null', 'deployments', type_='check')
+        else:
+            op.alter_column('deployments', 'updated_at', nullable=False)
+
+        op.create_index('ix_agents_updated_at_id', 'agents', ['updated_at', 'id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_deployments_updated_at_id', 'deployments', ['updated_at', 'id'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_deployments_updated_at_id', table_name='deployments', postgresql_concurrently=True)
+        op.drop_index('ix_agents_updated_at_id', table_name='agents', postgresql_concurrently=True)
+
+    op.drop_column('deployments', 'updated_at')
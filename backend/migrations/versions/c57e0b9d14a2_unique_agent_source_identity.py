@@ -0,0 +1,54 @@
+"""Make agent registration unique on name, environment and source hash
+
+Revision ID: c57e0b9d14a2
+Revises: 8a41c7e2d953
+Create Date: 2026-10-17 13:40:06.218947
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c57e0b9d14a2'
+down_revision: Union[str, None] = '8a41c7e2d953'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CONSTRAINT = 'uq_agents_name_environment_source_hash'
+
+# Each registered agent paired with the earliest agent sharing its source identity
+DUPLICATES = """
+    SELECT id,
+           first_value(id) OVER (
+               PARTITION BY name, environment, source_hash ORDER BY created_at, id
+           ) AS keeper_id
+    FROM agents
+    WHERE source_hash IS NOT NULL
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fold duplicates left by retried registrations into the first registration
+    for table in ('deployments', 'agent_tests', 'agent_metrics'):
+        op.execute(
+            f'UPDATE {table} SET agent_id = d.keeper_id FROM ({DUPLICATES}) AS d '
+            f'WHERE {table}.agent_id = d.id AND d.id <> d.keeper_id'
+        )
+    op.execute(f'DELETE FROM agents USING ({DUPLICATES}) AS d WHERE agents.id = d.id AND d.id <> d.keeper_id')
+
+    # Build the unique index without blocking writes, then attach it as the constraint
+    with op.get_context().autocommit_block():
+        op.create_index(CONSTRAINT, 'agents', ['name', 'environment', 'source_hash'],
+                        unique=True, postgresql_concurrently=True)
+    op.execute(f'ALTER TABLE agents ADD CONSTRAINT {CONSTRAINT} UNIQUE USING INDEX {CONSTRAINT}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Merged duplicates are not restored
+    op.drop_constraint(CONSTRAINT, 'agents', type_='unique')
@@ -0,0 +1,30 @@
+"""Add operation poll lease to deployments
+
+Revision ID: d4a9e2b7c618
+Revises: b5e3d81f6a27
+Create Date: 2026-10-18 14:37:06.215874
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9e2b7c618'
+down_revision: Union[str, None] = 'b5e3d81f6a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('deployments', sa.Column('operation_polled_by', sa.String(), nullable=True))
+    op.add_column('deployments', sa.Column('operation_lease_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('deployments', 'operation_lease_until')
+    op.drop_column('deployments', 'operation_polled_by')
@@ -0,0 +1,167 @@
+"""Move agent lineage from configuration JSON into an edge table
+
+Revision ID: e18b6f3a9c05
+Revises: c57e0b9d14a2
+Create Date: 2026-10-17 15:22:51.604173
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e18b6f3a9c05'
+down_revision: Union[str, None] = 'c57e0b9d14a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Promotion order; edges point from the earlier environment to the later one
+ENVIRONMENT_ORDER = ['DEVELOPMENT', 'UAT', 'PRODUCTION']
+
+agents = sa.table(
+    'agents',
+    sa.column('id', sa.String),
+    sa.column('environment', sa.String),
+    sa.column('configuration', sa.JSON),
+)
+
+agent_lineage = sa.table(
+    'agent_lineage',
+    sa.column('id', sa.String),
+    sa.column('parent_agent_id', sa.String),
+    sa.column('parent_environment', sa.String),
+    sa.column('child_agent_id', sa.String),
+    sa.column('child_environment', sa.String),
+    sa.column('relation', sa.String),
+    sa.column('external_endpoint', sa.String),
+    sa.column('created_at', sa.DateTime),
+    sa.column('updated_at', sa.DateTime),
+)
+
+
+def _rank(environment):
+    return ENVIRONMENT_ORDER.index(environment) if environment in ENVIRONMENT_ORDER else len(ENVIRONMENT_ORDER)
+
+
+def _timestamp(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.utcnow()
+
+
+def _edge(agent_id, environment, related_agent_id, related_environment, relation, endpoint, created_at, updated_at):
+    local, related = (agent_id, environment), (related_agent_id, related_environment)
+    parent, child = (local, related) if _rank(environment) <= _rank(related_environment) else (related, local)
+    return {
+        'parent_agent_id': parent[0],
+        'parent_environment': parent[1],
+        'child_agent_id': child[0],
+        'child_environment': child[1],
+        'relation': relation,
+        'external_endpoint': endpoint,
+        'created_at': created_at,
+        'updated_at': updated_at,
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('agent_lineage',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('parent_agent_id', sa.String(), nullable=False),
+    sa.Column('parent_environment', sa.String(), nullable=False),
+    sa.Column('child_agent_id', sa.String(), nullable=False),
+    sa.Column('child_environment', sa.String(), nullable=False),
+    sa.Column('relation', sa.String(), nullable=False),
+    sa.Column('external_endpoint', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('parent_agent_id', 'child_agent_id', 'relation', name='uq_agent_lineage_parent_child_relation')
+    )
+    op.create_index('ix_agent_lineage_child_agent_id', 'agent_lineage', ['child_agent_id'], unique=False)
+
+    # Backfill edges from the JSON lineage and external references, then drop the JSON keys
+    conn = op.get_bind()
+    edges = {}
+    for agent_id, environment, configuration in conn.execute(
+        sa.select(agents.c.id, agents.c.environment, agents.c.configuration)
+        .where(agents.c.configuration.isnot(None))
+    ):
+        if not isinstance(configuration, dict):
+            continue
+        lineage = configuration.get('lineage') or {}
+        references = configuration.get('externalReferences') or []
+        if not lineage and not references:
+            continue
+
+        for related_environment, entry in lineage.items():
+            if entry.get('agentId'):
+                seen_at = _timestamp(entry.get('lastUpdated'))
+                edge = _edge(agent_id, environment, entry['agentId'], related_environment,
+                             'LINEAGE', None, seen_at, seen_at)
+                key = (edge['parent_agent_id'], edge['child_agent_id'], 'LINEAGE')
+                if key not in edges or edges[key]['updated_at'] < edge['updated_at']:
+                    edges[key] = edge
+
+        for reference in references:
+            if reference.get('externalAgentId') and reference.get('environment'):
+                registered_at = _timestamp(reference.get('registeredAt'))
+                edge = _edge(agent_id, environment, reference['externalAgentId'], reference['environment'],
+                             'EXTERNAL_REFERENCE', reference.get('externalEndpoint'),
+                             registered_at, _timestamp(reference.get('updatedAt', reference.get('registeredAt'))))
+                key = (edge['parent_agent_id'], edge['child_agent_id'], 'EXTERNAL_REFERENCE')
+                if key not in edges or edges[key]['updated_at'] < edge['updated_at']:
+                    edges[key] = edge
+
+        remaining = {k: v for k, v in configuration.items() if k not in ('lineage', 'externalReferences')}
+        conn.execute(agents.update().where(agents.c.id == agent_id).values(configuration=remaining))
+
+    if edges:
+        op.bulk_insert(agent_lineage, [{'id': str(uuid.uuid4()), **edge} for edge in edges.values()])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Rebuild the JSON lineage and external references on every local end of each edge
+    conn = op.get_bind()
+    configurations = {
+        agent_id: (environment, dict(configuration or {}))
+        for agent_id, environment, configuration in conn.execute(
+            sa.select(agents.c.id, agents.c.environment, agents.c.configuration)
+            .where(agents.c.id.in_(
+                sa.select(agent_lineage.c.parent_agent_id).union(sa.select(agent_lineage.c.child_agent_id))
+            ))
+        )
+    }
+    for edge in conn.execute(sa.select(agent_lineage)).mappings():
+        for side, other in (('parent', 'child'), ('child', 'parent')):
+            agent_id = edge[f'{side}_agent_id']
+            if agent_id not in configurations:
+                continue
+            configuration = configurations[agent_id][1]
+            if edge['relation'] == 'LINEAGE':
+                configuration.setdefault('lineage', {})[edge[f'{other}_environment']] = {
+                    'agentId': edge[f'{other}_agent_id'],
+                    'lastUpdated': edge['updated_at'].isoformat(),
+                }
+            else:
+                configuration.setdefault('externalReferences', []).append({
+                    'environment': edge[f'{other}_environment'],
+                    'externalAgentId': edge[f'{other}_agent_id'],
+                    'externalEndpoint': edge['external_endpoint'],
+                    'registeredAt': edge['created_at'].isoformat(),
+                    'updatedAt': edge['updated_at'].isoformat(),
+                })
+
+    for agent_id, (_, configuration) in configurations.items():
+        conn.execute(agents.update().where(agents.c.id == agent_id).values(configuration=configuration))
+
+    op.drop_index('ix_agent_lineage_child_agent_id', table_name='agent_lineage')
+    op.drop_table('agent_lineage')
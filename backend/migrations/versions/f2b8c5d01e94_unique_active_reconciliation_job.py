@@ -0,0 +1,38 @@
+"""Allow one active reconciliation job
+
+Revision ID: f2b8c5d01e94
+Revises: d4a9e2b7c618
+Create Date: 2026-10-18 16:02:41.773519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8c5d01e94'
+down_revision: Union[str, None] = 'd4a9e2b7c618'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_RECONCILE_FLEET_JOB = "job_type = 'RECONCILE_FLEET' AND status IN ('PENDING', 'RUNNING')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_jobs_active_reconcile_fleet', 'jobs', ['job_type'],
+            unique=True, postgresql_concurrently=True,
+            postgresql_where=sa.text(ACTIVE_RECONCILE_FLEET_JOB),
+            sqlite_where=sa.text(ACTIVE_RECONCILE_FLEET_JOB)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_jobs_active_reconcile_fleet', table_name='jobs', postgresql_concurrently=True)
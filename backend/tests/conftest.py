@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+# Settings are read when app modules are imported, so the scratch environment comes first
+_WORKDIR = tempfile.mkdtemp(prefix="agentfleet-tests-")
+_DB_PATH = os.path.join(_WORKDIR, "test.sqlite")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_DB_PATH}",
+    "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{_DB_PATH}",
+    "UPLOAD_DIR": os.path.join(_WORKDIR, "uploads"),
+    "JOB_WORKERS": "0",
+    "SERVICE_WARMUP": "false",
+    "RECONCILE_INTERVAL_SECONDS": "0",
+    "VERTEX_CACHE_TTL_SECONDS": "0",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import AsyncSessionLocal, Base, async_engine, engine
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(autouse=True)
+def schema():
+    """A fresh schema for every test."""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+async def db():
+    async with AsyncSessionLocal() as session:
+        yield session
+    # Pooled connections belong to this test's event loop
+    await async_engine.dispose()
+
+@pytest.fixture
+def client():
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
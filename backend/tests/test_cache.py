@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from app.services.cache import AsyncTTLCache
+
+@pytest.mark.anyio
+async def test_concurrent_misses_share_one_load():
+    cache = AsyncTTLCache(ttl_seconds=60, max_entries=10)
+    calls = 0
+    release = asyncio.Event()
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"value": 1}
+
+    waiters = [asyncio.ensure_future(cache.get_or_load("key", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert results == [{"value": 1}] * 5
+    assert (cache.misses, cache.coalesced) == (1, 4)
+
+@pytest.mark.anyio
+async def test_callers_get_copies():
+    cache = AsyncTTLCache(ttl_seconds=60, max_entries=10)
+
+    async def loader():
+        return {"items": [1]}
+
+    (await cache.get_or_load("key", loader))["items"].append(2)
+    assert await cache.get_or_load("key", loader) == {"items": [1]}
+
+@pytest.mark.anyio
+async def test_least_recently_used_entry_is_evicted():
+    cache = AsyncTTLCache(ttl_seconds=60, max_entries=2)
+
+    def load(value):
+        async def loader():
+            return value
+        return loader
+
+    await cache.get_or_load("a", load(1))
+    await cache.get_or_load("b", load(2))
+    await cache.get_or_load("a", load(1))  # "b" is now the oldest
+    await cache.get_or_load("c", load(3))
+
+    assert await cache.get_or_load("b", load(20)) == 20
+    assert cache.evictions >= 1
+
+@pytest.mark.anyio
+async def test_expired_entries_are_reloaded(monkeypatch):
+    cache = AsyncTTLCache(ttl_seconds=10, max_entries=10)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.cache.time.monotonic", lambda: now[0])
+    values = iter([1, 2])
+
+    async def loader():
+        return next(values)
+
+    assert await cache.get_or_load("key", loader) == 1
+    now[0] += 11
+    assert await cache.get_or_load("key", loader) == 2
+    assert cache.expirations == 1
+
+@pytest.mark.anyio
+async def test_load_overlapping_invalidation_is_not_stored():
+    cache = AsyncTTLCache(ttl_seconds=60, max_entries=10)
+    release = asyncio.Event()
+
+    async def stale():
+        await release.wait()
+        return "stale"
+
+    async def fresh():
+        return "fresh"
+
+    pending = asyncio.ensure_future(cache.get_or_load("key", stale))
+    await asyncio.sleep(0)
+    cache.invalidate_where(lambda key: key == "key")
+    release.set()
+
+    assert await pending == "stale"
+    assert await cache.get_or_load("key", fresh) == "fresh"
+
+@pytest.mark.anyio
+async def test_load_survives_cancellation_of_the_caller_that_started_it():
+    cache = AsyncTTLCache(ttl_seconds=60, max_entries=10)
+    calls = 0
+    release = asyncio.Event()
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"value": 1}
+
+    initiator = asyncio.ensure_future(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+
+    initiator.cancel()
+    await asyncio.sleep(0)
+    # A caller arriving after the cancellation still joins the load in flight
+    late = asyncio.ensure_future(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await waiter == {"value": 1}
+    assert await late == {"value": 1}
+    assert initiator.cancelled()
+    assert await cache.get_or_load("key", loader) == {"value": 1}
+    assert calls == 1
@@ -0,0 +1,51 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.database import Agent, AgentCurrentDeployment, Deployment, DeploymentStatus
+from app.services.agent_registry import AgentRegistryService
+
+async def _deploy(db, agent_id, region, minutes_ago, status=DeploymentStatus.SUCCESSFUL.value):
+    deployment = Deployment(
+        id=str(uuid.uuid4()), agent_id=agent_id, deployment_type="AGENT_ENGINE", version="1.0.0",
+        environment="DEVELOPMENT", project_id="fleet-dev", region=region, status=status,
+        deployed_at=datetime.utcnow() - timedelta(minutes=minutes_ago)
+    )
+    db.add(deployment)
+    await db.flush()
+    return deployment
+
+async def _pointers(db, agent_id):
+    rows = (await db.execute(
+        select(AgentCurrentDeployment.region, AgentCurrentDeployment.deployment_id)
+        .where(AgentCurrentDeployment.agent_id == agent_id)
+    )).all()
+    return dict(rows)
+
+@pytest.mark.anyio
+async def test_pointers_follow_the_newest_successful_deployment_per_region(db):
+    registry = AgentRegistryService()
+    agent = Agent(id=str(uuid.uuid4()), name="bot", agent_family_id="family", framework="CUSTOM")
+    db.add(agent)
+    older = await _deploy(db, agent.id, "us-central1", 30)
+    europe = await _deploy(db, agent.id, "europe-west4", 20)
+    await registry.refresh_current_deployments(db, [agent.id])
+    await db.commit()
+    assert await _pointers(db, agent.id) == {"us-central1": older.id, "europe-west4": europe.id}
+
+    # Refreshing over existing pointers updates them in place
+    newer = await _deploy(db, agent.id, "us-central1", 10)
+    await registry.refresh_current_deployments(db, [agent.id])
+    await db.commit()
+    assert await _pointers(db, agent.id) == {"us-central1": newer.id, "europe-west4": europe.id}
+
+    # A region without any successful deployment left loses its pointer
+    europe.status = DeploymentStatus.FAILED.value
+    await registry.refresh_current_deployments(db, [agent.id])
+    await db.commit()
+    assert await _pointers(db, agent.id) == {"us-central1": newer.id}
+
+    current = (await db.execute(select(Agent.current_deployment_id).where(Agent.id == agent.id))).scalar()
+    assert current == newer.id
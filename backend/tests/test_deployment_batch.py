@@ -0,0 +1,43 @@
+import uuid
+
+import pytest
+
+from app.database import Agent
+
+@pytest.fixture
+async def agent_id(db):
+    agent = Agent(id=str(uuid.uuid4()), name="support-bot", agent_family_id="family", framework="CUSTOM")
+    db.add(agent)
+    await db.commit()
+    return agent.id
+
+@pytest.mark.anyio
+async def test_invalid_items_are_reported_without_failing_the_batch(client, agent_id):
+    response = client.post("/api/deployments:batch", json=[
+        {"agentId": agent_id, "projectId": "fleet-dev", "region": "us-central1"},
+        {"agentId": agent_id, "region": "europe-west4"},  # projectId is NOT NULL
+        {"agentId": agent_id, "projectId": "fleet-dev", "version": None},
+        {"agentId": agent_id, "projectId": "fleet-dev", "status": "DONE"},
+        {"agentId": "missing", "projectId": "fleet-dev"},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == ["created", "error", "error", "error", "error"]
+    assert body["results"][1]["error"] == "Missing required fields: projectId"
+    assert (body["created"], body["failed"]) == (1, 4)
+
+    deployments = client.get("/api/deployments", params={"agent_id": agent_id}).json()["items"]
+    assert [deployment["projectId"] for deployment in deployments] == ["fleet-dev"]
+    assert client.get(f"/api/agents/{agent_id}").json()["status"] == "DEPLOYED"
+
+@pytest.mark.anyio
+async def test_rows_rejected_by_the_database_fail_individually(client, agent_id):
+    # A list is not a valid column value, so the multi-row insert fails and is retried per row
+    response = client.post("/api/deployments:batch", json=[
+        {"agentId": agent_id, "projectId": "fleet-dev"},
+        {"agentId": agent_id, "projectId": ["not", "a", "string"]},
+    ]).json()
+
+    assert [result["status"] for result in response["results"]] == ["created", "error"]
+    assert len(client.get("/api/deployments", params={"agent_id": agent_id}).json()["items"]) == 1
@@ -0,0 +1,46 @@
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.api.responses import _resume
+from app.database import Agent, engine
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+@pytest.mark.anyio
+async def test_timezone_aware_watermark_is_compared_as_utc(db, client):
+    db.add_all([
+        Agent(id=str(uuid.uuid4()), name=name, agent_family_id="family", framework="CUSTOM",
+              created_at=updated_at, updated_at=updated_at)
+        for name, updated_at in [("old", datetime(2024, 12, 31, 23)), ("new", datetime(2025, 1, 1, 1))]
+    ])
+    await db.commit()
+
+    response = client.get("/api/export/agents", params={"updated_since": "2025-01-01T02:00:00+02:00"})
+
+    assert response.status_code == 200
+    assert [row["name"] for row in _lines(response)] == ["new"]
+
+def test_failing_query_returns_an_error_status(client):
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE agent_metrics"))
+
+    response = client.get("/api/export/agent_metrics")
+
+    assert response.status_code == 500
+    assert "Error exporting agent_metrics" in response.json()["detail"]
+
+@pytest.mark.anyio
+async def test_failure_after_the_first_batch_ends_with_an_error_item():
+    async def batches():
+        yield [{"id": 2}]
+        raise RuntimeError("connection lost")
+
+    received = [batch async for batch in _resume([{"id": 1}], batches())]
+
+    assert received[:2] == [[{"id": 1}], [{"id": 2}]]
+    assert received[-1] == [{"error": "Stream ended early: connection lost"}]
@@ -0,0 +1,84 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import Agent, Deployment
+
+START = datetime(2025, 1, 1)
+
+def _agent(family, minutes, environment="DEVELOPMENT", status="DRAFT"):
+    created_at = START + timedelta(minutes=minutes)
+    return Agent(
+        id=str(uuid.uuid4()), name=f"{family}-bot", agent_family_id=family, framework="CUSTOM",
+        environment=environment, status=status, created_at=created_at, updated_at=created_at
+    )
+
+def _deployment(agent, minutes, status):
+    return Deployment(
+        id=str(uuid.uuid4()), agent_id=agent.id, deployment_type="AGENT_ENGINE", version="1.0.0",
+        environment=agent.environment, project_id="fleet-dev", region="us-central1", status=status,
+        deployed_at=START + timedelta(minutes=minutes)
+    )
+
+@pytest.fixture
+async def families(db):
+    dev = _agent("alpha", 0)
+    uat = _agent("alpha", 1, "UAT", "TESTED")
+    prod = _agent("alpha", 2, "PRODUCTION", "DEPLOYED")
+    beta = _agent("beta", 3)
+    db.add_all([dev, uat, prod, beta])
+    db.add_all([
+        _deployment(uat, 5, "SUCCESSFUL"),
+        # Newer, but failed deployments are never the latest successful one
+        _deployment(prod, 6, "FAILED"),
+        _deployment(dev, 4, "SUCCESSFUL"),
+    ])
+    await db.commit()
+    return {"dev": dev, "uat": uat, "prod": prod, "beta": beta}
+
+@pytest.mark.anyio
+async def test_families_carry_counts_and_latest_members(client, families):
+    page = client.get("/api/agent-families").json()
+    alpha, beta = sorted(page["items"], key=lambda family: family["agentFamilyId"])
+
+    # Families are ordered by their newest member
+    assert [family["agentFamilyId"] for family in page["items"]] == ["beta", "alpha"]
+    assert alpha["agentCount"] == 3
+    assert alpha["countsByEnvironment"] == {"DEVELOPMENT": 1, "UAT": 1, "PRODUCTION": 1}
+    assert alpha["countsByStatus"] == {"DRAFT": 1, "TESTED": 1, "DEPLOYED": 1, "ARCHIVED": 0}
+    assert alpha["latestAgent"]["id"] == families["prod"].id
+    assert alpha["latestSuccessfulDeployment"]["agentId"] == families["uat"].id
+
+    assert beta["agentCount"] == 1
+    assert beta["latestAgent"]["id"] == families["beta"].id
+    assert beta["latestSuccessfulDeployment"] is None
+
+@pytest.mark.anyio
+async def test_environment_filter_keeps_whole_families(client, families):
+    items = client.get("/api/agent-families", params={"environment": "PRODUCTION"}).json()["items"]
+
+    # The filter selects families, but their counts still cover every member
+    assert [family["agentFamilyId"] for family in items] == ["alpha"]
+    assert items[0]["agentCount"] == 3
+
+@pytest.mark.anyio
+async def test_pages_cover_every_family_once(client, db):
+    # Two families share each newest timestamp, so page boundaries fall inside ties
+    db.add_all(_agent(f"family-{index}", index // 2) for index in range(7))
+    await db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/agent-families", params=params).json()
+        assert len(page["items"]) <= 3
+        seen.extend(family["agentFamilyId"] for family in page["items"])
+        cursor = page["nextCursor"]
+        if not cursor:
+            break
+
+    expected = sorted(
+        (f"family-{index}" for index in range(7)), key=lambda family: (int(family[-1]) // 2, family), reverse=True
+    )
+    assert seen == expected
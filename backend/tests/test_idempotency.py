@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import update
+
+from app.api.idempotency import IdempotencyMiddleware
+from app.database import AsyncSessionLocal, IdempotencyKey
+
+def _app(calls, delay=0.0):
+    app = FastAPI()
+
+    @app.post("/orders")
+    async def create_order(order: dict):
+        calls.append(order)
+        await asyncio.sleep(delay)
+        if order.get("invalid"):
+            raise HTTPException(status_code=400, detail="invalid order")
+        return {"order": len(calls)}
+
+    return app
+
+def _client(app):
+    # Each middleware instance stands in for a separate replica
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=IdempotencyMiddleware(app)), base_url="http://test")
+
+KEY = {"Idempotency-Key": "order-1"}
+
+@pytest.mark.anyio
+async def test_retry_on_another_replica_replays_the_response(db):
+    calls = []
+    app = _app(calls)
+    async with _client(app) as first, _client(app) as second:
+        original = await first.post("/orders", json={"sku": "a"}, headers=KEY)
+        retry = await second.post("/orders", json={"sku": "a"}, headers=KEY)
+
+    assert len(calls) == 1
+    assert retry.json() == original.json() == {"order": 1}
+    assert retry.headers["idempotent-replayed"] == "true"
+
+@pytest.mark.anyio
+async def test_concurrent_duplicate_waits_for_the_first_request(db):
+    calls = []
+    app = _app(calls, delay=0.3)
+    async with _client(app) as first, _client(app) as second:
+        responses = await asyncio.gather(
+            first.post("/orders", json={"sku": "a"}, headers=KEY),
+            second.post("/orders", json={"sku": "a"}, headers=KEY)
+        )
+
+    assert len(calls) == 1
+    assert [response.json() for response in responses] == [{"order": 1}, {"order": 1}]
+
+@pytest.mark.anyio
+async def test_reusing_a_key_with_another_body_is_rejected(db):
+    async with _client(_app([])) as client:
+        await client.post("/orders", json={"sku": "a"}, headers=KEY)
+        response = await client.post("/orders", json={"sku": "b"}, headers=KEY)
+
+    assert response.status_code == 422
+
+@pytest.mark.anyio
+async def test_client_errors_are_not_replayed(db):
+    calls = []
+    async with _client(_app(calls)) as client:
+        rejected = await client.post("/orders", json={"invalid": True}, headers=KEY)
+        retried = await client.post("/orders", json={"invalid": True}, headers=KEY)
+
+    assert rejected.status_code == retried.status_code == 400
+    assert "idempotent-replayed" not in retried.headers
+    assert len(calls) == 2
+
+@pytest.mark.anyio
+async def test_expired_key_runs_the_request_again(db):
+    calls = []
+    async with _client(_app(calls)) as client:
+        await client.post("/orders", json={"sku": "a"}, headers=KEY)
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(IdempotencyKey).values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+            )
+            await session.commit()
+        response = await client.post("/orders", json={"sku": "a"}, headers=KEY)
+
+    assert response.json() == {"order": 2}
+    assert "idempotent-replayed" not in response.headers
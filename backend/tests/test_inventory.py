@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+import pytest
+
+from app.api import inventory as inventory_api
+from app.services.container import get_vertex_service
+
+class FakeVertex:
+    """Lists two pages per target; the broken region fails after its first page."""
+
+    async def iter_agent_pages(self, project_id, region):
+        for page in range(2):
+            if region == "broken" and page == 1:
+                raise RuntimeError(f"403 listing {project_id}")
+            await asyncio.sleep(0)
+            yield [{"name": f"{project_id}/{region}/engine-{page}"}]
+
+@pytest.fixture
+def inventory(client):
+    client.app.dependency_overrides[get_vertex_service] = FakeVertex
+    yield lambda **params: client.get("/api/inventory/agents", params=params)
+    client.app.dependency_overrides.clear()
+
+def test_a_failing_target_yields_an_error_item_while_others_stream(inventory):
+    response = inventory(projects=["alpha", "beta"], regions=["us-central1", "broken"])
+
+    assert response.status_code == 200
+    items = [json.loads(line) for line in response.text.splitlines()]
+    engines = {item["name"] for item in items if "name" in item}
+    errors = [item for item in items if "error" in item]
+
+    assert engines == {
+        f"{project}/{region}/engine-{page}"
+        for project in ("alpha", "beta") for region in ("us-central1", "broken") for page in range(2)
+        if not (region == "broken" and page == 1)
+    }
+    assert sorted((error["projectId"], error["region"], error["error"]) for error in errors) == [
+        ("alpha", "broken", "403 listing alpha"),
+        ("beta", "broken", "403 listing beta"),
+    ]
+    # Every item is tagged with the target it came from
+    assert all(item["name"].startswith(f"{item['projectId']}/{item['region']}/") for item in items if "name" in item)
+
+def test_targets_are_required(inventory, monkeypatch):
+    monkeypatch.setattr(inventory_api, "FLEET_PROJECTS", [])
+    assert inventory(regions=["us-central1"]).status_code == 400
@@ -0,0 +1,77 @@
+import uuid
+
+import pytest
+
+from app.api.agents import MAX_LINEAGE_DEPTH
+from app.database import Agent, AgentLineage
+
+ENVIRONMENTS = ["DEVELOPMENT", "UAT", "PRODUCTION"]
+
+async def _agents(db, count):
+    agents = [
+        Agent(id=str(uuid.uuid4()), name=f"bot-{index}", agent_family_id="family", framework="CUSTOM")
+        for index in range(count)
+    ]
+    db.add_all(agents)
+    return [agent.id for agent in agents]
+
+def _edge(parent_id, child_id, index=0):
+    return AgentLineage(
+        parent_agent_id=parent_id, parent_environment=ENVIRONMENTS[index % 3],
+        child_agent_id=child_id, child_environment=ENVIRONMENTS[(index + 1) % 3]
+    )
+
+def _nodes(graph):
+    return {node["id"]: (node["direction"], node["depth"]) for node in graph["nodes"]}
+
+@pytest.mark.anyio
+async def test_graph_follows_both_directions_up_to_max_depth(client, db):
+    chain = await _agents(db, 6)
+    db.add_all(_edge(parent, child, index) for index, (parent, child) in enumerate(zip(chain, chain[1:])))
+    await db.commit()
+
+    graph = client.get(f"/api/agents/{chain[2]}/lineage/graph", params={"max_depth": 2}).json()
+
+    assert _nodes(graph) == {
+        chain[0]: ("ancestor", 2),
+        chain[1]: ("ancestor", 1),
+        chain[2]: ("self", 0),
+        chain[3]: ("descendant", 1),
+        chain[4]: ("descendant", 2),
+    }
+    assert {(edge["parentAgentId"], edge["childAgentId"]) for edge in graph["edges"]} == set(zip(chain[:4], chain[1:5]))
+
+    # One more hop reaches the end of the chain
+    deeper = client.get(f"/api/agents/{chain[2]}/lineage/graph", params={"max_depth": 3}).json()
+    assert _nodes(deeper)[chain[5]] == ("descendant", 3)
+
+@pytest.mark.anyio
+async def test_graph_stops_at_cycles(client, db):
+    first, second, third = await _agents(db, 3)
+    db.add_all([_edge(first, second), _edge(second, third, 1), _edge(third, first, 2)])
+    await db.commit()
+
+    graph = client.get(f"/api/agents/{first}/lineage/graph", params={"max_depth": MAX_LINEAGE_DEPTH}).json()
+
+    # Each node and edge appears once, at its shortest distance
+    assert _nodes(graph) == {first: ("self", 0), second: ("descendant", 1), third: ("ancestor", 1)}
+    assert len(graph["edges"]) == 3
+
+@pytest.mark.anyio
+async def test_remote_agents_are_nodes_known_only_by_id(client, db):
+    (local,) = await _agents(db, 1)
+    remote = str(uuid.uuid4())
+    db.add(_edge(local, remote))
+    await db.commit()
+
+    nodes = {node["id"]: node for node in client.get(f"/api/agents/{local}/lineage/graph").json()["nodes"]}
+
+    assert nodes[local]["local"] and nodes[local]["name"] == "bot-0"
+    assert nodes[remote]["local"] is False and nodes[remote]["name"] is None
+    assert nodes[remote]["environment"] == "UAT"
+
+def test_depth_is_bounded(client):
+    assert client.get(
+        "/api/agents/missing/lineage/graph", params={"max_depth": MAX_LINEAGE_DEPTH + 1}
+    ).status_code == 422
+    assert client.get("/api/agents/missing/lineage/graph").status_code == 404
@@ -0,0 +1,133 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.api import deployments
+from app.database import Agent, Deployment, DeploymentStatus, Job, JobStatus, JobType
+from app.services import operation_poller
+from app.services.job_queue import JobWorkerPool, enqueue
+from app.services.operation_poller import OperationPoller
+
+# A loop time at which every tracked operation is due
+FAR_FUTURE = 10 ** 9
+OPERATION = "projects/fleet-dev/locations/us-central1/reasoningEngines/42/operations/7"
+
+class FakeVertex:
+    def __init__(self, operation=None):
+        self.operation = operation
+
+    async def deploy_agent(self, agent_id, project_id, region):
+        return {"name": OPERATION, "done": False}
+
+    async def get_operation(self, region, name):
+        return self.operation
+
+async def _in_progress(db, operation_name=OPERATION):
+    agent = Agent(id=str(uuid.uuid4()), name="bot", agent_family_id="family", framework="CUSTOM")
+    deployment = Deployment(
+        id=str(uuid.uuid4()), agent_id=agent.id, deployment_type="AGENT_ENGINE", version="1.0.0",
+        environment="DEVELOPMENT", project_id="fleet-dev", region="us-central1",
+        status=DeploymentStatus.IN_PROGRESS.value, operation_name=operation_name
+    )
+    db.add_all([agent, deployment])
+    await db.commit()
+    return deployment
+
+async def _reload(db, model, id):
+    db.expire_all()
+    return await db.get(model, id)
+
+@pytest.mark.anyio
+async def test_deploy_job_stays_running_until_its_operation_completes(db, monkeypatch):
+    deployment = await _in_progress(db, operation_name=None)
+    job = enqueue(
+        db, JobType.DEPLOY_AGENT.value, agent_id=deployment.agent_id, deployment_id=deployment.id
+    )
+    await db.commit()
+    job_id, deployment_id = job.id, deployment.id
+    monkeypatch.setattr(deployments, "get_vertex_service", lambda: FakeVertex())
+
+    pool = JobWorkerPool(workers=0)
+    assert await pool._claim() == job_id
+    await pool._execute(job_id)
+
+    job = await _reload(db, Job, job_id)
+    assert job.status == JobStatus.RUNNING.value
+    assert job.progress == 50
+    assert job.result["operationName"] == OPERATION
+    assert job.locked_by is None and job.locked_until is None
+    assert await pool._claim() is None
+
+    done = {"name": OPERATION, "done": True, "response": {"name": OPERATION.split("/operations/")[0]}}
+    monkeypatch.setattr(operation_poller, "get_vertex_service", lambda: FakeVertex(done))
+    poller = OperationPoller()
+    await poller._refresh(0)
+    await poller._poll_due(FAR_FUTURE)
+
+    job = await _reload(db, Job, job_id)
+    assert job.status == JobStatus.SUCCEEDED.value
+    assert job.progress == 100
+    assert job.result["operationName"] == OPERATION
+    deployment = await _reload(db, Deployment, deployment_id)
+    assert deployment.status == DeploymentStatus.SUCCESSFUL.value
+    assert deployment.operation_polled_by is None
+
+@pytest.mark.anyio
+async def test_failed_operation_fails_the_waiting_job(db, monkeypatch):
+    deployment = await _in_progress(db)
+    job = enqueue(db, JobType.DEPLOY_AGENT.value, deployment_id=deployment.id)
+    job.status = JobStatus.RUNNING.value
+    await db.commit()
+    job_id, deployment_id = job.id, deployment.id
+
+    failed = {"name": OPERATION, "done": True, "error": {"message": "quota exceeded"}}
+    monkeypatch.setattr(operation_poller, "get_vertex_service", lambda: FakeVertex(failed))
+    poller = OperationPoller()
+    await poller._refresh(0)
+    await poller._poll_due(FAR_FUTURE)
+
+    job = await _reload(db, Job, job_id)
+    assert job.status == JobStatus.FAILED.value
+    assert job.error == "quota exceeded"
+    deployment = await _reload(db, Deployment, deployment_id)
+    assert deployment.status == DeploymentStatus.FAILED.value
+
+@pytest.mark.anyio
+async def test_each_operation_is_polled_by_one_replica(db):
+    deployment_id = (await _in_progress(db)).id
+    first, second = OperationPoller(), OperationPoller()
+    first.poller_id, second.poller_id = "replica-a", "replica-b"
+
+    await first._refresh(0)
+    await second._refresh(0)
+    assert list(first._operations) == [OPERATION]
+    assert second._operations == {}
+
+    # Once the owner stops renewing, its lease lapses and another replica takes over
+    deployment = await _reload(db, Deployment, deployment_id)
+    deployment.operation_lease_until = datetime.utcnow() - timedelta(seconds=1)
+    await db.commit()
+    await second._refresh(0)
+    await first._refresh(0)
+    assert list(second._operations) == [OPERATION]
+    assert first._operations == {}
+
+@pytest.mark.anyio
+async def test_poller_backs_off_after_failures(monkeypatch):
+    refreshes = []
+
+    async def failing_refresh(now):
+        refreshes.append(now)
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(operation_poller, "OPERATION_POLL_INITIAL_SECONDS", 0.05)
+    poller = OperationPoller()
+    monkeypatch.setattr(poller, "_refresh", failing_refresh)
+    poller.start()
+    await asyncio.sleep(0.3)
+    await poller.stop()
+
+    # 0.05s, 0.1s, 0.2s apart instead of a busy loop
+    assert 2 <= len(refreshes) <= 4
@@ -0,0 +1,50 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.pagination import decode_cursor, encode_cursor
+from app.database import Agent
+
+def test_cursor_round_trip():
+    sort_value = datetime(2025, 3, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(sort_value, "abc")) == (sort_value, "abc")
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
+
+def _agent(created_at: datetime) -> Agent:
+    return Agent(
+        id=str(uuid.uuid4()),
+        name="agent",
+        agent_family_id=str(uuid.uuid4()),
+        framework="CUSTOM",
+        created_at=created_at,
+        updated_at=created_at
+    )
+
+@pytest.mark.anyio
+async def test_pages_cover_every_row_once_including_timestamp_ties(db, client):
+    start = datetime(2025, 1, 1)
+    # Three agents share each timestamp, so page boundaries fall inside ties
+    agents = [_agent(start + timedelta(minutes=i // 3)) for i in range(10)]
+    db.add_all(agents)
+    await db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/agents", params=params).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["nextCursor"]
+        if not cursor:
+            break
+
+    expected = sorted(agents, key=lambda agent: (agent.created_at, agent.id), reverse=True)
+    assert seen == [agent.id for agent in expected]
+
+def test_bad_cursor_returns_400(client):
+    assert client.get("/api/agents", params={"cursor": "garbage"}).status_code == 400
@@ -0,0 +1,64 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import Agent, Deployment
+
+@pytest.fixture
+async def agent_ids(db):
+    start = datetime(2025, 1, 1)
+    agents = [
+        Agent(
+            id=str(uuid.uuid4()), name=f"bot-{index}", agent_family_id="family", framework="CUSTOM",
+            system_instruction="Be helpful", configuration={"tools": []},
+            created_at=start + timedelta(minutes=index), updated_at=start + timedelta(minutes=index)
+        )
+        for index in range(3)
+    ]
+    db.add_all(agents)
+    db.add(Deployment(
+        id=str(uuid.uuid4()), agent_id=agents[0].id, deployment_type="AGENT_ENGINE", version="1.0.0",
+        environment="DEVELOPMENT", project_id="fleet-dev", region="us-central1", status="SUCCESSFUL"
+    ))
+    await db.commit()
+    return [agent.id for agent in agents]
+
+@pytest.mark.anyio
+async def test_requested_fields_are_the_only_keys(client, agent_ids):
+    items = client.get("/api/agents", params={"fields": "name,status"}).json()["items"]
+    # The id is always included so items stay addressable
+    assert [set(item) for item in items] == [{"id", "name", "status"}] * 3
+    assert [item["name"] for item in items] == ["bot-2", "bot-1", "bot-0"]
+
+    deployments = client.get("/api/deployments", params={"fields": "region"}).json()["items"]
+    assert deployments == [{"id": deployments[0]["id"], "region": "us-central1"}]
+
+@pytest.mark.anyio
+async def test_sparse_pages_still_carry_cursors(client, agent_ids):
+    # The sort key is selected for the cursor even when it is not a requested field
+    first = client.get("/api/agents", params={"fields": "name", "limit": 2}).json()
+    second = client.get("/api/agents", params={"fields": "name", "limit": 2, "cursor": first["nextCursor"]}).json()
+    assert [item["name"] for item in first["items"] + second["items"]] == ["bot-2", "bot-1", "bot-0"]
+    assert all(set(item) == {"id", "name"} for item in first["items"] + second["items"])
+
+@pytest.mark.anyio
+async def test_streams_use_the_same_projection(client, agent_ids):
+    response = client.get("/api/agents", params={"fields": "name", "stream": "ndjson"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [set(row) for row in rows] == [{"id", "name"}] * 3
+
+@pytest.mark.anyio
+async def test_summary_leaves_out_large_columns(client, agent_ids):
+    summary = client.get("/api/agents").json()["items"][0]
+    assert "systemInstruction" not in summary and "configuration" not in summary
+
+    full = client.get("/api/agents", params={"fields": "all"}).json()["items"][0]
+    assert full["systemInstruction"] == "Be helpful"
+
+@pytest.mark.parametrize("path", ["/api/agents", "/api/deployments"])
+def test_unknown_fields_return_400(client, path):
+    response = client.get(path, params={"fields": "id,nope,secret"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: nope, secret"
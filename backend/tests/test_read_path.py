@@ -0,0 +1,39 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.api import agents, deployments
+from app.database import Agent, Deployment
+from app.models.agent import AgentResponse, DeploymentResponse
+
+@pytest.fixture
+async def deployment(db):
+    agent = Agent(id=str(uuid.uuid4()), name="bot", agent_family_id="family", framework="CUSTOM")
+    deployment = Deployment(
+        id=str(uuid.uuid4()), agent_id=agent.id, deployment_type="AGENT_ENGINE", version="1.0.0",
+        environment="DEVELOPMENT", project_id="fleet-dev", region="us-central1", status="SUCCESSFUL",
+        deployed_at=datetime(2026, 1, 1)
+    )
+    db.add_all([agent, deployment])
+    await db.commit()
+    return deployment
+
+@pytest.mark.parametrize("router, path, model", [
+    (agents.router, "/agents/{agent_id}", AgentResponse),
+    (deployments.router, "/deployments/{deployment_id}", DeploymentResponse),
+])
+def test_item_endpoints_skip_response_model_validation(router, path, model):
+    route = next(route for route in router.routes if route.path == path and "GET" in route.methods)
+    assert route.response_model is None
+    assert route.responses[200]["model"] is model
+
+@pytest.mark.anyio
+async def test_item_endpoints_return_every_documented_field(client, deployment):
+    agent = client.get(f"/api/agents/{deployment.agent_id}").json()
+    fetched = client.get(f"/api/deployments/{deployment.id}").json()
+
+    assert set(agent) == set(AgentResponse.model_fields)
+    assert set(fetched) == set(DeploymentResponse.model_fields)
+    assert fetched["deployedAt"] == "2026-01-01T00:00:00"
+    assert client.get("/api/agents/missing").status_code == 404
@@ -0,0 +1,190 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.database import Agent, Deployment, DeploymentStatus, Job, JobStatus, JobType, ReconciliationWatermark
+from app.services.job_queue import enqueue
+from app.services.reconciliation import _apply_target, engine_suffix, parse_update_time, queue_reconciliation
+
+PROJECT, REGION = "fleet-prod", "us-central1"
+COLLECTION = f"projects/{PROJECT}/locations/{REGION}/reasoningEngines"
+# How Vertex AI lists the same engines: under the project number
+LISTED = f"projects/123456789/locations/{REGION}/reasoningEngines"
+
+def _report():
+    return {
+        "inserted": 0, "restored": 0, "markedDeleted": 0, "unmatched": 0,
+        "unmatchedEngines": [], "failedTargets": []
+    }
+
+async def _seed(db, name="support-bot", environment="PRODUCTION"):
+    agent = Agent(
+        id=str(uuid.uuid4()), name=name, agent_family_id=str(uuid.uuid4()),
+        framework="CUSTOM", environment=environment
+    )
+    db.add(agent)
+    await db.commit()
+    return agent
+
+async def _deploy(db, agent, resource_name, status=DeploymentStatus.SUCCESSFUL.value, project_id=PROJECT):
+    deployment = Deployment(
+        id=str(uuid.uuid4()), agent_id=agent.id, deployment_type="AGENT_ENGINE", version="1.0.0",
+        environment=agent.environment, project_id=project_id, region=REGION,
+        resource_name=resource_name, status=status,
+        deployed_at=datetime.utcnow() - timedelta(hours=1),
+        updated_at=datetime.utcnow() - timedelta(hours=1)
+    )
+    db.add(deployment)
+    await db.commit()
+    return deployment
+
+async def _statuses(db, agent):
+    rows = (await db.execute(
+        select(Deployment.resource_name, Deployment.status).where(Deployment.agent_id == agent.id)
+    )).all()
+    return {row.resource_name: row.status for row in rows}
+
+def test_parse_update_time_handles_nanoseconds_and_offsets():
+    assert parse_update_time("2026-01-01T00:00:00.123456789Z") == datetime(2026, 1, 1, 0, 0, 0, 123456)
+    assert parse_update_time("2026-01-01T02:00:00+02:00") == datetime(2026, 1, 1)
+    assert parse_update_time("yesterday") is None
+
+def test_engine_suffix_drops_the_project():
+    assert engine_suffix(f"{LISTED}/42") == engine_suffix(f"{COLLECTION}/42") == f"locations/{REGION}/reasoningEngines/42"
+    assert engine_suffix("not-an-engine") == "not-an-engine"
+
+@pytest.mark.anyio
+async def test_full_sweep_applies_inserts_deletions_and_unmatched(db):
+    agent = await _seed(db)
+    await _deploy(db, agent, f"{COLLECTION}/kept")
+    await _deploy(db, agent, f"{COLLECTION}/gone")
+    engines = [
+        {"name": f"{COLLECTION}/kept", "displayName": "support-bot", "updateTime": "2026-01-01T00:00:00Z"},
+        {"name": f"{COLLECTION}/new", "displayName": "support-bot", "updateTime": "2026-01-02T00:00:00Z"},
+        {"name": f"{COLLECTION}/stray", "displayName": "unknown", "updateTime": "2026-01-03T00:00:00Z"},
+    ]
+
+    report = _report()
+    await _apply_target(db, PROJECT, REGION, engines, True, datetime.utcnow(), report)
+    await db.commit()
+
+    assert (report["inserted"], report["markedDeleted"], report["unmatched"]) == (1, 1, 1)
+    assert await _statuses(db, agent) == {
+        f"{COLLECTION}/kept": DeploymentStatus.SUCCESSFUL.value,
+        f"{COLLECTION}/gone": DeploymentStatus.DELETED.value,
+        f"{COLLECTION}/new": DeploymentStatus.SUCCESSFUL.value,
+    }
+    watermark = await db.get(ReconciliationWatermark, (PROJECT, REGION))
+    assert watermark.update_time == datetime(2026, 1, 3)
+
+@pytest.mark.anyio
+async def test_incremental_pass_never_marks_deletions(db):
+    agent = await _seed(db)
+    await _deploy(db, agent, f"{COLLECTION}/unchanged")
+
+    report = _report()
+    await _apply_target(db, PROJECT, REGION, [], False, datetime.utcnow(), report)
+    await db.commit()
+
+    assert report["markedDeleted"] == 0
+    assert await _statuses(db, agent) == {f"{COLLECTION}/unchanged": DeploymentStatus.SUCCESSFUL.value}
+
+@pytest.mark.anyio
+async def test_reappearing_engine_restores_deleted_deployment(db):
+    agent = await _seed(db)
+    await _deploy(db, agent, f"{COLLECTION}/back", status=DeploymentStatus.DELETED.value)
+
+    report = _report()
+    engines = [{"name": f"{COLLECTION}/back", "displayName": "support-bot"}]
+    await _apply_target(db, PROJECT, REGION, engines, True, datetime.utcnow(), report)
+    await db.commit()
+
+    assert report["restored"] == 1
+    assert await _statuses(db, agent) == {f"{COLLECTION}/back": DeploymentStatus.SUCCESSFUL.value}
+
+@pytest.mark.anyio
+async def test_deployments_written_during_the_listing_are_left_alone(db):
+    agent = await _seed(db)
+    listed_at = datetime.utcnow() - timedelta(minutes=30)
+    # Older than the listing start, so its engine should have been listed
+    await _deploy(db, agent, f"{COLLECTION}/missing")
+    recent = await _deploy(db, agent, f"{COLLECTION}/just-created")
+    recent.updated_at = datetime.utcnow()
+    await db.commit()
+
+    report = _report()
+    await _apply_target(db, PROJECT, REGION, [], True, listed_at, report)
+    await db.commit()
+
+    assert await _statuses(db, agent) == {
+        f"{COLLECTION}/missing": DeploymentStatus.DELETED.value,
+        f"{COLLECTION}/just-created": DeploymentStatus.SUCCESSFUL.value,
+    }
+
+@pytest.mark.anyio
+async def test_engines_listed_by_project_number_match_deployments_by_project_id(db):
+    agent = await _seed(db)
+    await _deploy(db, agent, f"{COLLECTION}/kept")
+    await _deploy(db, agent, f"{COLLECTION}/back", status=DeploymentStatus.DELETED.value)
+    engines = [
+        {"name": f"{LISTED}/kept", "displayName": "support-bot"},
+        {"name": f"{LISTED}/back", "displayName": "support-bot"},
+    ]
+
+    report = _report()
+    await _apply_target(db, PROJECT, REGION, engines, True, datetime.utcnow(), report)
+    await db.commit()
+
+    assert (report["inserted"], report["restored"], report["markedDeleted"]) == (0, 1, 0)
+    assert await _statuses(db, agent) == {
+        f"{COLLECTION}/kept": DeploymentStatus.SUCCESSFUL.value,
+        f"{COLLECTION}/back": DeploymentStatus.SUCCESSFUL.value,
+    }
+
+@pytest.mark.anyio
+async def test_unknown_engines_go_to_the_agent_in_the_projects_environment(db):
+    production = await _seed(db)
+    development = await _seed(db, environment="DEVELOPMENT")
+    await _deploy(db, production, f"{COLLECTION}/existing")
+
+    report = _report()
+    engines = [{"name": f"{LISTED}/new", "displayName": "support-bot"}]
+    await _apply_target(db, PROJECT, REGION, engines, False, datetime.utcnow(), report)
+    await db.commit()
+
+    assert report["inserted"] == 1
+    assert f"{LISTED}/new" in await _statuses(db, production)
+    assert await _statuses(db, development) == {}
+
+@pytest.mark.anyio
+async def test_display_name_spanning_environments_is_left_unmatched(db):
+    await _seed(db)
+    await _seed(db, environment="DEVELOPMENT")
+
+    report = _report()
+    engines = [{"name": f"projects/fresh/locations/{REGION}/reasoningEngines/1", "displayName": "support-bot"}]
+    await _apply_target(db, "fresh", REGION, engines, False, datetime.utcnow(), report)
+    await db.commit()
+
+    assert (report["inserted"], report["unmatched"]) == (0, 1)
+
+@pytest.mark.anyio
+async def test_racing_queue_returns_the_active_pass(db):
+    active = enqueue(db, JobType.RECONCILE_FLEET.value)
+    active.created_at = datetime.utcnow() - timedelta(minutes=2)
+    # The newest pass has finished, so the check passes and only the unique index stops a second one
+    finished = enqueue(db, JobType.RECONCILE_FLEET.value)
+    finished.status = JobStatus.SUCCEEDED.value
+    finished.created_at = datetime.utcnow() - timedelta(minutes=1)
+    await db.commit()
+    active_id = active.id
+
+    job, queued = await queue_reconciliation(db)
+
+    assert (job.id, queued) == (active_id, False)
+    pending = (await db.execute(
+        select(Job.id).where(Job.job_type == JobType.RECONCILE_FLEET.value, Job.status == JobStatus.PENDING.value)
+    )).scalars().all()
+    assert pending == [active_id]
@@ -0,0 +1,79 @@
+def _registration(**overrides):
+    payload = {
+        "name": "support-bot",
+        "framework": "CUSTOM",
+        "repositoryUrl": "https://example.com/support-bot.git",
+        "sourceHash": "abc123",
+        "environment": "DEVELOPMENT",
+        "projectId": "fleet-dev",
+        "modelId": "gemini-1.5-pro",
+        "deploymentInfo": {"resourceName": "projects/fleet-dev/locations/us-central1/reasoningEngines/1"},
+    }
+    payload.update(overrides)
+    return payload
+
+def test_repeated_registration_returns_the_existing_agent(client):
+    first = client.post("/api/agents/register", json=_registration()).json()
+    retry = client.post("/api/agents/register", json=_registration(description="retried")).json()
+
+    assert retry["id"] == first["id"]
+    deployments = client.get("/api/deployments", params={"agent_id": first["id"]}).json()["items"]
+    assert len(deployments) == 1
+
+def test_new_source_hash_joins_the_existing_family(client):
+    first = client.post("/api/agents/register", json=_registration()).json()
+    second = client.post("/api/agents/register", json=_registration(sourceHash="def456")).json()
+
+    assert second["id"] != first["id"]
+    assert second["agentFamilyId"] == first["agentFamilyId"]
+
+def test_batch_registration_reports_created_existing_and_invalid_items(client):
+    client.post("/api/agents/register", json=_registration())
+
+    response = client.post("/api/agents/register:batch", json=[
+        _registration(),  # already registered
+        _registration(sourceHash="new"),
+        _registration(sourceHash="new"),  # repeat within the batch
+        {"name": "missing-fields"},
+    ]).json()
+
+    assert [result["status"] for result in response["results"]] == ["existing", "created", "existing", "error"]
+    assert (response["created"], response["existing"], response["failed"]) == (1, 2, 1)
+    assert response["results"][1]["agent"]["id"] == response["results"][2]["agent"]["id"]
+
+def _regions(client, agent_id):
+    deployments = client.get("/api/deployments", params={"agent_id": agent_id}).json()["items"]
+    return sorted(deployment["region"] for deployment in deployments)
+
+def test_registering_a_known_source_in_a_new_region_records_the_deployment(client):
+    first = client.post("/api/agents/register", json=_registration()).json()
+    europe = _registration(
+        region="europe-west1",
+        deploymentInfo={"resourceName": "projects/fleet-dev/locations/europe-west1/reasoningEngines/2"}
+    )
+    second = client.post("/api/agents/register", json=europe).json()
+    client.post("/api/agents/register", json=europe)
+
+    assert second["id"] == first["id"]
+    assert _regions(client, first["id"]) == ["europe-west1", "us-central1"]
+
+def test_batch_registration_records_new_deployments_of_existing_agents(client):
+    agent = client.post("/api/agents/register", json=_registration()).json()
+
+    response = client.post("/api/agents/register:batch", json=[
+        _registration(),
+        _registration(
+            sourceHash="other",
+            deploymentInfo={"resourceName": "projects/fleet-dev/locations/us-central1/reasoningEngines/3"}
+        ),
+    ]).json()
+    client.post("/api/agents/register:batch", json=[
+        _registration(
+            region="europe-west1",
+            deploymentInfo={"resourceName": "projects/fleet-dev/locations/europe-west1/reasoningEngines/2"}
+        ),
+    ])
+
+    assert [result["status"] for result in response["results"]] == ["existing", "created"]
+    assert _regions(client, agent["id"]) == ["europe-west1", "us-central1"]
+    assert _regions(client, response["results"][1]["agent"]["id"]) == ["us-central1"]
@@ -0,0 +1,100 @@
+import httpx
+import pytest
+
+from app.services import resilience
+from app.services.resilience import CircuitBreaker, CircuitOpenError, ResilientSender
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert not breaker.allow()
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow()
+
+def test_half_open_lets_one_trial_through_and_closes_on_success(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock[0] += 31
+
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+def test_failed_trial_reopens_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_seconds=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 31
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock[0] += 31
+    assert breaker.allow()
+
+def test_lost_trial_is_replaced_after_another_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock[0] += 31
+    assert breaker.allow()  # this trial never reports back
+
+    clock[0] += 31
+    assert breaker.allow()
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    async def sleep(seconds):
+        return None
+    monkeypatch.setattr(resilience.asyncio, "sleep", sleep)
+
+def _responder(statuses):
+    calls = []
+
+    async def request():
+        calls.append(1)
+        return httpx.Response(statuses[len(calls) - 1], request=httpx.Request("GET", "https://vertex.test"))
+    return request, calls
+
+@pytest.mark.anyio
+async def test_idempotent_request_is_retried_until_success(no_backoff):
+    request, calls = _responder([503, 502, 200])
+    response = await ResilientSender().send(request, "us-central1", "get_agent", idempotent=True)
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+@pytest.mark.anyio
+async def test_non_idempotent_request_is_not_retried_after_a_server_error(no_backoff):
+    request, calls = _responder([500, 200])
+    with pytest.raises(httpx.HTTPStatusError):
+        await ResilientSender().send(request, "us-central1", "create_agent", idempotent=False)
+    assert len(calls) == 1
+
+@pytest.mark.anyio
+async def test_open_circuit_stops_retries_and_fails_fast(no_backoff):
+    sender = ResilientSender()
+    sender.breakers["europe-west4"] = CircuitBreaker(failure_threshold=2)
+    request, calls = _responder([503] * 10)
+
+    # The circuit opens on the second failure, before the third attempt
+    with pytest.raises(CircuitOpenError):
+        await sender.send(request, "europe-west4", "get_agent", idempotent=True)
+    with pytest.raises(CircuitOpenError):
+        await sender.send(request, "europe-west4", "get_agent", idempotent=True)
+    assert len(calls) == 2
@@ -0,0 +1,57 @@
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.api.responses import dumps
+from app.database import Agent, async_engine
+from app.services.operation_poller import operation_poller
+
+def test_dumps_handles_sets_and_native_types():
+    assert json.loads(dumps({"tags": {"a"}, "at": datetime(2025, 1, 1)})) == {
+        "tags": ["a"], "at": "2025-01-01T00:00:00"
+    }
+
+@pytest.mark.parametrize("value", [Decimal("1.5"), object()])
+def test_dumps_rejects_unknown_types(value):
+    with pytest.raises(TypeError):
+        dumps({"value": value})
+
+@pytest.fixture
+def idle_app(monkeypatch):
+    # The operation poller queries as soon as the app starts, racing the request's connection
+    monkeypatch.setattr(operation_poller, "start", lambda: None)
+
+@pytest.mark.anyio
+async def test_streamed_list_holds_one_connection(db, idle_app, client):
+    db.add_all([
+        Agent(id=str(uuid.uuid4()), name=f"agent-{i}", agent_family_id="family", framework="CUSTOM")
+        for i in range(3)
+    ])
+    await db.commit()
+    await db.close()
+
+    checked_out, peak = 0, 0
+
+    def checkout(*args):
+        nonlocal checked_out, peak
+        checked_out += 1
+        peak = max(peak, checked_out)
+
+    def checkin(*args):
+        nonlocal checked_out
+        checked_out -= 1
+
+    event.listen(async_engine.sync_engine, "checkout", checkout)
+    event.listen(async_engine.sync_engine, "checkin", checkin)
+    try:
+        response = client.get("/api/agents", params={"stream": "ndjson"})
+    finally:
+        event.remove(async_engine.sync_engine, "checkout", checkout)
+        event.remove(async_engine.sync_engine, "checkin", checkin)
+
+    assert len(response.text.splitlines()) == 3
+    assert peak == 1
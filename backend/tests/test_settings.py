@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stands in for a .env file: values appear only once load_dotenv() is called
+PROBE = """
+import os, dotenv
+def load_dotenv(*args, **kwargs):
+    os.environ["DB_POOL_SIZE"] = "7"
+    os.environ["DB_PGBOUNCER_MODE"] = "true"
+    return True
+dotenv.load_dotenv = load_dotenv
+import app.main
+from app import database
+print(database.DB_POOL_SIZE, database.DB_PGBOUNCER_MODE)
+"""
+
+def test_dotenv_values_reach_import_time_settings():
+    env = {key: value for key, value in os.environ.items() if key not in ("DB_POOL_SIZE", "DB_PGBOUNCER_MODE")}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+        check=True, capture_output=True, text=True
+    ).stdout
+    assert output.split() == ["7", "True"]
@@ -0,0 +1,29 @@
+import tempfile
+
+import pytest
+
+from benchmarks.startup import LAZY_MODULES, create_schema, measure_import, measure_ready, scratch_env
+
+# Generous against a typical import of well under a second, so only real regressions fail
+IMPORT_BUDGET_SECONDS = 5.0
+# Likewise against a typical first healthy response of about a second
+READY_BUDGET_SECONDS = 10.0
+
+@pytest.fixture(scope="module")
+def startup_env():
+    with tempfile.TemporaryDirectory() as workdir:
+        env = scratch_env(workdir)
+        create_schema(env)
+        yield env
+
+def test_app_imports_within_budget_without_sdks(startup_env):
+    probe = measure_import(startup_env)
+
+    assert probe["seconds"] < IMPORT_BUDGET_SECONDS
+    assert probe["loaded"] == [], f"imported eagerly: {probe['loaded']} (expected lazy: {LAZY_MODULES})"
+
+def test_server_answers_health_checks_within_budget(startup_env):
+    # Times out well past the budget, so a slow start fails the assertion rather than erroring
+    seconds = measure_ready(startup_env, timeout=READY_BUDGET_SECONDS * 4)
+
+    assert seconds < READY_BUDGET_SECONDS
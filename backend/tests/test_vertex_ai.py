@@ -0,0 +1,54 @@
+import httpx
+import pytest
+
+from app.services import resilience, vertex_ai
+from app.services.resilience import ResilientSender
+from app.services.vertex_ai import VertexAIService
+
+class FakeTokens:
+    def __init__(self):
+        self.issued = 0
+
+    async def get_token(self):
+        self.issued += 1
+        return f"token-{self.issued}"
+
+class FakeClient:
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.requests = []
+
+    async def request(self, method, url, headers=None, **kwargs):
+        self.requests.append(headers["Authorization"])
+        status = self.statuses[len(self.requests) - 1]
+        return httpx.Response(status, json={}, request=httpx.Request(method, url))
+
+@pytest.fixture
+def service(monkeypatch):
+    async def sleep(seconds):
+        return None
+    monkeypatch.setattr(resilience.asyncio, "sleep", sleep)
+
+    # Skips credential loading; only the token provider and sender are used
+    service = VertexAIService.__new__(VertexAIService)
+    service.token_provider = FakeTokens()
+    service.sender = ResilientSender()
+    return service
+
+def _client(monkeypatch, statuses):
+    client = FakeClient(statuses)
+    monkeypatch.setattr(vertex_ai, "get_http_client", lambda: client)
+    return client
+
+@pytest.mark.anyio
+async def test_each_retry_fetches_a_fresh_auth_header(service, monkeypatch):
+    client = _client(monkeypatch, [503, 503, 200])
+    await service.get_operation("us-central1", "projects/p/locations/us-central1/operations/1")
+    assert client.requests == ["Bearer token-1", "Bearer token-2", "Bearer token-3"]
+
+@pytest.mark.anyio
+async def test_agent_queries_are_not_retried_after_a_server_error(service, monkeypatch):
+    client = _client(monkeypatch, [500, 200])
+    with pytest.raises(httpx.HTTPStatusError):
+        await service.query_agent("p", "us-central1", "42", "hello")
+    assert len(client.requests) == 1
@@ -1,12 +1,48 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { ChevronDown } from 'lucide-react';
+import { fetchInventoryTargets, fetchAgentInventory } from '../../services/apiService';
 
 const ProjectSelector = ({ projectId, region, updateProjectSettings }) => {
   const [isOpen, setIsOpen] = useState(false);
   const [inputProjectId, setInputProjectId] = useState(projectId || '');
   const [inputRegion, setInputRegion] = useState(region || 'us-central1');
+  const [fleetProjects, setFleetProjects] = useState([]);
+  const [engineCounts, setEngineCounts] = useState({});
+  const [fleetRegions, setFleetRegions] = useState([]);
   
-  const regions = [
+  // Load the fleet's projects once, then count their reasoning engines as the inventory streams in
+  useEffect(() => {
+    if (!isOpen || fleetProjects.length) {
+      return;
+    }
+    
+    const loadFleet = async () => {
+      try {
+        const targets = await fetchInventoryTargets();
+        setFleetProjects(targets.projects);
+        setFleetRegions(targets.regions);
+        if (!targets.projects.length) {
+          return;
+        }
+        
+        await fetchAgentInventory(targets.projects, targets.regions, (batch) => {
+          setEngineCounts(counts => {
+            const next = { ...counts };
+            batch.filter(item => !item.error).forEach(item => {
+              next[item.projectId] = (next[item.projectId] || 0) + 1;
+            });
+            return next;
+          });
+        });
+      } catch (error) {
+        console.error('Error loading fleet inventory:', error);
+      }
+    };
+    
+    loadFleet();
+  }, [isOpen, fleetProjects.length]);
+  
+  const defaultRegions = [
     'us-central1',
     'us-east1',
     'us-west1',
@@ -20,6 +56,7 @@ const ProjectSelector = ({ projectId, region, updateProjectSettings }) => {
     'asia-southeast1',
     'australia-southeast1'
   ];
+  const regions = [...new Set([...fleetRegions, ...defaultRegions])];
   
   const handleSubmit = (e) => {
     e.preventDefault();
@@ -54,6 +91,21 @@ const ProjectSelector = ({ projectId, region, updateProjectSettings }) => {
                   className="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500 focus:border-blue-500"
                   required
                 />
+                {fleetProjects.length > 0 && (
+                  <div className="mt-2 max-h-40 overflow-y-auto">
+                    {fleetProjects.map(fleetProject => (
+                      <button
+                        key={fleetProject}
+                        type="button"
+                        onClick={() => setInputProjectId(fleetProject)}
+                        className="w-full flex justify-between px-2 py-1 text-sm text-left rounded hover:bg-gray-100"
+                      >
+                        <span>{fleetProject}</span>
+                        <span className="text-gray-500">{engineCounts[fleetProject] || 0} agents</span>
+                      </button>
+                    ))}
+                  </div>
+                )}
               </div>
               
               <div className="mb-4">
@@ -32,19 +32,62 @@ api.interceptors.response.use(
   }
 );
 
+// =========== Pagination ===========
+
+// List endpoints return { items, nextCursor, limit }; follow nextCursor to collect every page
+const fetchAllPages = async (url, params = {}) => {
+  const items = [];
+  let cursor = null;
+  
+  do {
+    const response = await api.get(url, { params: cursor ? { ...params, cursor } : params });
+    items.push(...response.data.items);
+    cursor = response.data.nextCursor;
+  } while (cursor);
+  
+  return items;
+};
+
 // =========== Agent API ===========
 
-export const fetchAgents = async (projectId, region, filters = {}) => {
+export const fetchAgentsPage = async (projectId, region, filters = {}, cursor = null, limit = 50) => {
   try {
-    const params = { projectId, region, ...filters };
+    const params = { projectId, region, ...filters, limit };
+    if (cursor) {
+      params.cursor = cursor;
+    }
     const response = await api.get('/agents', { params });
     return response.data;
+  } catch (error) {
+    console.error('Error fetching agents page:', error);
+    throw error;
+  }
+};
+
+export const fetchAgents = async (projectId, region, filters = {}) => {
+  try {
+    const params = { projectId, region, ...filters };
+    return await fetchAllPages('/agents', params);
   } catch (error) {
     console.error('Error fetching agents:', error);
     throw error;
   }
 };
 
+export const fetchAgentFamiliesPage = async (filters = {}, cursor = null, limit = 50) => {
+  try {
+    const params = { ...filters, limit };
+    if (cursor) {
+      params.cursor = cursor;
+    }
+    const response = await api.get('/agent-families', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching agent families page:', error);
+    throw error;
+  }
+};
+
 export const fetchAgentDetails = async (projectId, region, agentId) => {
   try {
     const params = { projectId, region };
@@ -111,13 +154,87 @@ export const deployAgent = async (projectId, region, agentId, deploymentData) =>
   }
 };
 
+export const fetchJob = async (jobId) => {
+  try {
+    const response = await api.get(`/jobs/${jobId}`);
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching job:', error);
+    throw error;
+  }
+};
+
+// =========== Inventory API ===========
+
+export const fetchInventoryTargets = async () => {
+  try {
+    const response = await api.get('/inventory/targets');
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching inventory targets:', error);
+    throw error;
+  }
+};
+
+// Streams reasoning engines across projects and regions; onBatch receives items as they arrive
+export const fetchAgentInventory = async (projects = [], regions = [], onBatch = null) => {
+  const params = new URLSearchParams();
+  projects.forEach(project => params.append('projects', project));
+  regions.forEach(region => params.append('regions', region));
+  
+  const response = await fetch(`${API_URL}/inventory/agents?${params.toString()}`);
+  if (!response.ok) {
+    const error = new Error(`Error fetching agent inventory: ${response.status}`);
+    console.error(error);
+    throw error;
+  }
+  
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const items = [];
+  let buffer = '';
+  
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+    const lines = buffer.split('\n');
+    buffer = done ? '' : lines.pop();
+    
+    const batch = lines.filter(line => line.trim()).map(line => JSON.parse(line));
+    if (batch.length) {
+      items.push(...batch);
+      if (onBatch) {
+        onBatch(batch);
+      }
+    }
+    if (done) {
+      break;
+    }
+  }
+  
+  return items;
+};
+
 // =========== Deployment API ===========
 
-export const fetchDeployments = async (projectId, region, filters = {}) => {
+export const fetchDeploymentsPage = async (projectId, region, filters = {}, cursor = null, limit = 50) => {
   try {
-    const params = { projectId, region, ...filters };
+    const params = { projectId, region, ...filters, limit };
+    if (cursor) {
+      params.cursor = cursor;
+    }
     const response = await api.get('/deployments', { params });
     return response.data;
+  } catch (error) {
+    console.error('Error fetching deployments page:', error);
+    throw error;
+  }
+};
+
+export const fetchDeployments = async (projectId, region, filters = {}) => {
+  try {
+    const params = { projectId, region, ...filters };
+    return await fetchAllPages('/deployments', params);
   } catch (error) {
     console.error('Error fetching deployments:', error);
     throw error;
@@ -137,10 +254,23 @@ export const updateDeploymentStatus = async (projectId, region, deploymentId, st
 
 // =========== Template API ===========
 
-export const fetchTemplates = async (filters = {}) => {
+export const fetchTemplatesPage = async (filters = {}, cursor = null, limit = 50) => {
   try {
-    const response = await api.get('/templates', { params: filters });
+    const params = { ...filters, limit };
+    if (cursor) {
+      params.cursor = cursor;
+    }
+    const response = await api.get('/templates', { params });
     return response.data;
+  } catch (error) {
+    console.error('Error fetching templates page:', error);
+    throw error;
+  }
+};
+
+export const fetchTemplates = async (filters = {}) => {
+  try {
+    return await fetchAllPages('/templates', filters);
   } catch (error) {
     console.error('Error fetching templates:', error);
     throw error;
@@ -217,15 +347,22 @@ export const deleteSessionFiles = async (sessionId) => {
 };
 
 export default {
+  fetchAgentsPage,
   fetchAgents,
+  fetchAgentFamiliesPage,
   fetchAgentDetails,
   createAgent,
   updateAgent,
   deleteAgent,
   testAgent,
   deployAgent,
+  fetchJob,
+  fetchInventoryTargets,
+  fetchAgentInventory,
+  fetchDeploymentsPage,
   fetchDeployments,
   updateDeploymentStatus,
+  fetchTemplatesPage,
   fetchTemplates,
   fetchTemplateDetails,
   initializeFromTemplate,